@@ -0,0 +1,121 @@
+import hashlib
+import hmac
+import os
+import struct
+import tempfile
+
+
+# The header of an answer index: a magic number, the format version,
+# the number of PBKDF2 iterations and the number of records.
+HEADER = struct.Struct('<4sHII')
+MAGIC = b'EEAI'
+VERSION = 1
+
+SALT_SIZE = 16
+DIGEST_SIZE = hashlib.sha256().digest_size
+RECORD_SIZE = SALT_SIZE + DIGEST_SIZE
+
+# Answers are mostly small numbers, so the digests are made expensive
+# to compute to make guessing them from the index impractical.
+ITERATIONS = 100000
+
+DIGEST_FORMAT = 'pbkdf2_sha256$%d$%s$%s'
+
+
+class AnswerIndex:
+    """
+    The salted digests of the answers to problems, stored in an array of
+    fixed-size records indexed by problem ID, so an answer can be checked
+    without the answer itself or any other problem data.
+
+    Raises ValueError if the file isn't an answer index.
+
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._data = f.read()
+
+        if len(self._data) < HEADER.size:
+            raise ValueError('The file is too short')
+        magic, version, self.iterations, self._count = \
+            HEADER.unpack_from(self._data)
+        if magic != MAGIC:
+            raise ValueError('The file is not an answer index')
+        if version != VERSION:
+            raise ValueError('Unsupported answer index version %d' % version)
+        if len(self._data) != HEADER.size + self._count * RECORD_SIZE:
+            raise ValueError('The file is truncated')
+
+    def get(self, problem_id):
+        """
+        Returns the answer digest of a problem, in the form check_answer
+        takes, or None if the index has no answer for it.
+
+        """
+
+        if not 1 <= problem_id <= self._count:
+            return None
+
+        offset = HEADER.size + (problem_id - 1) * RECORD_SIZE
+        record = self._data[offset:offset + RECORD_SIZE]
+        if not any(record):
+            return None
+
+        return DIGEST_FORMAT % (self.iterations, record[:SALT_SIZE].hex(),
+                                record[SALT_SIZE:].hex())
+
+    def __len__(self):
+        return self._count
+
+
+def build_answer_index(problems, path, iterations=ITERATIONS):
+    """
+    Writes an answer index for the problems that have answers, with a
+    random salt for every answer. Returns the number of answers in it.
+
+    """
+
+    answers = {problem['id']: problem['answer'] for problem in problems
+               if problem.get('answer')}
+    count = max(answers, default=0)
+    records = bytearray(count * RECORD_SIZE)
+
+    for problem_id, answer in answers.items():
+        salt = os.urandom(SALT_SIZE)
+        offset = (problem_id - 1) * RECORD_SIZE
+        records[offset:offset + RECORD_SIZE] = \
+            salt + get_digest(answer, salt, iterations)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, iterations, count))
+            f.write(records)
+        # The index is meant to be shared, unlike most temporary files.
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+    return len(answers)
+
+
+def check_answer(output, answer_digest):
+    """
+    Checks an output against an answer digest from an answer index,
+    comparing the digests in constant time.
+
+    """
+
+    _, iterations, salt, digest = answer_digest.split('$')
+    output_digest = get_digest(output, bytes.fromhex(salt), int(iterations))
+    return hmac.compare_digest(output_digest, bytes.fromhex(digest))
+
+
+def get_digest(answer, salt, iterations):
+    return hashlib.pbkdf2_hmac('sha256', answer.encode('UTF-8'), salt,
+                               iterations)
@@ -0,0 +1,252 @@
+import os
+import posixpath
+import shutil
+import tarfile
+import tempfile
+import zipfile
+
+from EasyEuler.discovery import DEFAULT_EXCLUDES, IgnoreRule, is_ignored
+from EasyEuler.incremental import INCLUDE_REGEX
+
+
+ARCHIVE_EXTENSIONS = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2',
+                      '.tar.xz', '.txz', '.zip')
+
+# A tmpfs on Linux, so extracted files are never written to disk.
+SCRATCH_ROOT = '/dev/shm'
+
+# Since a tmpfs is memory, the size of every extracted file and the total
+# size of the files extracted by an extractor are limited (in bytes).
+MAX_FILE_SIZE = 16 * 1024 * 1024
+MAX_TOTAL_SIZE = 256 * 1024 * 1024
+
+# The number of bytes extracted at a time.
+CHUNK_SIZE = 65536
+
+
+def is_archive(path):
+    return path.lower().endswith(ARCHIVE_EXTENSIONS) and os.path.isfile(path)
+
+
+class Archive:
+    """
+    Read access to the regular files in a tar (optionally compressed)
+    or zip archive, by their normalized names. Raises ValueError if the
+    archive can't be opened.
+
+    """
+
+    def __init__(self, path):
+        try:
+            if path.lower().endswith('.zip'):
+                self._archive = zipfile.ZipFile(path)
+            else:
+                self._archive = tarfile.open(path)
+        except (OSError, tarfile.TarError, zipfile.BadZipFile) as exception:
+            raise ValueError(str(exception))
+
+        self._is_zip = isinstance(self._archive, zipfile.ZipFile)
+        self._members = {}
+        self._loaded = False
+
+    def get_names(self):
+        """
+        Generates the names of the files in the archive, in the order
+        they're stored. The members of tar archives are read as the
+        names are generated, rather than all at once.
+
+        """
+
+        if self._is_zip:
+            members = ((info.filename, not info.is_dir(), info)
+                       for info in self._archive.infolist())
+        else:
+            members = ((member.name, member.isfile(), member)
+                       for member in self._archive)
+
+        for name, is_file, member in members:
+            name = normalize_name(name)
+            if is_file and name is not None:
+                self._members.setdefault(name, member)
+                yield name
+        self._loaded = True
+
+    def contains(self, name):
+        if name not in self._members and not self._loaded:
+            # Reads the rest of the members.
+            for _ in self.get_names():
+                pass
+        return name in self._members
+
+    def open(self, name):
+        if self._is_zip:
+            return self._archive.open(self._members[name])
+        return self._archive.extractfile(self._members[name])
+
+    def close(self):
+        self._archive.close()
+
+
+class ArchiveExtractor:
+    """
+    Extracts the solutions in archives, and only the files they include,
+    to a scratch directory on a tmpfs (where there is one). The scratch
+    directory is shared by all archives and removed by close.
+
+    The names of the files in the archives are kept in names, by the
+    paths they were extracted to, as "<archive>:<name>". Those paths are
+    relative to the working directory, like the paths of other files, as
+    commands such as "./{path}.out" expect.
+
+    Extracting a file larger than max_file_size bytes, or more than
+    max_total_size bytes in total, fails, like reading a broken archive
+    does.
+
+    """
+
+    def __init__(self, max_file_size=MAX_FILE_SIZE,
+                 max_total_size=MAX_TOTAL_SIZE):
+        self.names = {}
+        self.max_file_size = max_file_size
+        self.max_total_size = max_total_size
+        self._extracted_size = 0
+        self._directory = None
+
+    def extract_solutions(self, path, filename_regex, excludes=()):
+        """
+        Generates the paths that the files in an archive whose names
+        match the regular expression were extracted to, along with the
+        match, as they're extracted. Files and directories with a name in
+        DEFAULT_EXCLUDES or matching the exclude patterns are skipped.
+
+        Raises ValueError if the archive can't be read, or a file in it
+        is too large to extract.
+
+        """
+
+        archive = Archive(path)
+        try:
+            directory = tempfile.mkdtemp(dir=self._get_directory(),
+                                         prefix=os.path.basename(path) + '.')
+            # The exclude patterns are matched as if the archive was
+            # extracted to its own path.
+            root = os.path.abspath(path)
+            rules = [IgnoreRule(exclude, root) for exclude in excludes]
+            extracted = set()
+
+            try:
+                for name in archive.get_names():
+                    match = filename_regex.match(posixpath.basename(name))
+                    if match is None or is_excluded(name, root, rules):
+                        continue
+
+                    extracted_path = get_relative_path(self._extract(
+                        archive, name, directory, extracted))
+                    self.names[extracted_path] = '%s:%s' % (path, name)
+                    yield extracted_path, match
+            except (OSError, tarfile.TarError,
+                    zipfile.BadZipFile) as exception:
+                raise ValueError(str(exception))
+        finally:
+            archive.close()
+
+    def close(self):
+        if self._directory is not None:
+            shutil.rmtree(self._directory, ignore_errors=True)
+            self._directory = None
+
+    def _get_directory(self):
+        if self._directory is None:
+            scratch_root = SCRATCH_ROOT if os.access(SCRATCH_ROOT, os.W_OK) \
+                else None
+            self._directory = tempfile.mkdtemp(prefix='easyeuler-',
+                                               dir=scratch_root)
+        return self._directory
+
+    def _extract(self, archive, name, directory, extracted):
+        """
+        Extracts a file from the archive, along with the files it
+        includes with #include "..." that are in the archive, unless
+        they were extracted already.
+
+        """
+
+        path = os.path.join(directory, *name.split('/'))
+        pending = [name]
+
+        while pending:
+            member_name = pending.pop()
+            member_path = os.path.join(directory, *member_name.split('/'))
+            os.makedirs(os.path.dirname(member_path), exist_ok=True)
+
+            with archive.open(member_name) as source, \
+                    open(member_path, 'wb') as destination:
+                self._copy(source, destination, member_name)
+            extracted.add(member_name)
+
+            with open(member_path, errors='replace') as f:
+                includes = INCLUDE_REGEX.findall(f.read())
+
+            for include in includes:
+                include_name = normalize_name(posixpath.join(
+                    posixpath.dirname(member_name), include))
+                if include_name is not None and \
+                   include_name not in extracted and \
+                   include_name not in pending and \
+                   archive.contains(include_name):
+                    pending.append(include_name)
+
+        return path
+
+    def _copy(self, source, destination, name):
+        """
+        Copies a file out of an archive, counting the bytes as they're
+        read rather than trusting the sizes the archive claims.
+
+        """
+
+        size = 0
+
+        for chunk in iter(lambda: source.read(CHUNK_SIZE), b''):
+            size += len(chunk)
+            self._extracted_size += len(chunk)
+            if size > self.max_file_size:
+                raise ValueError('%s is larger than %d bytes' %
+                                 (name, self.max_file_size))
+            if self._extracted_size > self.max_total_size:
+                raise ValueError('The extracted files are larger than %d '
+                                 'bytes' % self.max_total_size)
+            destination.write(chunk)
+
+
+def normalize_name(name):
+    """
+    Normalizes the name of a file in an archive, returning None for
+    names that would be outside of the directory it's extracted to.
+
+    """
+
+    name = posixpath.normpath(name.replace('\\', '/')).lstrip('/')
+    if name in ('', '.') or name == '..' or name.startswith('../'):
+        return None
+    return name
+
+
+def get_relative_path(path):
+    try:
+        return os.path.relpath(path)
+    except ValueError:
+        # The path is on another drive on Windows.
+        return path
+
+
+def is_excluded(name, root, rules):
+    parts = name.split('/')
+    if any(part in DEFAULT_EXCLUDES for part in parts[:-1]):
+        return True
+
+    for index in range(1, len(parts) + 1):
+        if is_ignored(os.path.join(root, *parts[:index]),
+                      index < len(parts), rules):
+            return True
+    return False
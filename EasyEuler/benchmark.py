@@ -0,0 +1,69 @@
+import csv
+import json
+import math
+
+
+STATISTICS = ('min', 'median', 'mean', 'stddev', 'p90', 'p95', 'p99', 'max')
+
+
+def summarize(samples):
+    """ Computes the statistics in STATISTICS of a list of samples. """
+
+    samples = sorted(samples)
+    mean = sum(samples) / len(samples)
+
+    if len(samples) > 1:
+        variance = sum((sample - mean) ** 2 for sample in samples) / \
+                   (len(samples) - 1)
+    else:
+        variance = 0
+
+    return {'min': samples[0], 'median': get_percentile(samples, 0.5),
+            'mean': mean, 'stddev': math.sqrt(variance),
+            'p90': get_percentile(samples, 0.9),
+            'p95': get_percentile(samples, 0.95),
+            'p99': get_percentile(samples, 0.99), 'max': samples[-1]}
+
+
+def get_percentile(sorted_samples, fraction):
+    """ Interpolates the percentile between the two closest samples. """
+
+    position = (len(sorted_samples) - 1) * fraction
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    weight = position - lower
+    return sorted_samples[lower] * (1 - weight) + \
+        sorted_samples[upper] * weight
+
+
+def summarize_runs(runs):
+    """
+    Summarizes the execution times of a list of runs,
+    for each kind of time measured.
+
+    """
+
+    return {key: summarize([run[key] for run in runs]) for key in runs[0]}
+
+
+def export_json(benchmarks, f):
+    json.dump(benchmarks, f, indent=4)
+
+
+def export_csv(benchmarks, f):
+    """ Writes a row per solution and kind of time measured. """
+
+    writer = csv.writer(f)
+    writer.writerow(('path', 'problem', 'language', 'correct', 'error',
+                     'runs', 'metric') + STATISTICS)
+
+    for benchmark in benchmarks:
+        for metric, statistics in sorted(benchmark['statistics'].items()):
+            writer.writerow(
+                (benchmark['path'], benchmark['problem'],
+                 benchmark['language'], benchmark['correct'],
+                 benchmark['error'], len(benchmark['runs']), metric) +
+                tuple(statistics[statistic] for statistic in STATISTICS))
+
+
+EXPORTERS = {'json': export_json, 'csv': export_csv}
@@ -0,0 +1,222 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+
+# Bump this whenever the layout of cached values changes,
+# so entries written by older versions are never used.
+CACHE_VERSION = 2
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def hash_values(*values):
+    digest = hashlib.sha256(str(CACHE_VERSION).encode('UTF-8'))
+
+    for value in values:
+        digest.update(json.dumps(value, sort_keys=True).encode('UTF-8'))
+        digest.update(b'\0')
+
+    return digest.hexdigest()
+
+
+class FileCache:
+    """
+    A directory of JSON files addressed by key.
+
+    Entries are written atomically, so a cache may safely be shared
+    between threads and processes. Reading an entry updates its
+    modification time, which is used to evict the least recently
+    used entries once there are more than max_entries of them.
+
+    """
+
+    STATS_FILE = 'stats.json'
+
+    def __init__(self, directory, max_entries):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        path = self._get_path(key)
+
+        try:
+            with open(path) as f:
+                value = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        os.makedirs(self.directory, exist_ok=True)
+        self._write(self._get_path(key), value)
+
+    def evict(self):
+        entries = self._get_entries()
+        if len(entries) <= self.max_entries:
+            return
+
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:len(entries) - self.max_entries]:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+    def save_stats(self):
+        """ Adds the hits and misses of this session to the totals. """
+
+        stats = self._read_stats()
+        stats['hits'] += self.hits
+        stats['misses'] += self.misses
+        self.hits = self.misses = 0
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._write(os.path.join(self.directory, self.STATS_FILE), stats)
+
+    def get_stats(self):
+        entries = self._get_entries()
+        stats = self._read_stats()
+        stats['hits'] += self.hits
+        stats['misses'] += self.misses
+        stats['entries'] = len(entries)
+        stats['size'] = sum(entry.stat().st_size for entry in entries)
+        return stats
+
+    def _get_path(self, key):
+        return os.path.join(self.directory, '%s.json' % key)
+
+    def _get_entries(self):
+        try:
+            return [entry for entry in os.scandir(self.directory)
+                    if entry.name.endswith('.json') and
+                    entry.name != self.STATS_FILE]
+        except FileNotFoundError:
+            return []
+
+    def _read_stats(self):
+        try:
+            with open(os.path.join(self.directory, self.STATS_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'hits': 0, 'misses': 0}
+
+    def _write(self, path, value):
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(value, f)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+
+class ResultCache(FileCache):
+    """ Caches verification results of solutions. """
+
+    def get_key(self, source_hash, commands, problem, limits=None):
+        """
+        Identifies a verification by the hash of the file and the files
+        it includes (see incremental.hash_source), the commands used to
+        verify it, the expected answer (or its digest) and the limits it
+        was executed with.
+
+        """
+
+        answer = problem.get('answer', problem.get('answer digest'))
+        return hash_values(source_hash, commands, answer, limits)
+
+
+class BuildCache:
+    """
+    Caches the artifacts produced by building solutions.
+
+    Artifacts are copied in and out of the cache, so removing or
+    rebuilding an artifact never affects the cached copy. The least
+    recently used artifacts are evicted once their total size exceeds
+    max_size bytes.
+
+    """
+
+    def __init__(self, directory, max_size, refresh=False):
+        self.directory = directory
+        self.max_size = max_size
+        self.refresh = refresh
+
+    def get_key(self, source_hash, language):
+        """
+        Identifies a build by the hash of the file and the files it
+        includes (see incremental.hash_source) and the (unformatted)
+        commands used to build it, so the same file is only built once
+        regardless of where it's located.
+
+        """
+
+        return hash_values(source_hash, language['build'],
+                           language['artifact'])
+
+    def restore(self, key, artifact_path):
+        """
+        Copies a cached artifact to artifact_path.
+        Returns False if the artifact isn't cached.
+
+        """
+
+        if self.refresh:
+            return False
+
+        cached_path = os.path.join(self.directory, key)
+
+        try:
+            shutil.copy2(cached_path, artifact_path)
+            os.utime(cached_path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def store(self, key, artifact_path):
+        os.makedirs(self.directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        os.close(fd)
+
+        try:
+            shutil.copy2(artifact_path, temp_path)
+            os.replace(temp_path, os.path.join(self.directory, key))
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    def evict(self):
+        try:
+            entries = [entry for entry in os.scandir(self.directory)
+                       if not entry.name.endswith('.tmp')]
+        except FileNotFoundError:
+            return
+
+        entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+        size = 0
+
+        for entry in entries:
+            size += entry.stat().st_size
+            if size > self.max_size:
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
@@ -1,32 +1,75 @@
+import importlib
 import os
 
 import click
 
-from EasyEuler import paths
+
+# Commands are listed here instead of being discovered in the commands
+# directory, so nothing has to be read from the disk on startup.
+COMMANDS = {
+    'create': 'EasyEuler.commands.create',
+    'generate-index': 'EasyEuler.commands.generate_index',
+    'generate-resources': 'EasyEuler.commands.generate_resources',
+    'history': 'EasyEuler.commands.history',
+    'list': 'EasyEuler.commands.list',
+    'search': 'EasyEuler.commands.search',
+    'serve': 'EasyEuler.commands.serve',
+    'show': 'EasyEuler.commands.show',
+    'verify': 'EasyEuler.commands.verify'
+}
+
+# The short help of the commands, which is shown in the help message
+# without importing them.
+SHORT_HELP = {
+    'create': 'Create the file for a problem.',
+    'generate-index': 'Generate the problem index.',
+    'generate-resources': 'Generate the resource files for problems.',
+    'history': 'Show the history of verified solutions.',
+    'list': 'Lists all available problems.',
+    'search': 'Search the problems.',
+    'serve': 'Run a daemon that runs commands for the CLI.',
+    'show': 'Show a problems description.',
+    'verify': 'Verify the solution to a problem.'
+}
+
+# The commands that are forwarded to the daemon (see serve) when it's
+# running, unless EASYEULER_NO_DAEMON is set.
+DAEMON_COMMANDS = ('create', 'show', 'verify')
 
 
 class CommandLineInterface(click.MultiCommand):
     def list_commands(self, ctx):
-        commands = []
+        return sorted(COMMANDS)
 
-        for filename in os.listdir(paths.COMMANDS):
-            if filename.endswith('.py') and filename != '__init__.py':
-                commands.append(filename[:-3].replace('_', '-'))
+    def resolve_command(self, ctx, args):
+        # Only commands that are run are forwarded, so their help is
+        # still shown in the list of commands.
+        name = args[0] if args else None
+        if name in DAEMON_COMMANDS and \
+           'EASYEULER_NO_DAEMON' not in os.environ:
+            from EasyEuler import paths
+            if os.path.exists(paths.SOCKET):
+                from EasyEuler.client import make_forwarding_command
+                return (name, make_forwarding_command(name, COMMANDS[name]),
+                        args[1:])
 
-        commands.sort()
-        return commands
+        return super().resolve_command(ctx, args)
 
     def get_command(self, ctx, name):
-        # We don't want foo_bar to be interpreted as a valid command,
-        # but we still want foo-bar to be.
-        name = name.replace('_', '').replace('-', '_')
-
-        try:
-            command = __import__('EasyEuler.commands.%s' % name,
-                                 None, None, ['cli'])
-        except ImportError:
-            return
-        return command.cli
+        if name not in COMMANDS:
+            return None
+
+        # Commands are only imported once they're needed, and they
+        # import their own dependencies, so a command never pays
+        # for the dependencies of another.
+        return importlib.import_module(COMMANDS[name]).cli
+
+    def format_commands(self, ctx, formatter):
+        # The commands are listed with their short help from SHORT_HELP,
+        # since getting it from the commands would import all of them.
+        with formatter.section('Commands'):
+            formatter.write_dl([(name, SHORT_HELP[name])
+                                for name in self.list_commands(ctx)])
 
 
 cli = CommandLineInterface()
@@ -0,0 +1,91 @@
+import importlib
+import json
+import os
+import socket
+import sys
+
+import click
+
+from EasyEuler import paths
+
+
+# Commands that may prompt, which are only forwarded to the daemon when
+# there's no one to answer the prompts.
+INTERACTIVE_COMMANDS = ('create',)
+
+# Options that keep a command running until it's interrupted, which
+# would keep the daemon from running any other command meanwhile.
+LOCAL_OPTIONS = ('--watch',)
+
+
+def make_forwarding_command(name, module_name):
+    """
+    Makes a command that forwards its arguments to the daemon, or runs
+    the actual command if the daemon can't be reached.
+
+    """
+
+    @click.command(name, add_help_option=False,
+                   context_settings={'ignore_unknown_options': True})
+    @click.argument('arguments', nargs=-1, type=click.UNPROCESSED)
+    @click.pass_context
+    def cli(ctx, arguments):
+        exit_code = None
+        if (name not in INTERACTIVE_COMMANDS or not sys.stdin.isatty()) and \
+           not any(option in arguments for option in LOCAL_OPTIONS):
+            exit_code = forward(name, arguments)
+
+        if exit_code is None:
+            command = importlib.import_module(module_name).cli
+            command.main(list(arguments), prog_name=ctx.command_path,
+                         standalone_mode=False)
+        else:
+            ctx.exit(exit_code)
+
+    return cli
+
+
+def forward(command, arguments, path=None):
+    """
+    Runs a command in the daemon listening on the socket at path,
+    writing its output as it arrives. Returns the exit code, or None if
+    the daemon isn't running.
+
+    """
+
+    try:
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    except (AttributeError, OSError):
+        return None
+
+    with client:
+        try:
+            client.connect(path or paths.SOCKET)
+        except OSError:
+            return None
+
+        # Only the answers to the prompts of interactive commands, which
+        # are only forwarded when stdin isn't a terminal, and the paths
+        # for verify - are read from stdin. Otherwise stdin is left
+        # alone, since it may never be closed.
+        if command in INTERACTIVE_COMMANDS or \
+           (command == 'verify' and '-' in arguments):
+            stdin = sys.stdin.read()
+        else:
+            stdin = None
+        request = {'command': command, 'arguments': list(arguments),
+                   'directory': os.getcwd(), 'environment': dict(os.environ),
+                   'stdin': stdin, 'color': sys.stdout.isatty()}
+        client.sendall((json.dumps(request) + '\n').encode('UTF-8'))
+
+        for line in client.makefile(encoding='UTF-8'):
+            message = json.loads(line)
+            if 'exit' in message:
+                return message['exit']
+
+            stream = sys.stdout if 'stdout' in message else sys.stderr
+            stream.write(message.get('stdout', message.get('stderr')))
+            stream.flush()
+
+    click.echo('The daemon stopped while running %s' % command, err=True)
+    return 1
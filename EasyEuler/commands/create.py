@@ -4,17 +4,27 @@ import sys
 import click
 
 from EasyEuler import data
-from EasyEuler.types import LanguageType, ProblemType
-from EasyEuler.commands.generate_resources import generate_resources
+from EasyEuler.formatting import format_count
+from EasyEuler.types import LanguageType, ProblemRangeType
+from EasyEuler.commands.generate_resources import (confirm_write,
+                                                     generate_resources)
 
 
 @click.command()
 @click.option('--path', '-p', type=click.Path(),
-              help='Writes the file to PATH.')
-@click.argument('problem', type=ProblemType())
-@click.argument('language', type=LanguageType(),
-                required=False, default=data.config['default language'])
-def cli(problem, language, path):
+              help='Writes the file to PATH. When creating multiple files, '
+                   'PATH is the directory to write them to.')
+@click.option('--skip-existing', 'conflict', flag_value='skip',
+              help="Don't overwrite files that already exist.")
+@click.option('--overwrite', 'conflict', flag_value='overwrite',
+              help='Overwrite files that already exist.')
+@click.option('--resources/--no-resources', default=None,
+              help='Whether to generate the resources the problems '
+                   'reference, without asking.')
+@click.argument('problems', type=ProblemRangeType())
+@click.argument('languages', type=LanguageType(), nargs=-1,
+                metavar='[LANGUAGE]...')
+def cli(problems, languages, path, conflict, resources):
     """
     Create the file for a problem.
 
@@ -24,16 +34,39 @@ def cli(problem, language, path):
     Optionally, the LANGUAGE argument can be specified, which will then
     be used to identify an appropriate template for the file.
 
+    Files for multiple problems can be created at once by specifying a
+    list of problem IDs and ranges, e.g. 1-10,15, and for multiple
+    languages by specifying more than one LANGUAGE.
+
+    Unless --skip-existing or --overwrite is specified, you will be
+    asked whether to overwrite files that already exist.
+
+    If the problems reference resources, you will be asked whether to
+    generate them, which for multiple files is done in the directory
+    they're created in. Existing resource files are handled the same
+    way as existing problem files. Since --skip-existing and --overwrite
+    are meant for creating files without prompts, they aren't generated
+    with either of them, unless --resources is specified.
+
     """
 
+    if not languages:
+        # The default is looked up here rather than in the decorator,
+        # so the configuration isn't loaded when the module is imported.
+        languages = [LanguageType().convert(data.config['default language'],
+                                            None, None)]
+
+    if len(problems) * len(languages) == 1:
+        create_file(problems[0], languages[0], path, conflict, resources)
+    else:
+        create_files(problems, languages, path, conflict, resources)
+
+
+def create_file(problem, language, path, conflict, resources=None):
     if path is None:
-        filename_format = data.config['filename format']
-        path = filename_format.format(id=problem['id'],
-                                      extension=language['extension'])
+        path = get_file_path(problem, language)
 
-    if os.path.exists(path) and not \
-       click.confirm('%s already exists. Do you want to overwrite it?' %
-                     click.format_filename(path)):
+    if not confirm_write(path, conflict):
         return
 
     try:
@@ -43,18 +76,100 @@ def cli(problem, language, path):
 
     click.echo('Written to %s' % click.format_filename(path))
 
-    if 'resources' in problem and \
-        click.confirm('Generate resources for this problem?'):
-            resource_path = click.prompt('Path (default: current directory)',
-                                         default='.', show_default=False,
-                                         type=click.Path(writable=True,
-                                                         readable=False))
-            generate_resources(problem['resources'], resource_path)
+    if 'resources' not in problem or not confirm_resources(
+            'Generate resources for this problem?', conflict, resources):
+        return
+
+    if resources is None:
+        resource_path = click.prompt('Path (default: current directory)',
+                                     default='.', show_default=False,
+                                     type=click.Path(writable=True,
+                                                     readable=False))
+    else:
+        resource_path = '.'
+    generate_resources(problem['resources'], resource_path, conflict)
 
 
-def write_to_file(problem, language, path):
+def create_files(problems, languages, directory, conflict, resources=None):
+    """
+    Creates the files for every combination of problems and languages,
+    looking up the template for each language only once.
+
+    """
+
+    if directory is not None:
+        if os.path.exists(directory) and not os.path.isdir(directory):
+            sys.exit('%s needs to be a directory to create multiple files' %
+                     click.format_filename(directory))
+        os.makedirs(directory, exist_ok=True)
+
+    written, skipped = 0, 0
+
+    for language in languages:
+        template = get_template(language)
+
+        for problem in problems:
+            path = get_file_path(problem, language, directory)
+
+            if not confirm_write(path, conflict):
+                skipped += 1
+                continue
+
+            try:
+                write_template(template, problem, path)
+            except (FileNotFoundError, PermissionError) as exception:
+                sys.exit('An exception occurred: %s' % exception)
+            written += 1
+
+    click.echo('Created %s, skipped %s' % (
+        format_count(written, 'file'), format_count(skipped, 'existing file')))
+
+    resource_count = sum('resources' in problem for problem in problems)
+    if resource_count > 0 and confirm_resources(
+            'Generate resources for the %s that reference%s them?' %
+            (format_count(resource_count, 'problem'),
+             's' if resource_count == 1 else ''), conflict, resources):
+        generate_resources(sorted({resource for problem in problems
+                                   for resource in problem.get('resources',
+                                                               [])}),
+                           directory or '.', conflict)
+
+
+def confirm_resources(message, conflict, resources=None):
+    """
+    Asks whether to generate resources, unless --resources or
+    --no-resources was specified. Without them, resources aren't
+    generated along with --skip-existing or --overwrite, which are used
+    to create files without prompts.
+
+    """
+
+    if resources is not None:
+        return resources
+    if conflict is not None:
+        return False
+    return click.confirm(message)
+
+
+def get_file_path(problem, language, directory=None):
+    filename_format = data.config['filename format']
+    path = filename_format.format(id=problem['id'],
+                                  extension=language['extension'])
+
+    if directory is not None:
+        path = os.path.join(directory, path)
+    return path
+
+
+def get_template(language):
     template_name = language.get('template', language['name'])
-    template = data.templates.get_template(template_name)
+    return data.get_templates().get_template(template_name)
+
+
+def write_to_file(problem, language, path):
+    write_template(get_template(language), problem, path)
+
 
+def write_template(template, problem, path):
     with open(path, 'w') as problem_file:
         problem_file.write(template.render(**problem))
@@ -0,0 +1,35 @@
+import click
+
+from EasyEuler import data
+from EasyEuler.answers import build_answer_index
+
+
+@click.command('generate-index')
+@click.option('--answers', 'answer_index', metavar='PATH',
+              type=click.Path(dir_okay=False, writable=True),
+              help='Also write an index of the salted digests of the answers '
+                   'to PATH, for verify --answers.')
+def cli(answer_index):
+    """
+    Generate the problem index.
+
+    The index is used to look up and search problems without loading
+    all of them.
+    It's generated automatically when it's missing or older than the
+    problem data, so this is only needed to generate it ahead of time.
+
+    The answer index lets solutions be verified without the problem
+    data, which contains the answers in plain text, so it can be used
+    where the answers shouldn't be readable.
+
+    """
+
+    data.problems.build_index()
+    click.echo('Indexed %d problems at %s' %
+               (len(data.problems),
+                click.format_filename(data.problems.index)))
+
+    if answer_index is not None:
+        count = build_answer_index(data.problems, answer_index)
+        click.echo('Indexed %d answers at %s' %
+                   (count, click.format_filename(answer_index)))
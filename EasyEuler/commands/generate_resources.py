@@ -1,18 +1,28 @@
+import concurrent.futures
 import os
-import shutil
 import sys
 
 import click
 
 from EasyEuler import paths
+from EasyEuler.formatting import format_count
+from EasyEuler.links import (LINK_METHODS, is_identical, is_same_file,
+                             link_file)
 from EasyEuler.types import ProblemType
 
 
 @click.command('generate-resources')
 @click.option('--path', '-p', type=click.Path(writable=True, readable=False),
               default='.', help='Creates the file(s) at PATH.')
+@click.option('--link', type=click.Choice(LINK_METHODS), default='copy',
+              help='How to create the files (default: copy). Methods '
+                   "that aren't supported fall back to copying.")
+@click.option('--skip-existing', 'conflict', flag_value='skip',
+              help="Don't overwrite files that already exist.")
+@click.option('--overwrite', 'conflict', flag_value='overwrite',
+              help='Overwrite files that already exist.')
 @click.argument('problem', type=ProblemType(), required=False)
-def cli(problem, path):
+def cli(problem, path, link, conflict):
     """
     Generate the resource files for problems.
 
@@ -22,36 +32,90 @@ def cli(problem, path):
     If the PROBLEM argument isn't specified, all resources will be
     generated.
 
+    Instead of copying, the files can be hard linked, symlinked or
+    reflinked (sharing the data on copy-on-write file systems) to the
+    ones in the package with --link, so they take no extra disk space.
+    Files that are already linked to them are left as they are, and so
+    are files that already have the same content when copying. When
+    linking, such copies are replaced by links without asking.
+
+    Unless --skip-existing or --overwrite is specified, you will be
+    asked whether to overwrite files that already exist.
+
     """
 
     if problem is None:
-        resources = os.listdir('%s/resources' % paths.DATA)
+        resources = sorted(os.listdir(paths.RESOURCES))
     else:
         if 'resources' not in problem:
             sys.exit('Problem %s has no resource files' % problem['id'])
         resources = problem['resources']
 
-    generate_resources(resources, path)
+    generate_resources(resources, path, conflict, link)
 
 
-def generate_resources(resources, path):
+def generate_resources(resources, path, conflict=None, link='copy'):
     if len(resources) > 1 and not os.path.isdir(path):
         if os.path.exists(path):
             sys.exit('%s needs to be a directory to create multiple '
                      'resource files' % click.format_filename(path))
         os.mkdir(path)
 
+    pending = []
+    skipped, identical = 0, 0
+
+    # The conflicts are resolved before any file is created, since asking
+    # about them can't be done concurrently.
     for resource in resources:
+        source = os.path.join(paths.RESOURCES, resource)
         if len(resources) > 1 or os.path.isdir(path):
-            resource_path = '%s/%s' % (path, resource)
+            resource_path = os.path.join(path, resource)
         else:
             resource_path = path
 
-        if os.path.exists(resource_path) and not \
-           click.confirm('%s already exists. Do you want to overwrite it?' %
-                         click.format_filename(resource_path)):
-            continue
+        if os.path.lexists(resource_path):
+            # Copies are replaced when linking, so they stop taking up
+            # space, which is safe since files are replaced atomically.
+            if is_same_file(source, resource_path) or \
+               (link == 'copy' and is_identical(source, resource_path)):
+                identical += 1
+                continue
+            if not is_identical(source, resource_path) and \
+               not confirm_write(resource_path, conflict):
+                skipped += 1
+                continue
+        pending.append((resource, source, resource_path))
+
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        futures = [executor.submit(link_file, source, resource_path, link)
+                   for _, source, resource_path in pending]
+
+        for (resource, _, _), future in zip(pending, futures):
+            try:
+                method = future.result()
+            except OSError as exception:
+                sys.exit('An exception occurred: %s' % exception)
+
+            message = 'Created %s at path %s' % (resource,
+                                                 click.format_filename(path))
+            if link != 'copy':
+                message += ' (%s)' % method
+            click.echo(message)
+
+    if len(resources) > 1:
+        click.echo('Created %s, skipped %s and %s' % (
+            format_count(len(pending), 'file'),
+            format_count(skipped, 'existing file'),
+            format_count(identical, 'identical file')))
+    elif identical:
+        click.echo('%s is up to date at path %s' %
+                   (resources[0], click.format_filename(path)))
+
 
-        shutil.copy('%s/resources/%s' % (paths.DATA, resource), path)
-        click.echo('Created %s at path %s' % (resource,
-                                              click.format_filename(path)))
+def confirm_write(path, conflict):
+    if not os.path.exists(path) or conflict == 'overwrite':
+        return True
+    if conflict == 'skip':
+        return False
+    return click.confirm('%s already exists. Do you want to overwrite it?' %
+                         click.format_filename(path))
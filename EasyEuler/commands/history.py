@@ -0,0 +1,83 @@
+import datetime
+import sys
+
+import click
+
+from EasyEuler import paths
+from EasyEuler.formatting import format_time
+from EasyEuler.history import REGRESSION_WINDOW, History
+
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+@click.command()
+@click.option('--language', '-l',
+              help='Only show solutions in this language.')
+@click.option('--limit', '-n', type=click.IntRange(1), default=5,
+              help='Number of runs to show per solution (default: 5).')
+@click.option('--threshold', type=click.FloatRange(0), default=10,
+              help='How many percent slower a solution has to get to be '
+                   'flagged as a regression (default: 10).')
+@click.option('--window', type=click.IntRange(1), default=REGRESSION_WINDOW,
+              help='Number of correct runs that the last one is compared '
+                   'to (default: %d).' % REGRESSION_WINDOW)
+@click.option('--regressions', '-r', is_flag=True,
+              help='Only show solutions flagged as regressions.')
+@click.option('--fail-on-regression', is_flag=True,
+              help='Exit with a non-zero status if any solution is '
+                   'flagged as a regression.')
+@click.argument('problem', type=int, required=False)
+def cli(problem, language, limit, threshold, window, regressions,
+        fail_on_regression):
+    """
+    Show the history of verified solutions.
+
+    Every run recorded by verify is shown, the most recent run first,
+    along with its wall time (the median wall time for benchmarks).
+
+    A solution is flagged as a regression if the wall time of its last
+    correct run is more than THRESHOLD percent slower than the median
+    wall time of the WINDOW correct runs before it (5 by default), so
+    the time of a single run on a busy machine doesn't flag it. For
+    benchmarks, the median of their runs is compared.
+
+    """
+
+    history = History(paths.HISTORY)
+    regression_count = 0
+
+    for problem_id, language_name in history.get_solutions(problem, language):
+        regression = history.get_regression(problem_id, language_name,
+                                            threshold / 100, window)
+        if regression is not None:
+            regression_count += 1
+        elif regressions:
+            continue
+
+        click.secho('Problem %d (%s)' % (problem_id, language_name),
+                    bold=True, nl=False)
+        if regression is not None:
+            click.secho(' [%.1f%% slower]' % (regression * 100), fg='red',
+                        bold=True)
+        else:
+            click.echo()
+
+        for run in history.get_runs(problem_id, language_name, limit):
+            print_run(run)
+
+    history.close()
+
+    if fail_on_regression and regression_count > 0:
+        sys.exit('%d solutions got slower' % regression_count)
+
+
+def print_run(run):
+    timestamp = datetime.datetime.fromtimestamp(run['timestamp'])
+    wall_time = format_time(run['wall']) if run['wall'] is not None else '-'
+    runs = ' (median of %d runs)' % run['runs'] if run['runs'] > 1 else ''
+
+    click.secho('  %s  %-12s  %8s%s' %
+                (timestamp.strftime(TIMESTAMP_FORMAT), run['status'],
+                 wall_time, runs),
+                fg='green' if run['status'] == 'correct' else 'red')
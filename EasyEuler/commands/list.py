@@ -1,21 +1,72 @@
 import click
-from tabulate import tabulate
 
-from EasyEuler import data
+from EasyEuler import data, paths
+from EasyEuler.types import RangeType
 
 
 TABLE_HEADERS = ('ID', 'Name', 'Difficulty')
+FORMATS = ('table', 'plain')
 
 
 @click.command()
 @click.option('--sort', '-s', type=click.Choice(('id', 'difficulty')),
               default='id', help='Sort the list by problem attribute.')
-def cli(sort):
-    """ Lists all available problems. """
+@click.option('--range', '-r', 'problem_ids', type=RangeType(),
+              help='Only list problems with these IDs, e.g. 1-10,15.')
+@click.option('--difficulty', '-d', type=RangeType(),
+              help='Only list problems with these difficulties in percent, '
+                   'e.g. 0-25.')
+@click.option('--search', '-q', metavar='TEXT',
+              help='Only list problems whose name contains TEXT.')
+@click.option('--solved/--unsolved', default=None,
+              help='Only list problems that have (or have not) been '
+                   'solved, according to the history of verify.')
+@click.option('--limit', '-n', type=click.IntRange(0),
+              help='List at most this many problems.')
+@click.option('--offset', type=click.IntRange(0), default=0,
+              help='Skip this many problems before listing any.')
+@click.option('--format', '-f', 'output_format', type=click.Choice(FORMATS),
+              default='table',
+              help='Show a table in a pager, or write tab-separated rows '
+                   'as they are read (default: table).')
+def cli(sort, problem_ids, difficulty, search, solved, limit, offset,
+        output_format):
+    """
+    Lists all available problems.
 
-    problems = sorted(data.problems, key=lambda problem: problem[sort.lower()])
-    problem_list = ((problem['id'], problem['name'],
-                     '%d%%' % problem['difficulty']) for problem in problems)
+    The problems can be filtered by ID, difficulty, name and whether
+    they've been solved, in which case only the matching problems are
+    read from the problem index.
+
+    """
+
+    solved_ids = None
+    if solved is not None:
+        # The history is only imported here, since it's
+        # not needed unless solved problems are filtered.
+        from EasyEuler.history import History
+
+        history = History(paths.HISTORY)
+        solved_ids = history.get_solved()
+        history.close()
+
+    summaries = data.problems.get_summaries(
+        sort.lower(), problem_ids, difficulty, search,
+        include=solved_ids if solved else None,
+        exclude=solved_ids if solved is False else None,
+        limit=limit, offset=offset)
+
+    if output_format == 'plain':
+        for problem_id, name, problem_difficulty in summaries:
+            click.echo('%d\t%s\t%d%%' % (problem_id, name, problem_difficulty))
+        return
+
+    # tabulate is only imported here, as it's slow to import and
+    # no other command needs it.
+    from tabulate import tabulate
+
+    problem_list = ((problem_id, name, '%d%%' % problem_difficulty)
+                    for problem_id, name, problem_difficulty in summaries)
 
     table = tabulate(problem_list, TABLE_HEADERS, tablefmt='fancy_grid')
     click.echo_via_pager(table)
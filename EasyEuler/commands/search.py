@@ -0,0 +1,27 @@
+import click
+
+from EasyEuler import data
+
+
+@click.command()
+@click.option('--limit', '-n', type=click.IntRange(1), default=10,
+              help='Number of results to show (default: 10).')
+@click.argument('query', nargs=-1, required=True)
+def cli(query, limit):
+    """
+    Search the problems.
+
+    Finds the problems whose names, descriptions or resources contain
+    the words in QUERY, the best match first. Matches in names count
+    the most and problems matching more of the words rank higher.
+
+    """
+
+    results = data.problems.search(' '.join(query), limit)
+
+    if not results:
+        click.echo('No problems match %s' % ' '.join(query))
+        return
+
+    for problem_id, name, _ in results:
+        click.echo('%4d  %s' % (problem_id, name))
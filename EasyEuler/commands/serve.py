@@ -0,0 +1,62 @@
+import signal
+import socket
+import sys
+
+import click
+
+from EasyEuler import paths
+from EasyEuler.client import forward
+from EasyEuler.server import Server
+
+
+@click.command()
+@click.option('--socket', 'socket_path', metavar='PATH',
+              type=click.Path(dir_okay=False),
+              help='Listen on the Unix socket at PATH instead of the '
+                   'default one (which the other commands look for).')
+@click.option('--stop', is_flag=True,
+              help='Stop the daemon that is running.')
+def cli(socket_path, stop):
+    """
+    Run a daemon that runs commands for the CLI.
+
+    While the daemon is running, the verify, show and create commands
+    are forwarded to it and run there, in the working directory they
+    were run in. It keeps the problem data, the configuration, the
+    templates and the workers of --warm loaded, so a command doesn't
+    have to load them every time, and only the solutions themselves
+    are started.
+
+    create is only forwarded when stdin isn't a terminal, since its
+    prompts can't be answered through the daemon. Set the
+    EASYEULER_NO_DAEMON environment variable to run commands without
+    the daemon.
+
+    """
+
+    if not hasattr(socket, 'AF_UNIX'):
+        sys.exit('The daemon is not supported on this platform')
+
+    socket_path = socket_path or paths.SOCKET
+
+    if stop:
+        if forward('stop', [], socket_path) is None:
+            sys.exit('The daemon is not running')
+        click.echo('Stopped the daemon')
+        return
+
+    server = Server(socket_path)
+    try:
+        server.start()
+    except OSError as exception:
+        sys.exit('Could not start the daemon: %s' % exception)
+    click.echo('Listening on %s' % click.format_filename(socket_path))
+
+    # Stop cleanly when terminated, removing the socket.
+    signal.signal(signal.SIGTERM, lambda signal_number, frame: sys.exit(0))
+    try:
+        server.serve()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
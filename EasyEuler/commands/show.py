@@ -1,6 +1,7 @@
 import click
 
-from EasyEuler import data
+from EasyEuler import data, paths
+from EasyEuler.cache import FileCache, hash_values
 from EasyEuler.types import ProblemType
 
 
@@ -9,6 +10,26 @@ from EasyEuler.types import ProblemType
 def cli(problem):
     """ Show a problems description. """
 
-    template = data.templates.get_template('description')
-    description = template.render(**problem)
-    click.echo(description)
+    click.echo(render_description(problem))
+
+
+def render_description(problem):
+    """
+    Renders the description of a problem. Rendered descriptions are
+    cached until the problem or any of the templates change, so the
+    template environment is only needed the first time.
+
+    """
+
+    cache = FileCache(paths.DESCRIPTION_CACHE,
+                      data.config['cache']['max descriptions'])
+    key = hash_values(problem, data.get_template_signature())
+    description = cache.get(key)
+
+    if description is None:
+        template = data.get_templates().get_template('description')
+        description = template.render(**problem)
+        cache.set(key, description)
+        cache.evict()
+
+    return description
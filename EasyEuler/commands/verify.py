@@ -1,18 +1,45 @@
-import math
+import collections
+import hmac
 import os
 import re
-import subprocess
+import shlex
+import signal
 import sys
 import time
 
 import click
 
-from EasyEuler import data
+from EasyEuler import data, paths as easyeuler_paths
+from EasyEuler.answers import AnswerIndex, check_answer
+from EasyEuler.benchmark import EXPORTERS, STATISTICS, summarize_runs
+from EasyEuler.cache import BuildCache, ResultCache, hash_file
+from EasyEuler.discovery import (DEFAULT_EXCLUDES, find_solution_files,
+                                 get_filename_regex, is_solution_file)
+from EasyEuler.history import History
+from EasyEuler.incremental import (Manifest, get_dependencies,
+                                   get_git_changes, hash_source)
+from EasyEuler.process import (LIMITS, get_peak_memory, run_process,
+                               run_process_async)
+from EasyEuler.progress import Progress
+from EasyEuler.reporters import REPORTERS
+from EasyEuler.formatting import format_count, format_size, format_time
 from EasyEuler.types import LanguageType
 
 
 PROBLEM_ID_REGEX = re.compile(r'\D*([1-9]\d{0,2}).*')
 STAGES = ('build', 'execute', 'cleanup')
+EXEC_MODES = ('shell', 'direct')
+BACKENDS = ('threads', 'asyncio')
+LIMIT_STATUSES = ('timeout', 'memory-limit')
+RESULT_STATUSES = ('correct', 'incorrect', 'error') + LIMIT_STATUSES
+
+# The worker pool of the daemon (see serve), which is kept running
+# between verifications instead of starting a new one every time.
+shared_worker_pool = None
+
+# The environment of the client the daemon is verifying for, which the
+# solutions run in instead of the daemon's own, or None outside of it.
+environment = None
 
 
 @click.command()
@@ -24,9 +51,78 @@ STAGES = ('build', 'execute', 'cleanup')
               help='Verify files in specified directory paths.')
 @click.option('--language', '-l', type=LanguageType(),
               help='The language of the file(s).')
-@click.argument('paths', type=click.Path(exists=True, readable=True), nargs=-1,
-                metavar='[PATH]...')
-def cli(paths, language, time, errors, recursive):
+@click.option('--jobs', '-j', type=click.IntRange(1), default=os.cpu_count(),
+              help='Number of files to verify concurrently '
+                   '(default: number of CPUs).')
+@click.option('--no-cache', is_flag=True,
+              help='Neither use nor store cached results and builds.')
+@click.option('--refresh', is_flag=True,
+              help='Verify and build files again, replacing their '
+                   'cached results and builds.')
+@click.option('--cache-stats', is_flag=True,
+              help='Show statistics about the result cache.')
+@click.option('--bench', '-b', is_flag=True,
+              help='Benchmark the execution of files.')
+@click.option('--repeat', type=click.IntRange(1), default=10,
+              help='Number of measured executions when benchmarking '
+                   '(default: 10).')
+@click.option('--warmup', type=click.IntRange(0), default=1,
+              help='Number of unmeasured executions before the measured '
+                   'ones when benchmarking (default: 1).')
+@click.option('--export', type=click.File('w'),
+              help='Export benchmark results to a file.')
+@click.option('--export-format', type=click.Choice(sorted(EXPORTERS)),
+              help='Format of exported benchmark results '
+                   '(default: based on the file extension, otherwise json).')
+@click.option('--timeout', type=click.FloatRange(0),
+              help='Maximum number of seconds a file may execute for.')
+@click.option('--memory-limit', type=click.FloatRange(0),
+              help='Maximum number of megabytes of memory a file may use '
+                   'while executing.')
+@click.option('--cpu-limit', type=click.FloatRange(0),
+              help='Maximum number of CPU seconds a file may use '
+                   'while executing.')
+@click.option('--no-history', is_flag=True,
+              help="Don't record the results in the history.")
+@click.option('--exec-mode', type=click.Choice(EXEC_MODES),
+              help='Run commands through the shell, or execute them '
+                   'directly (default: from the configuration file).')
+@click.option('--warm', '-w', is_flag=True,
+              help='Execute files in warm interpreter workers, '
+                   'for languages that support it.')
+@click.option('--format', '-f', 'output_format', default='text',
+              type=click.Choice(('text',) + tuple(REPORTERS)),
+              help='Format of the results (default: text).')
+@click.option('--changed', '-c', is_flag=True,
+              help='Only verify files that changed since they were '
+                   'last verified.')
+@click.option('--since', metavar='REVISION',
+              help='Only verify files that changed since a git revision '
+                   '(implies --changed).')
+@click.option('--exclude', '-x', multiple=True, metavar='PATTERN',
+              help='Skip files and directories matching a .gitignore-style '
+                   'pattern when verifying recursively (can be repeated).')
+@click.option('--backend', type=click.Choice(BACKENDS), default='threads',
+              help='Verify files in a pool of threads or in an asyncio '
+                   'event loop (default: threads).')
+@click.option('--no-ignore', is_flag=True,
+              help="Don't skip the files and directories ignored by "
+                   ".gitignore files when verifying recursively.")
+@click.option('--answers', 'answer_index', metavar='INDEX',
+              type=click.Path(exists=True, dir_okay=False),
+              help='Check the answers against an answer index (made with '
+                   'generate-index --answers) instead of the problem data.')
+@click.option('--watch', is_flag=True,
+              help='Keep verifying files again as they change, until '
+                   'interrupted.')
+@click.argument('paths', type=click.Path(exists=True, readable=True,
+                                         allow_dash=True),
+                nargs=-1, metavar='[PATH]...')
+def cli(paths, language, time, errors, recursive, jobs,
+        no_cache, refresh, cache_stats, bench, repeat, warmup, export,
+        export_format, timeout, memory_limit, cpu_limit, no_history,
+        exec_mode, warm, output_format, changed, since, exclude,
+        no_ignore, backend, answer_index, watch):
     """
     Verify the solution to a problem.
 
@@ -37,74 +133,995 @@ def cli(paths, language, time, errors, recursive):
     on the file extension. Similarly, the problem ID will be identified
     based on the file name.
 
+    When verifying directories recursively, only files whose names match
+    the filename format in the configuration file, with the extension of
+    a known language (or LANGUAGE), are verified. Directories such as
+    .git and node_modules, files ignored by .gitignore files (unless
+    --no-ignore is specified) and files matching an --exclude pattern
+    are skipped without being looked into.
+
+    Files are verified concurrently by JOBS workers, but the results are
+    always printed in the order the files were given.
+
+    With the asyncio backend, the processes of up to JOBS files run
+    concurrently in a single event loop, and the progress is shown while
+    they do. If verification is interrupted with Ctrl-C, the processes
+    that are running are killed, but files that were built are still
+    cleaned up.
+
+    Results are cached based on the contents of a file and the files it
+    includes, the commands used to verify it, the answer to the problem
+    and the limits, so unchanged files are not verified again. Errors aren't
+    cached, since they may be caused by the system. Similarly, the
+    artifacts of languages that need to be built are cached, so
+    unchanged files are not rebuilt.
+
+    With --bench, files are built once and then executed WARMUP + REPEAT
+    times, one file at a time, and statistics of the REPEAT measured
+    executions are shown and optionally exported.
+
+    The execution of files can be limited with --timeout, --memory-limit
+    and --cpu-limit, which override the limits in the configuration file.
+
+    Results that weren't cached are recorded in the history, along with
+    their execution times, unless --no-history is specified. Use the
+    history command to see how they've changed.
+
+    In the direct exec mode, commands are split into arguments and
+    executed without a shell, which makes them start faster and the
+    timing more precise, but shell syntax can't be used in them.
+
+    With --warm, files in languages that support it (currently Python)
+    are executed by interpreters that are started once and then kept
+    running. Their times are then measured within the interpreter, so
+    they don't include its startup time, which is shown separately.
+    Memory and CPU time limits can't be applied to these interpreters,
+    so files are executed as usual when those limits are set.
+
+    The jsonl, junit and tap formats write a record per file, including
+    its outputs and raw execution times, as soon as it has been verified
+    (so not necessarily in the order the files were given). Messages
+    about skipped files are then written to stderr.
+
+    With --changed, only files that changed since they were last
+    verified are verified, along with files whose language configuration
+    or included files (#include "...") changed, and files that didn't
+    pass the last time. With --since, changes are instead determined by
+    git, as the differences between REVISION and the working tree.
+
+    Tar and zip archives are verified like directories, without
+    --recursive. Only the solutions in them, and the files those
+    include, are extracted, to a scratch directory on a tmpfs (where
+    there is one) that is removed afterwards. An archive is skipped
+    once a file in it is larger than 16 MB, or more than 256 MB have
+    been extracted in total. They're always verified, even with
+    --changed. A PATH of - reads a list of paths, one per line, from
+    stdin.
+
+    With --answers, the outputs are checked against the salted digests of
+    the answers in INDEX, so neither the answers nor the rest of the
+    problem data are needed.
+
+    With --watch, the files are verified and then watched (with inotify
+    where it's available, otherwise by looking for changes every half a
+    second). Whenever files are saved, only the solutions among them,
+    the new solutions in the directories being verified and the files
+    including them are verified again, using the same cache, builds and
+    workers, until verification is interrupted with Ctrl-C. Directories
+    created while watching are not watched.
+
+    """
+
+    if bench and output_format != 'text':
+        raise click.UsageError('--format can not be used with --bench')
+    if watch and (bench or output_format in ('junit', 'tap')):
+        raise click.UsageError('--watch can not be used with --bench or '
+                               'the junit and tap formats')
+    if backend == 'asyncio' and not hasattr(os, 'wait4'):
+        raise click.UsageError('The asyncio backend is not supported '
+                               'on this platform')
+
+    reporter = REPORTERS[output_format]() if output_format != 'text' else None
+    cache = None if no_cache else get_result_cache()
+    build_cache = None if no_cache else get_build_cache(refresh)
+    try:
+        answers = None if answer_index is None else AnswerIndex(answer_index)
+    except ValueError as exception:
+        sys.exit('Could not read the answer index: %s' % exception)
+
+    # The heavier modules are imported when they're used rather than with
+    # this module, so showing the help of the commands doesn't load them.
+    from EasyEuler.archives import ArchiveExtractor
+
+    paths = get_paths(paths, err=reporter is not None)
+    extractor = ArchiveExtractor()
+    solutions = get_solutions(paths, language, recursive,
+                              err=reporter is not None, excludes=exclude,
+                              use_ignore_files=not no_ignore,
+                              extractor=extractor, answers=answers)
+    if exec_mode is not None:
+        solutions = ((path, {**solution_language, 'exec mode': exec_mode},
+                      problem)
+                     for path, solution_language, problem in solutions)
+    known_solutions = {}
+    if watch:
+        solutions = record_solutions(solutions, known_solutions,
+                                     extractor.names)
+
+    manifest = Manifest(easyeuler_paths.MANIFEST)
+    unchanged = []
+    if changed or since is not None:
+        try:
+            changed_files = None if since is None else \
+                get_git_changes(paths, since)
+        except ValueError as exception:
+            sys.exit('Could not determine the changed files: %s' % exception)
+        solutions = get_changed_solutions(solutions, manifest, changed_files,
+                                          unchanged, extractor.names)
+
+    limits = {'timeout': timeout, 'memory': memory_limit, 'cpu': cpu_limit}
+    history = None if no_history else History(easyeuler_paths.HISTORY)
+    if warm:
+        from EasyEuler.workers import WorkerPool
+        worker_pool = shared_worker_pool or WorkerPool()
+    else:
+        worker_pool = None
+
+    try:
+        if bench:
+            benchmarks = run_benchmarks(solutions, repeat, warmup, errors,
+                                        build_cache, limits, history,
+                                        worker_pool, extractor.names)
+            if export is not None:
+                export_benchmarks(benchmarks, export, export_format)
+        else:
+            verify_solutions(solutions, time, errors, jobs, cache, refresh,
+                             build_cache, limits, history, worker_pool,
+                             reporter, manifest, backend, extractor.names)
+        if watch:
+            manifest.save()
+            watch_solutions(
+                paths, known_solutions,
+                lambda solutions: verify_solutions(
+                    solutions, time, errors, jobs, cache, refresh,
+                    build_cache, limits, history, worker_pool, reporter,
+                    manifest, backend, extractor.names),
+                language, recursive, reporter is not None, exclude,
+                not no_ignore, extractor, answers, exec_mode)
+    except KeyboardInterrupt:
+        click.echo('Interrupted', err=True)
+        sys.exit(130)
+    finally:
+        if worker_pool is not None and worker_pool is not shared_worker_pool:
+            worker_pool.close()
+        extractor.close()
+        manifest.save()
+
+    if unchanged:
+        click.echo('Skipped %d unchanged files' % len(unchanged),
+                   err=reporter is not None)
+
+    if cache is not None:
+        cache.evict()
+        cache.save_stats()
+    if build_cache is not None:
+        build_cache.evict()
+
+    if cache_stats:
+        print_cache_stats((cache or get_result_cache()).get_stats(),
+                          err=reporter is not None)
+
+
+def verify_solutions(solutions, show_time, show_errors, jobs, cache=None,
+                     refresh=False, build_cache=None, limits=None,
+                     history=None, worker_pool=None, reporter=None,
+                     manifest=None, backend='threads', names=None):
+    """
+    Verifies the solutions concurrently and prints their results, or
+    reports them to the reporter, if one is given. The solutions can
+    be a generator, which is consumed as the solutions are verified
+    (except by the asyncio backend, which needs to know how many
+    there are to show the progress).
+
+    Solutions whose paths are in names (those extracted from archives)
+    are shown and recorded by their names there, and left out of the
+    manifest.
+
+    """
+
+    summary = dict.fromkeys(RESULT_STATUSES, 0)
+    if names is None:
+        names = {}
+
+    # The history needs the execution times, even if they aren't shown,
+    # and the records always contain them.
+    time_execution = show_time or history is not None or reporter is not None
+
+    if reporter is not None:
+        reporter.start()
+
+    if backend == 'asyncio':
+        solutions = list(solutions)
+        progress = Progress(len(solutions))
+        results = run_asynchronously(
+            lambda solution: check_solution_async(
+                solution[0], solution[1], time_execution, solution[2],
+                cache, refresh, build_cache, limits, worker_pool,
+                names.get(solution[0])),
+            solutions, jobs, progress, ordered=reporter is None)
+    else:
+        progress = None
+        results = run_concurrently(
+            lambda solution: check_solution(solution[0], solution[1],
+                                            time_execution, solution[2],
+                                            cache, refresh, build_cache,
+                                            limits, worker_pool,
+                                            names.get(solution[0])),
+            solutions, jobs, ordered=reporter is None)
+
+    for (path, language, problem), result in results:
+        status = get_status(result)
+        summary[status] += 1
+        name = names.get(path, path)
+
+        if progress is not None:
+            progress.clear()
+
+        if reporter is not None:
+            reporter.report(make_record(name, language, problem, status,
+                                        result))
+        else:
+            click.echo('Checking output of %s: ' % click.format_filename(name),
+                       nl=False)
+            print_result(result, show_errors, show_time)
+
+        if history is not None and not result.get('cached', False):
+            execution_time = result.get('execute', {}).get('execution_time')
+            record_result(history, path, language, problem, status,
+                          execution_time, name=name)
+
+        if manifest is not None and path not in names:
+            manifest.update(path, language, status)
+
+        if progress is not None:
+            progress.draw()
+
+    if progress is not None:
+        progress.clear()
+
+    if reporter is not None:
+        reporter.finish()
+    elif sum(summary.values()) > 1:
+        print_summary(summary)
+
+
+def run_asynchronously(function, solutions, jobs, progress, ordered=True):
+    """
+    Like run_concurrently, but the function is a coroutine function
+    verifying a solution, at most jobs of which run concurrently in an
+    event loop. The progress is updated as solutions start and finish.
+
+    If the generator is interrupted by Ctrl-C or closed, the coroutines
+    that are running are cancelled and waited for, so they can kill
+    their processes and clean up after themselves. Ctrl-C then raises
+    KeyboardInterrupt.
+
+    """
+
+    import asyncio
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    semaphore = asyncio.Semaphore(jobs)
+    tasks = []
+    interrupted = False
+
+    async def verify(solution):
+        async with semaphore:
+            progress.start()
+            result = await function(solution)
+        progress.finish(get_status(result) == 'correct')
+        return result
+
+    def interrupt():
+        # Cancelling a task again would interrupt its cleanup.
+        nonlocal interrupted
+        if not interrupted:
+            interrupted = True
+            for _, task in tasks:
+                task.cancel()
+
+    try:
+        loop.add_signal_handler(signal.SIGINT, interrupt)
+    except (NotImplementedError, RuntimeError, ValueError):
+        # Signal handlers can only be added in the main thread on Unix,
+        # elsewhere Ctrl-C raises KeyboardInterrupt in the event loop.
+        pass
+
+    try:
+        tasks.extend((solution, loop.create_task(verify(solution)))
+                     for solution in solutions)
+        pending = collections.deque(tasks)
+        progress.draw()
+
+        while pending:
+            if ordered:
+                solution, task = pending.popleft()
+                loop.run_until_complete(asyncio.wait([task]))
+            else:
+                done, _ = loop.run_until_complete(asyncio.wait(
+                    [task for _, task in pending],
+                    return_when=asyncio.FIRST_COMPLETED))
+                solution, task = next((solution, task) for solution, task
+                                      in pending if task in done)
+                pending.remove((solution, task))
+
+            if task.cancelled():
+                raise KeyboardInterrupt
+            yield solution, task.result()
+    finally:
+        interrupt()
+        loop.run_until_complete(asyncio.gather(
+            *(task for _, task in tasks), return_exceptions=True))
+        progress.clear()
+        loop.close()
+        asyncio.set_event_loop(None)
+
+
+def get_changed_solutions(solutions, manifest, changed_files=None,
+                          unchanged=None, names=None):
+    """
+    Filters out the solutions that haven't changed according to the
+    manifest, or changed_files if it isn't None, appending their paths
+    to unchanged. Solutions whose paths are in names (those extracted
+    from archives) are always considered changed.
+
+    """
+
+    for solution in solutions:
+        path, language, _ = solution
+        if names is not None and path in names:
+            is_changed = True
+        elif changed_files is None:
+            is_changed = manifest.is_changed(path, language)
+        else:
+            is_changed = manifest.is_changed_since(path, language,
+                                                   changed_files)
+
+        if is_changed:
+            yield solution
+        elif unchanged is not None:
+            unchanged.append(path)
+
+
+def record_solutions(solutions, known_solutions, names=None):
     """
+    Generates the solutions, adding them to known_solutions by their real
+    paths, except those whose paths are in names (those extracted from
+    archives).
+
+    """
+
+    for solution in solutions:
+        if names is None or solution[0] not in names:
+            known_solutions[os.path.realpath(solution[0])] = solution
+        yield solution
+
+
+def watch_solutions(paths, known_solutions, verify, language, recursive,
+                    err=False, excludes=(), use_ignore_files=True,
+                    extractor=None, answers=None, exec_mode=None):
+    """
+    Watches the paths and the files the known solutions include, calling
+    verify with the solutions affected by every batch of changes (see
+    get_affected_solutions) until interrupted.
+
+    """
+
+    from EasyEuler.watch import get_watcher, watch_changes
+
+    watcher = get_watcher(get_watched_directories(paths, known_solutions,
+                                                  recursive))
+    try:
+        click.echo('Watching for changes...', err=err)
+        for changed_files in watch_changes(watcher):
+            solutions = get_affected_solutions(
+                changed_files, paths, known_solutions, language, recursive,
+                err, excludes, use_ignore_files, extractor, answers)
+            if exec_mode is not None:
+                solutions = [(path, {**solution_language,
+                                     'exec mode': exec_mode}, problem)
+                             for path, solution_language, problem
+                             in solutions]
+            if solutions:
+                verify(solutions)
+                click.echo('Watching for changes...', err=err)
+    finally:
+        watcher.close()
+
+
+def get_watched_directories(paths, known_solutions, recursive):
+    """
+    Returns the directories of the files among the paths and of the files
+    the known solutions include, and with recursive, the directories
+    among the paths and the directories in them, except the ones in
+    DEFAULT_EXCLUDES.
+
+    """
+
+    directories = set()
 
     for path in paths:
+        if not os.path.isdir(path):
+            directories.add(os.path.dirname(os.path.abspath(path)))
+        elif recursive:
+            for directory, dirnames, _ in os.walk(path):
+                directories.add(os.path.abspath(directory))
+                dirnames[:] = [dirname for dirname in dirnames
+                               if dirname not in DEFAULT_EXCLUDES]
+
+    for real_path in known_solutions:
+        directories.add(os.path.dirname(real_path))
+        directories.update(os.path.dirname(dependency) for dependency
+                           in get_dependencies(real_path))
+
+    return sorted(directories)
+
+
+def get_affected_solutions(changed_files, paths, known_solutions, language,
+                           recursive, err=False, excludes=(),
+                           use_ignore_files=True, extractor=None,
+                           answers=None):
+    """
+    Returns the solutions affected by changes to files: the files and
+    archives among the paths that changed, the changed solutions in the
+    directories among the paths (with recursive) and the known solutions
+    that include a changed file. New solutions are added to the known
+    solutions.
+
+    """
+
+    changed_files = {os.path.realpath(path) for path in changed_files
+                     if os.path.isfile(path)}
+    affected = collections.OrderedDict()
+
+    for path in paths:
+        real_path = os.path.realpath(path)
         if os.path.isdir(path):
+            if not recursive:
+                continue
+            solutions = get_changed_directory_solutions(
+                path, changed_files, language, err, excludes,
+                use_ignore_files, answers)
+        elif real_path in changed_files:
+            solutions = get_solutions([path], language, False, err,
+                                      extractor=extractor, answers=answers)
+        else:
+            continue
+
+        for solution in solutions:
+            affected[os.path.realpath(solution[0])] = solution
+
+    for real_path, solution in known_solutions.items():
+        if real_path not in affected and \
+           not changed_files.isdisjoint(get_dependencies(real_path)):
+            affected[real_path] = solution
+
+    names = {} if extractor is None else extractor.names
+    known_solutions.update((real_path, solution) for real_path, solution
+                           in affected.items() if solution[0] not in names)
+    return list(affected.values())
+
+
+def get_changed_directory_solutions(path, changed_files, language,
+                                    err=False, excludes=(),
+                                    use_ignore_files=True, answers=None):
+    """
+    Generates the solutions among the changed files (by their real paths)
+    that get_directory_solutions would generate for a directory, without
+    walking it.
+
+    """
+
+    real_path = os.path.realpath(path)
+    filename_regex = get_solution_filename_regex(language)
+
+    for changed_file in sorted(changed_files):
+        if not changed_file.startswith(real_path + os.sep):
+            continue
+
+        file_path = os.path.join(path, os.path.relpath(changed_file,
+                                                       real_path))
+        if is_solution_file(file_path, path, filename_regex, excludes,
+                            use_ignore_files):
+            match = filename_regex.match(os.path.basename(file_path))
+            solution = get_matched_solution(file_path, file_path, match,
+                                            language, err, answers)
+            if solution is not None:
+                yield solution
+
+
+def run_concurrently(function, items, jobs, ordered=True):
+    """
+    Calls the function with every item in a pool of jobs threads,
+    generating (item, result) tuples either in the order of the items
+    or in the order the calls complete.
+
+    Only a few items more than there are jobs are taken from the items
+    at a time, so they can be a generator of any length, and a result
+    is generated as soon as it's ready (and in order, if ordered).
+
+    """
+
+    import concurrent.futures
+
+    items = iter(items)
+    pending = collections.deque()
+    window = jobs * 2
+
+    with concurrent.futures.ThreadPoolExecutor(jobs) as executor:
+        def submit():
+            for item in items:
+                future = executor.submit(function, item)
+                future.item = item
+                pending.append(future)
+                if len(pending) >= window:
+                    break
+
+        submit()
+        while pending:
+            if ordered:
+                future = pending.popleft()
+            else:
+                done, _ = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                future = next(future for future in pending if future in done)
+                pending.remove(future)
+
+            yield future.item, future.result()
+            submit()
+
+
+def run_benchmarks(solutions, repeat, warmup, show_errors, build_cache=None,
+                   limits=None, history=None, worker_pool=None, names=None):
+    # The solutions are benchmarked one at a time, so they
+    # don't compete with each other for resources.
+    benchmarks = []
+    if names is None:
+        names = {}
+
+    for path, language, problem in solutions:
+        name = names.get(path, path)
+        click.echo('Benchmarking %s: ' % click.format_filename(name),
+                   nl=False)
+        result = benchmark_solution(path, language, problem, repeat, warmup,
+                                    build_cache, limits, worker_pool)
+        print_result(result, show_errors, False)
+
+        if result['error'] == 'none':
+            print_benchmark(result['statistics'])
+
+        if history is not None:
+            median_time = {key: statistics['median'] for key, statistics
+                           in result['statistics'].items()}
+            record_result(history, path, language, problem,
+                          get_status(result), median_time,
+                          len(result['runs']), name)
+
+        benchmarks.append({'path': name, 'problem': problem['id'],
+                           'language': language.get('name'),
+                           'correct': result.get('correct', False),
+                           'error': result['error'],
+                           'runs': result['runs'],
+                           'statistics': result['statistics']})
+
+    return benchmarks
+
+
+def export_benchmarks(benchmarks, f, export_format=None):
+    if export_format is None:
+        extension = os.path.splitext(f.name)[1].replace('.', '')
+        export_format = extension if extension in EXPORTERS else 'json'
+    EXPORTERS[export_format](benchmarks, f)
+
+
+def make_record(path, language, problem, status, result):
+    """
+    Turns the result of verifying a solution into a record for
+    a reporter, with raw execution times rather than formatted ones.
+
+    """
+
+    stages = {stage: {'output': result[stage]['output'],
+                      'error': result[stage]['error'],
+                      'limit': result[stage].get('limit'),
+                      'truncated': result[stage].get('truncated', False),
+                      'execution_time': result[stage].get('execution_time')}
+              for stage in STAGES if stage in result}
+
+    return {'path': path, 'problem': problem['id'],
+            'language': language.get('name'), 'status': status,
+            'correct': result.get('correct', False),
+            'error_stage': None if result['error'] == 'none' else
+            result['error'],
+            'cached': result.get('cached', False), 'stages': stages}
+
+
+def record_result(history, path, language, problem, status,
+                  execution_time=None, runs=1, name=None):
+    try:
+        source_hash = hash_file(path)
+    except OSError:
+        # The file was removed after it was verified.
+        source_hash = None
+
+    history.record(name or path, language.get('name'), problem['id'],
+                   source_hash, status, execution_time, runs)
+
+
+def get_result_cache():
+    return ResultCache(easyeuler_paths.RESULT_CACHE,
+                       data.config['cache']['max results'])
+
+
+def get_build_cache(refresh=False):
+    return BuildCache(easyeuler_paths.BUILD_CACHE,
+                      data.config['cache']['max build size'], refresh)
+
+
+def check_solution(path, language, time_execution, problem,
+                   cache=None, refresh=False, build_cache=None, limits=None,
+                   worker_pool=None, name=None):
+    """
+    Verifies a solution, using the cached result when there is one
+    (unless refresh is True) and caching the result otherwise.
+    A solution extracted from an archive is cached by its name there
+    (see get_cached_result).
+
+    """
+
+    key, result = get_cached_result(path, language, time_execution, problem,
+                                    cache, refresh, name, limits)
+
+    if result is None:
+        result = verify_solution(path, language, time_execution, problem,
+                                 build_cache, limits, worker_pool)
+        cache_result(cache, key, result)
+
+    return result
+
+
+async def check_solution_async(path, language, time_execution, problem,
+                               cache=None, refresh=False, build_cache=None,
+                               limits=None, worker_pool=None, name=None):
+    key, result = get_cached_result(path, language, time_execution, problem,
+                                    cache, refresh, name, limits)
+
+    if result is None:
+        result = await verify_solution_async(path, language, time_execution,
+                                             problem, build_cache, limits,
+                                             worker_pool)
+        cache_result(cache, key, result)
+
+    return result
+
+
+def get_cached_result(path, language, time_execution, problem, cache,
+                      refresh=False, name=None, limits=None):
+    """
+    Returns the key of a solution in the cache and its cached result,
+    or None if it isn't cached (or refresh is True). If a name is given,
+    the commands are formatted with it instead of the path, since
+    solutions extracted from archives are extracted to random paths.
+
+    The key includes the limits the solution is executed with (see
+    get_limits), so a result isn't reused under tighter limits.
+
+    """
+
+    if cache is None:
+        return None, None
+
+    key = cache.get_key(hash_source(path),
+                        get_commands(name or path, language), problem,
+                        get_limits(language, limits))
+    result = None if refresh else cache.get(key)
+
+    # A result cached without timing can't be used when timing is
+    # requested, because it's reported along with the result.
+    if result is not None and time_execution and \
+       result['error'] == 'none' and \
+       result['execute']['execution_time'] is None:
+        result = None
+
+    if result is not None:
+        result['cached'] = True
+    return key, result
+
+
+def cache_result(cache, key, result):
+    # Errors may be caused by the system rather than the solution, like
+    # a missing compiler, and exceeding a limit depends on the limits
+    # and the load of the system, so only answers are cached.
+    if cache is not None and \
+       get_status(result) in ('correct', 'incorrect'):
+        cache.set(key, result)
+
+
+def get_paths(paths, err=False):
+    """
+    Replaces - in the paths with the paths listed on stdin, one per line,
+    skipping those that don't exist.
+
+    """
+
+    expanded_paths = []
+
+    for path in paths:
+        if path != '-':
+            expanded_paths.append(path)
+            continue
+
+        for line in click.get_text_stream('stdin'):
+            stdin_path = line.rstrip('\r\n')
+            if not stdin_path:
+                continue
+            if os.path.exists(stdin_path):
+                expanded_paths.append(stdin_path)
+            else:
+                click.echo('Skipping %s because it does not exist' %
+                           click.format_filename(stdin_path), err=err)
+
+    return expanded_paths
+
+
+def get_solutions(paths, language, recursive, err=False, excludes=(),
+                  use_ignore_files=True, extractor=None, answers=None):
+    """
+    Generates a (path, language, problem) tuple for every file that
+    should be verified, printing a message for the skipped ones
+    (to stderr if err is True). The solutions in archives are extracted
+    with the extractor, if one is given. If an answer index is given,
+    the problems are looked up in it, as with get_problem.
+
+    """
+
+    from EasyEuler.archives import is_archive
+
+    for path in paths:
+        if extractor is not None and is_archive(path):
+            yield from get_archive_solutions(path, language, extractor, err,
+                                             excludes, answers)
+        elif os.path.isdir(path):
             if recursive:
-                validate_directory(path, language, time, errors)
+                yield from get_directory_solutions(path, language, err,
+                                                   excludes, use_ignore_files,
+                                                   answers)
             else:
                 click.echo('Skipping %s because it is a directory '
                            'and --recursive was not specified' %
-                           click.format_filename(path))
+                           click.format_filename(path), err=err)
         else:
-            validate_file(path, language, time, errors)
+            solution = get_solution(path, language, err, answers)
+            if solution is not None:
+                yield solution
+
+
+def get_directory_solutions(path, language, err=False, excludes=(),
+                            use_ignore_files=True, answers=None):
+    """
+    Generates the solutions in a directory, which are the files named
+    according to the filename format, so no other file is ever looked at.
+
+    """
+
+    filename_regex = get_solution_filename_regex(language)
 
+    for file_path in find_solution_files(path, filename_regex, excludes,
+                                         use_ignore_files):
+        match = filename_regex.match(os.path.basename(file_path))
+        solution = get_matched_solution(file_path, file_path, match,
+                                        language, err, answers)
+        if solution is not None:
+            yield solution
 
-def validate_directory(path, language, time_execution, show_errors):
-    for root, _, filenames in os.walk(path):
-        for filename in filenames:
-            file_path = os.path.join(root, filename)
-            validate_file(file_path, language, time_execution, show_errors)
 
+def get_archive_solutions(path, language, extractor, err=False,
+                          excludes=(), answers=None):
+    """
+    Generates the solutions in an archive, extracting them as they're
+    generated, so they can be verified while the rest are extracted.
+
+    """
+
+    filename_regex = get_solution_filename_regex(language)
+
+    try:
+        for file_path, match in extractor.extract_solutions(
+                path, filename_regex, excludes):
+            solution = get_matched_solution(
+                file_path, extractor.names[file_path], match, language, err,
+                answers)
+            if solution is not None:
+                yield solution
+    except ValueError as exception:
+        click.echo('Skipping %s because it could not be read: %s' %
+                   (click.format_filename(path), exception), err=err)
+
+
+def get_solution_filename_regex(language=None):
+    if language is None:
+        extensions = [extension for options
+                      in data.config['languages'].values()
+                      for extension in data.get_extensions(options)]
+    else:
+        extensions = data.get_extensions(language)
+    return get_filename_regex(data.config['filename format'], extensions)
 
-def validate_file(path, language, time_execution, show_errors):
-    problem = get_problem_from_path(path)
+
+def get_matched_solution(path, name, match, language, err=False,
+                         answers=None):
+    """
+    Makes the solution for a file whose name matched the filename
+    format, or returns None if it doesn't contain a valid problem ID.
+
+    """
+
+    problem = get_problem(int(match.group('id')), answers)
     if problem is None:
         click.echo('Skipping %s because it does not contain '
-                   'a valid problem ID' % click.format_filename(path))
-        return
+                   'a valid problem ID' % click.format_filename(name),
+                   err=err)
+        return None
+
+    solution_language = language or data.config.get_language(
+        'extension', match.group('extension'))
+    return path, solution_language, problem
+
+
+def get_solution(path, language, err=False, answers=None):
+    problem = get_problem_from_path(path, answers)
+    if problem is None:
+        click.echo('Skipping %s because it does not contain '
+                   'a valid problem ID' % click.format_filename(path),
+                   err=err)
+        return None
 
     if language is None:
         language = get_language_from_path(path) or {}
 
-    click.echo('Checking output of %s: ' % click.format_filename(path),
-               nl=False)
-    result = verify_solution(path, language, time_execution, problem)
-    print_result(result, show_errors, time_execution)
+    return path, language, problem
 
 
 def print_result(result, show_errors, show_time):
     if result['error'] != 'none':
+        stage_result = result[result['error']]
+        error = stage_result.get('limit') or 'error'
+
         if show_errors:
-            error_message = result[result['error']]['output']
+            error_message = stage_result['output']
+            if error != 'error':
+                error_message = '[%s during %s]\n%s' % (
+                    error, result['error'], error_message)
         else:
-            error_message = '[error during %s]' % result['error']
+            error_message = '[%s during %s]' % (error, result['error'])
         click.secho('\n%s' % error_message, fg='red')
+
+        if show_time and stage_result.get('execution_time') is not None:
+            print_execution_time(stage_result['execution_time'])
         return
 
     click.secho(result['execute']['output'] or '[no output]',
                 fg='green' if result['correct'] else 'red')
+    if result['execute'].get('truncated', False):
+        click.secho('[output truncated]', fg='yellow')
 
     if show_time:
-        print_execution_time(result['execute']['execution_time'])
+        print_execution_time(result['execute']['execution_time'],
+                             result.get('cached', False))
+
+
+def print_summary(summary):
+    message = 'Verified %s: %d correct, %d incorrect, %s' % (
+        format_count(sum(summary.values()), 'file'), summary['correct'],
+        summary['incorrect'], format_count(summary['error'], 'error'))
+
+    for status in LIMIT_STATUSES:
+        if summary[status] > 0:
+            message += ', %d %s' % (summary[status], status)
+    click.secho(message, bold=True)
 
 
-def print_execution_time(execution_time):
+def print_cache_stats(stats, err=False):
+    lookups = stats['hits'] + stats['misses']
+    hit_rate = stats['hits'] / lookups if lookups > 0 else 0
+
+    click.echo('Cached results: %d (%s)' % (stats['entries'],
+                                             format_size(stats['size'])),
+               err=err)
+    click.echo('Hits: %d, misses: %d, hit rate: %.1f%%' %
+               (stats['hits'], stats['misses'], hit_rate * 100), err=err)
+
+
+def print_execution_time(execution_time, cached=False):
     if 'user' in execution_time:
         execution_time_msg = 'CPU times - user: {user}, '         \
                              'system: {system}, total: {total}\n' \
-                             'Wall time: {wall}\n'
+                             'Wall time: {wall}'
     else:
-        execution_time_msg = 'Time: {wall}\n'
-    click.secho(execution_time_msg.format(**execution_time), fg='cyan')
+        execution_time_msg = 'Time: {wall}'
+
+    if 'startup' in execution_time:
+        execution_time_msg += ' (solution only)\n' \
+                              'Wall time with startup: {wall_with_startup}'
+
+    if cached:
+        execution_time_msg += ' (cached)'
+
+    if 'memory' in execution_time:
+        execution_time_msg += '\nPeak memory: {memory}'
+
+    formatted_time = format_execution_time(execution_time)
+    if 'startup' in execution_time:
+        formatted_time['wall_with_startup'] = format_time(
+            execution_time['wall'] + execution_time['startup'])
+    click.secho(execution_time_msg.format(**formatted_time) + '\n',
+                fg='cyan')
+
+
+def print_benchmark(statistics):
+    rows = [('',) + STATISTICS]
 
+    for key in ('wall', 'startup', 'user', 'system', 'total', 'memory'):
+        if key in statistics:
+            format_value = format_size if key == 'memory' else format_time
+            rows.append((key,) + tuple(format_value(statistics[key][statistic])
+                                       for statistic in STATISTICS))
 
-def get_problem_from_path(path):
+    widths = [max(len(row[column]) for row in rows)
+              for column in range(len(rows[0]))]
+
+    for row in rows:
+        click.secho('  '.join(value.rjust(width)
+                              for value, width in zip(row, widths)),
+                    fg='cyan')
+    click.echo()
+
+
+def get_problem_from_path(path, answers=None):
     problem_id = get_problem_id_from_path(path)
     if problem_id is None:
         return None
-    return data.problems.get(problem_id)
+    return get_problem(problem_id, answers)
+
+
+def get_problem(problem_id, answers=None):
+    """
+    Looks up a problem, or if an answer index is given, makes a problem
+    with only the ID and the digest of the answer from the index.
+
+    """
+
+    if answers is None:
+        return data.problems.get(problem_id)
+
+    answer_digest = answers.get(problem_id)
+    if answer_digest is None:
+        return None
+    return {'id': problem_id, 'answer digest': answer_digest}
+
+
+def is_correct(output, problem):
+    """
+    Checks an output against the answer to a problem, or its digest,
+    in constant time, so the answer can't be found by timing checks.
+
+    """
+
+    if 'answer digest' in problem:
+        return check_answer(output, problem['answer digest'])
+    return hmac.compare_digest(output.encode('UTF-8'),
+                               problem['answer'].encode('UTF-8'))
 
 
 def get_language_from_path(path):
@@ -117,136 +1134,344 @@ def get_problem_id_from_path(path):
     return int(problem_id[0]) if len(problem_id) > 0 else None
 
 
-def verify_solution(path, language, time_execution, problem):
+def get_status(result):
+    if result['error'] != 'none':
+        return result[result['error']].get('limit') or 'error'
+    return 'correct' if result['correct'] else 'incorrect'
+
+
+def get_limits(language, overrides=None):
+    """
+    Determines the limits of executing a file in a language, from the
+    configuration file, the language and the overrides (in that order of
+    precedence), where a value of None means there's no limit.
+
+    """
+
+    limits = dict.fromkeys(LIMITS)
+
+    for source in (data.config['limits'], language.get('limits', {}),
+                   overrides or {}):
+        limits.update({key: value for key, value in source.items()
+                       if value is not None})
+
+    return limits
+
+
+def verify_solution(path, language, time_execution, problem,
+                    build_cache=None, limits=None, worker_pool=None):
+    """
+    Runs the stages of verifying a solution in order. Once the solution
+    has been built, it's cleaned up even if executing it fails.
+
+    """
+
     commands = get_commands(path, language)
+    limits = get_limits(language, limits)
     result = {'error': 'none'}
 
-    for stage in STAGES:
-        if commands[stage] is None:
-            continue
+    if commands['build'] is not None:
+        result['build'] = build_solution(path, language, commands['build'],
+                                         build_cache)
+        if result['build']['error']:
+            result['error'] = 'build'
+            return result
+
+    try:
+        result['execute'] = execute_solution(path, language,
+                                             commands['execute'],
+                                             time_execution, limits,
+                                             worker_pool)
+        set_execute_result(result, problem)
+    finally:
+        if commands['cleanup'] is not None:
+            result['cleanup'] = execute_process(commands['cleanup'], False)
+            set_cleanup_result(result)
 
-        if stage == 'execute':
-            result[stage] = execute_process(commands[stage], time_execution)
-            result['correct'] = result[stage]['output'] == problem['answer']
-        else:
-            result[stage] = execute_process(commands[stage], False)
+    return result
 
-        if result[stage]['error']:
-            result['error'] = stage
-            break
+
+async def verify_solution_async(path, language, time_execution, problem,
+                                build_cache=None, limits=None,
+                                worker_pool=None):
+    """
+    Runs the stages of verifying a solution like verify_solution, but
+    without blocking the event loop. If the coroutine is cancelled,
+    the solution is still cleaned up.
+
+    """
+
+    commands = get_commands(path, language)
+    limits = get_limits(language, limits)
+    result = {'error': 'none'}
+
+    if commands['build'] is not None:
+        result['build'] = await build_solution_async(
+            path, language, commands['build'], build_cache)
+        if result['build']['error']:
+            result['error'] = 'build'
+            return result
+
+    try:
+        result['execute'] = await execute_solution_async(
+            path, language, commands['execute'], time_execution, limits,
+            worker_pool)
+        set_execute_result(result, problem)
+    finally:
+        if commands['cleanup'] is not None:
+            result['cleanup'] = await execute_process_async(
+                commands['cleanup'], False)
+            set_cleanup_result(result)
 
     return result
 
 
-def get_process_output(process):
-    if process.returncode != 0:
-        return str(process.stderr, encoding='UTF-8'), True
-    return str(process.stdout, encoding='UTF-8').rstrip(), False
+def set_execute_result(result, problem):
+    result['correct'] = is_correct(result['execute']['output'], problem)
+    if result['execute']['error']:
+        result['error'] = 'execute'
 
 
-def get_commands(path, language):
-    commands = {'build': None, 'cleanup': None}
-    commands['execute'] = language.get('execute', './{path}').format(path=path)
+def set_cleanup_result(result):
+    if result['cleanup']['error'] and result['error'] == 'none':
+        result['error'] = 'cleanup'
 
-    if 'build' in language:
-        commands['build'] = language['build'].format(path=path)
-    if 'cleanup' in language:
-        commands['cleanup'] = language['cleanup'].format(path=path)
 
-    return commands
+def benchmark_solution(path, language, problem, repeat, warmup,
+                       build_cache=None, limits=None, worker_pool=None):
+    """
+    Builds a solution once and executes it warmup + repeat times.
+    The result contains the execution times of the last repeat
+    executions as well as statistics of them.
 
+    """
 
-def execute_process(command, time_execution):
-    if time_execution:
-        start_time = get_time()
-        process = subprocess.run(command, shell=True, stdout=subprocess.PIPE,
-                                 stderr=subprocess.PIPE)
-        end_time = get_time()
+    commands = get_commands(path, language)
+    limits = get_limits(language, limits)
+    result = {'error': 'none', 'runs': [], 'statistics': {}}
+
+    if commands['build'] is not None:
+        result['build'] = build_solution(path, language, commands['build'],
+                                         build_cache)
+        if result['build']['error']:
+            result['error'] = 'build'
+            return result
+
+    try:
+        for run in range(warmup + repeat):
+            result['execute'] = execute_solution(path, language,
+                                                 commands['execute'], True,
+                                                 limits, worker_pool)
+
+            if result['execute']['error']:
+                result['error'] = 'execute'
+                return result
+
+            if run >= warmup:
+                result['runs'].append(result['execute']['execution_time'])
+    finally:
+        if commands['cleanup'] is not None:
+            result['cleanup'] = execute_process(commands['cleanup'], False)
+            set_cleanup_result(result)
+
+    result['correct'] = is_correct(result['execute']['output'], problem)
+    result['statistics'] = summarize_runs(result['runs'])
+    return result
 
-        execution_time = {key: format_time(end_time[key] - start_time[key])
-                          for key in end_time}
-    else:
-        process = subprocess.run(command, shell=True, stdout=subprocess.PIPE,
-                                 stderr=subprocess.PIPE)
-        execution_time = None
 
-    output, error = get_process_output(process)
-    return {'output': output, 'error': error, 'execution_time': execution_time}
+def build_solution(path, language, command, build_cache=None):
+    """
+    Runs the build command for a solution, unless the artifact
+    it produces (if the language specifies one) is cached.
 
+    """
+
+    cached_result, store_artifact = restore_build(path, language,
+                                                  build_cache)
+    if cached_result is not None:
+        return cached_result
 
-try:
-    import resource
+    result = execute_process(command, False)
+    store_artifact(result)
+    return result
 
-    def get_time():
-        rs = resource.getrusage(resource.RUSAGE_CHILDREN)
-        return {'user': rs.ru_utime, 'system': rs.ru_stime,
-                'total': rs.ru_stime + rs.ru_utime, 'wall': time.time()}
-except ImportError:
-    # The resource module only exists on Unix-based platforms.
-    # This is a different platform, so we can't provide user
-    # and system times.
-    def get_time():
-        return {'wall': time.time()}
 
+async def build_solution_async(path, language, command, build_cache=None):
+    cached_result, store_artifact = restore_build(path, language,
+                                                  build_cache)
+    if cached_result is not None:
+        return cached_result
 
-def format_long_time(timespan):
+    result = await execute_process_async(command, False)
+    store_artifact(result)
+    return result
+
+
+def restore_build(path, language, build_cache=None):
     """
-    Formats a long timespan in a human-readable form with a
-    precision of a 100th of a second.
+    Restores the cached artifact of a solution. Returns the result of
+    the build if it was restored, otherwise None, along with a function
+    that caches the artifact given the result of building it.
 
     """
 
-    formatted_time = []
-    units = (('d', 24 * 60 * 60), ('h', 60 * 60), ('m', 60), ('s', 1))
+    if build_cache is None or 'artifact' not in language:
+        return None, lambda result: None
 
-    for unit, length in units:
-        value = int(timespan / length)
+    artifact_path = language['artifact'].format(path=path)
+    key = build_cache.get_key(hash_source(path), language)
 
-        if value > 0:
-            timespan %= length
-            formatted_time.append('%i%s' % (value, unit))
+    if build_cache.restore(key, artifact_path):
+        return {'output': '', 'error': False, 'execution_time': None,
+                'cached': True}, None
 
-        if timespan < 1:
-            break
+    def store_artifact(result):
+        if not result['error'] and os.path.exists(artifact_path):
+            build_cache.store(key, artifact_path)
 
-    return ' '.join(formatted_time)
+    return None, store_artifact
 
 
-def format_short_time(timespan):
+def execute_solution(path, language, command, time_execution, limits,
+                     worker_pool=None):
     """
-    Formats a short timespan in a human-readable form with a
-    precision of a billionth of a second.
+    Executes a solution in a worker of the pool, if the language
+    supports it and only the timeout is limited, or otherwise (or if
+    the interpreter can't be started as a worker) by running the
+    command.
 
     """
 
-    scaling = (1, 1e3, 1e6, 1e9)
-    units = ['s', 'ms', 'us', 'ns']
+    if not can_use_worker(language, limits, worker_pool):
+        return execute_process(command, time_execution, limits)
 
-    # Attempt to change 'u' to the micro symbol if it's supported.
-    if hasattr(sys.stdout, 'encoding') and sys.stdout.encoding:
-        try:
-            '\xb5'.encode(sys.stdout.encoding)
-            units[2] = '\xb5s'
-        except UnicodeEncodeError:
-            pass
+    try:
+        result = worker_pool.execute(language, path, limits['timeout'],
+                                     environment,
+                                     data.config['output limit'])
+    except OSError:
+        # The interpreter couldn't be started as a worker.
+        return execute_process(command, time_execution, limits)
+    return get_worker_result(result, time_execution)
+
+
+async def execute_solution_async(path, language, command, time_execution,
+                                 limits, worker_pool=None):
+    if not can_use_worker(language, limits, worker_pool):
+        return await execute_process_async(command, time_execution, limits)
+
+    import asyncio
+
+    # The workers block while they run a solution, so they're
+    # waited for in another thread.
+    try:
+        result = await asyncio.get_event_loop().run_in_executor(
+            None, worker_pool.execute, language, path, limits['timeout'],
+            environment, data.config['output limit'])
+    except OSError:
+        return await execute_process_async(command, time_execution, limits)
+    return get_worker_result(result, time_execution)
 
-    if timespan > 0:
-        order = min(-int(math.floor(math.log10(timespan)) // 3), 3)
-    else:
-        order = 3
 
-    return '%.*g%s' % (3, timespan * scaling[order], units[order])
+def can_use_worker(language, limits, worker_pool=None):
+    from EasyEuler.workers import supports_workers
 
+    return worker_pool is not None and supports_workers(language) and \
+        limits['memory'] is None and limits['cpu'] is None
 
-def format_time(timespan):
+
+def get_worker_result(result, time_execution):
+    if not time_execution and 'limit' not in result:
+        result['execution_time'] = None
+    return result
+
+
+def get_process_output(process):
+    # Truncated output may start in the middle of a character.
+    if process.returncode != 0:
+        return str(process.stderr, encoding='UTF-8', errors='replace'), True
+    return str(process.stdout, encoding='UTF-8',
+               errors='replace').rstrip(), False
+
+
+def get_commands(path, language):
     """
-    Formats a timespan in a human-readable form.
-    Courtesy of IPython.
+    Formats the commands of a language for a path. In the shell exec
+    mode, a command is a string, otherwise it's a list of arguments.
 
     """
 
-    if timespan >= 60:
-        # If the time is greater than one minute,
-        # precision is reduced to a 100th of a second.
-        return format_long_time(timespan)
-    return format_short_time(timespan)
+    exec_mode = language.get('exec mode', data.config['exec mode'])
+    commands = {'build': None, 'cleanup': None}
+    commands['execute'] = format_command(language.get('execute', './{path}'),
+                                         path, exec_mode)
+
+    if 'build' in language:
+        commands['build'] = format_command(language['build'], path, exec_mode)
+    if 'cleanup' in language:
+        commands['cleanup'] = format_command(language['cleanup'], path,
+                                             exec_mode)
+
+    return commands
+
+
+def format_command(command, path, exec_mode):
+    if exec_mode == 'shell':
+        return command.format(path=path)
+
+    # The command is split before it's formatted, so a path
+    # containing spaces remains a single argument.
+    return [argument.format(path=path) for argument in shlex.split(command)]
+
+
+def execute_process(command, time_execution, limits=None):
+    start_time = time.perf_counter()
+    process, rusage, limit = run_process(command, limits,
+                                         data.config['output limit'],
+                                         environment)
+    wall_time = time.perf_counter() - start_time
+    return get_process_result(process, rusage, limit, wall_time,
+                              time_execution)
+
+
+async def execute_process_async(command, time_execution, limits=None):
+    start_time = time.perf_counter()
+    process, rusage, limit = await run_process_async(
+        command, limits, data.config['output limit'], environment)
+    wall_time = time.perf_counter() - start_time
+    return get_process_result(process, rusage, limit, wall_time,
+                              time_execution)
+
+
+def get_process_result(process, rusage, limit, wall_time, time_execution):
+    # The time is measured even if a limit is exceeded,
+    # since it tells how far the process got.
+    if time_execution or limit is not None:
+        execution_time = get_execution_time(wall_time, rusage)
+    else:
+        execution_time = None
+
+    output, error = get_process_output(process)
+    result = {'output': output, 'error': error or limit is not None,
+              'execution_time': execution_time,
+              'truncated': process.truncated}
+
+    if limit is not None:
+        result['limit'] = limit
+    return result
+
+
+def get_execution_time(wall_time, rusage):
+    if rusage is None:
+        # Resource usage is only available on Unix-based platforms,
+        # so we can't provide user and system times.
+        return {'wall': wall_time}
+
+    return {'user': rusage.ru_utime, 'system': rusage.ru_stime,
+            'total': rusage.ru_utime + rusage.ru_stime, 'wall': wall_time,
+            'memory': get_peak_memory(rusage)}
+
+
+def format_execution_time(execution_time):
+    return {key: format_size(value) if key == 'memory' else format_time(value)
+            for key, value in execution_time.items()}
@@ -1,40 +1,287 @@
-import collections
+import collections.abc
 import json
 import os
+import re
+import sqlite3
+import tempfile
+import threading
 
-from jinja2 import Environment, FileSystemLoader
+from EasyEuler import paths, search
 
-from EasyEuler import paths
 
+class ProblemDatabase(collections.abc.Sequence):
+    """
+    A list of problems backed by an SQLite index of the problems file.
 
-class ProblemList(collections.Sequence):
-    def __init__(self, problems):
-        self._problems = problems
+    The index is built from the problems file the first time it's needed
+    and rebuilt whenever the problems file is newer than it. Problems are
+    only loaded from the index when they are requested, so neither
+    importing nor looking up a problem depends on the number of problems.
+
+    """
+
+    INDEX_VERSION = 2
+    SORT_COLUMNS = ('id', 'difficulty')
+
+    def __init__(self, source, index):
+        self.source = source
+        self.index = index
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._index_checked = False
+        self._in_memory = False
 
     def get(self, problem_id):
-        if problem_id < 1 or len(self) < problem_id:
-            # We don't want a negative index,
-            # because it'll wrap back around.
-            return None
-        return self[problem_id]
+        row = self._execute('SELECT record FROM problems WHERE id = ?',
+                            (problem_id,)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def get_summaries(self, sort='id', ids=None, difficulties=None,
+                      search=None, include=None, exclude=None, limit=None,
+                      offset=0):
+        """
+        Generates an (id, name, difficulty) tuple for every problem, or
+        only for the problems that match the filters:
+
+        ids and difficulties are lists of (start, end) ranges, search is
+        a case-insensitive substring of the name, and include and exclude
+        are collections of problem IDs to keep and skip.
+
+        The rows are read from the index one at a time as they're
+        generated, so they're never all in memory at once.
+
+        """
+
+        if sort not in self.SORT_COLUMNS:
+            raise ValueError('Cannot sort problems by %s' % sort)
+
+        conditions, parameters = [], []
+
+        for column, ranges in (('id', ids), ('difficulty', difficulties)):
+            if ranges is not None:
+                conditions.append('(%s)' % ' OR '.join(
+                    '%s BETWEEN ? AND ?' % column for _ in ranges))
+                for start, end in ranges:
+                    parameters.extend((start, end))
+
+        if search is not None:
+            conditions.append("name LIKE ? ESCAPE '\\'")
+            parameters.append('%%%s%%' % re.sub(r'([%_\\])', r'\\\1',
+                                                  search))
+
+        for operator, problem_ids in (('IN', include), ('NOT IN', exclude)):
+            if problem_ids is not None:
+                problem_ids = list(problem_ids)
+                conditions.append('id %s (%s)' % (
+                    operator, ', '.join('?' * len(problem_ids))))
+                parameters.extend(problem_ids)
+
+        query = 'SELECT id, name, difficulty FROM problems'
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        query += ' ORDER BY %s, id LIMIT ? OFFSET ?' % sort
+        parameters.extend((-1 if limit is None else limit, offset))
+
+        return self._execute(query, parameters)
+
+    def search(self, query, limit=None):
+        """
+        Searches the names, descriptions and resources of the problems
+        for the terms in a query. Returns (id, name, score) tuples of the
+        matching problems, the best match first.
+
+        Only the postings of the terms in the query are read from the
+        index, so searching doesn't depend on the number of problems.
+
+        """
+
+        postings = []
+        for term in set(search.tokenize(query)):
+            postings.append(dict(self._execute(
+                'SELECT problem, weight FROM terms WHERE term = ?', (term,))))
+
+        problem_ids = set().union(*postings)
+        if not problem_ids:
+            return []
+
+        placeholders = ', '.join('?' * len(problem_ids))
+        lengths = dict(self._execute(
+            'SELECT id, length FROM problems WHERE id IN (%s)' % placeholders,
+            list(problem_ids)))
+        document_count, average_length = self._execute(
+            'SELECT document_count, average_length FROM search_statistics'
+        ).fetchone()
+
+        results = search.score(postings, lengths, document_count,
+                               average_length)[:limit]
+        names = dict(self._execute(
+            'SELECT id, name FROM problems WHERE id IN (%s)' % placeholders,
+            list(problem_ids)))
+        return [(problem_id, names[problem_id], score)
+                for problem_id, score in results]
+
+    def build_index(self):
+        """ Builds the index from the problems file. """
+
+        with open(self.source) as f:
+            problems = json.load(f)
+
+        directory = os.path.dirname(self.index)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        os.close(fd)
+
+        try:
+            connection = sqlite3.connect(temp_path)
+            with connection:
+                self._write_index(connection, problems)
+            connection.close()
+            os.replace(temp_path, self.index)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+        self._index_checked = True
 
     def __getitem__(self, problem_id):
-        return self._problems[problem_id - 1]
+        problem = self.get(problem_id)
+        if problem is None:
+            raise IndexError('A problem with ID %s does not exist' %
+                             problem_id)
+        return problem
+
+    def __iter__(self):
+        for row in self._execute('SELECT record FROM problems ORDER BY id'):
+            yield json.loads(row[0])
 
     def __len__(self):
-        return len(self._problems)
+        return self._execute('SELECT COUNT(*) FROM problems').fetchone()[0]
+
+    def _execute(self, query, parameters=()):
+        return self._get_connection().execute(query, parameters)
+
+    def _get_connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._connect()
+            self._local.connection = connection
+        return connection
+
+    def _connect(self):
+        with self._lock:
+            if not self._index_checked:
+                if not self._is_index_current():
+                    try:
+                        self.build_index()
+                    except OSError:
+                        self._in_memory = True
+                self._index_checked = True
+
+        if self._in_memory:
+            # The index couldn't be written to the cache directory,
+            # so every thread keeps its own copy in memory instead.
+            connection = sqlite3.connect(':memory:')
+            with open(self.source) as f:
+                self._write_index(connection, json.load(f))
+            return connection
+        return sqlite3.connect(self.index)
+
+    def _is_index_current(self):
+        try:
+            if os.path.getmtime(self.index) < os.path.getmtime(self.source):
+                return False
+        except FileNotFoundError:
+            return False
+
+        connection = sqlite3.connect(self.index)
+        try:
+            version = connection.execute('PRAGMA user_version').fetchone()[0]
+        finally:
+            connection.close()
+        return version == self.INDEX_VERSION
+
+    def _write_index(self, connection, problems):
+        connection.execute('CREATE TABLE problems (id INTEGER PRIMARY KEY, '
+                           'name TEXT, difficulty INTEGER, record TEXT, '
+                           'length INTEGER)')
+        connection.execute('CREATE INDEX problems_difficulty '
+                           'ON problems (difficulty, id)')
 
+        # An inverted index of the terms in the problems, which maps
+        # every term to the problems it's in, for searching.
+        connection.execute('CREATE TABLE terms (term TEXT, problem INTEGER, '
+                           'weight INTEGER, PRIMARY KEY (term, problem)) '
+                           'WITHOUT ROWID')
+        connection.execute('CREATE TABLE search_statistics '
+                           '(document_count INTEGER, average_length REAL)')
 
-class ConfigurationDictionary(collections.Mapping):
-    def __init__(self, configs):
-        self._config = {}
+        total_length = 0
+        for problem in problems:
+            weights, length = search.get_term_weights(problem)
+            total_length += length
 
-        for config in configs:
-            self._config = self._update(self._config, config)
+            connection.execute(
+                'INSERT INTO problems VALUES (?, ?, ?, ?, ?)',
+                (problem['id'], problem['name'], problem['difficulty'],
+                 json.dumps(problem), length))
+            connection.executemany(
+                'INSERT INTO terms VALUES (?, ?, ?)',
+                ((term, problem['id'], weight)
+                 for term, weight in weights.items()))
+
+        connection.execute('INSERT INTO search_statistics VALUES (?, ?)',
+                           (len(problems),
+                            total_length / max(len(problems), 1) or 1))
+        connection.execute('PRAGMA user_version = %d' % self.INDEX_VERSION)
+
+
+class ConfigurationDictionary(collections.abc.Mapping):
+    """
+    Merges a list of configurations, with the later ones taking
+    precedence. The configurations may also be a function that loads
+    them, in which case they're only loaded and merged when the
+    configuration is first used, and loaded again if that fails.
+    Merging is safe to do from multiple threads.
+
+    If a snapshot is given, the merged configuration is loaded from it
+    instead, as long as it's up to date, and saved to it otherwise.
+
+    """
+
+    def __init__(self, configs, snapshot=None):
+        self._configs = configs
+        self._snapshot = snapshot
+        self._merged_config = None
+        self._language_indexes = {}
+        self._lock = threading.Lock()
+
+    @property
+    def _config(self):
+        if self._merged_config is None:
+            with self._lock:
+                if self._merged_config is None:
+                    self._merged_config = self._merge()
+        return self._merged_config
+
+    def _merge(self):
+        merged_config = None
+        if self._snapshot is not None:
+            merged_config = self._snapshot.load()
+
+        if merged_config is None:
+            configs = self._configs() if callable(self._configs) \
+                else self._configs
+            merged_config = {}
+            for config in configs:
+                merged_config = self._update(merged_config, config)
+            if self._snapshot is not None:
+                self._snapshot.save(merged_config)
+
+        return merged_config
 
     def _update(self, config, updates):
         for key, value in updates.items():
-            if isinstance(value, collections.Mapping):
+            if isinstance(value, collections.abc.Mapping):
                 updated = self._update(config.get(key, {}), value)
                 config[key] = updated
             else:
@@ -42,10 +289,38 @@ class ConfigurationDictionary(collections.Mapping):
         return config
 
     def get_language(self, key, value):
+        """
+        Finds the first language with the value for an option. Looking up
+        an extension also finds languages that list it in extensions.
+
+        """
+
+        index = self._language_indexes.get(key)
+        if index is None:
+            index = self._language_indexes[key] = self._index_languages(key)
+
+        name = index.get(value) if value is not None else None
+        if name is None:
+            return None
+        return {'name': name, **self._config['languages'][name]}
+
+    def _index_languages(self, key):
+        """ Maps the values of an option to the languages with them. """
+
+        index = {}
+
         for name, options in self._config['languages'].items():
-            if options[key] == value:
-                return {'name': name, **options}
-        return None
+            if key == 'extension':
+                values = get_extensions(options)
+            else:
+                values = [options.get(key)]
+
+            for value in values:
+                if value is not None and \
+                   isinstance(value, collections.abc.Hashable):
+                    index.setdefault(value, name)
+
+        return index
 
     def __getitem__(self, key):
         return self._config[key]
@@ -57,17 +332,140 @@ class ConfigurationDictionary(collections.Mapping):
         raise NotImplementedError
 
 
-CONFIG_LIST = []
-for CONFIG_PATH in paths.CONFIGS:
-    if not os.path.exists(CONFIG_PATH):
-        continue
+class ConfigSnapshot:
+    """
+    A file containing a merged configuration, along with the modification
+    times and sizes of the configuration files it was merged from, so
+    it's only used until one of them is changed, added or removed.
+
+    """
+
+    VERSION = 1
+
+    def __init__(self, path, config_paths):
+        self.path = path
+        self.config_paths = config_paths
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if snapshot.get('version') != self.VERSION or \
+           snapshot.get('sources') != self.get_sources():
+            return None
+        return snapshot['config']
+
+    def save(self, config):
+        snapshot = {'version': self.VERSION, 'sources': self.get_sources(),
+                    'config': config}
+
+        try:
+            directory = os.path.dirname(self.path)
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        except OSError:
+            # The snapshot is only an optimization.
+            return
+
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(snapshot, f)
+            os.replace(temp_path, self.path)
+        except OSError:
+            os.remove(temp_path)
+
+    def get_sources(self):
+        sources = []
+
+        for config_path in self.config_paths:
+            try:
+                stat = os.stat(config_path)
+            except OSError:
+                sources.append([config_path, None, None])
+            else:
+                sources.append([config_path, stat.st_mtime_ns, stat.st_size])
+
+        return sources
+
+
+def get_extensions(language):
+    """ Returns the extensions of a language, the main one first. """
+
+    return [language['extension']] + language.get('extensions', [])
+
+
+def load_configs(config_paths):
+    for config_path in config_paths:
+        if not os.path.exists(config_path):
+            continue
+
+        with open(config_path) as conf:
+            yield json.load(conf)
+
+
+_templates = None
+
+
+def get_templates():
+    """
+    Returns the template environment, creating it on first use.
+
+    Compiled templates are cached in the cache directory, so they're
+    only compiled again when their source changes.
+
+    """
+
+    global _templates
+    if _templates is None:
+        # Jinja2 is imported here, because most commands don't need
+        # it and it's relatively slow to import.
+        from jinja2 import (Environment, FileSystemBytecodeCache,
+                            FileSystemLoader)
+
+        try:
+            os.makedirs(paths.TEMPLATE_CACHE, exist_ok=True)
+            bytecode_cache = FileSystemBytecodeCache(paths.TEMPLATE_CACHE)
+        except OSError:
+            bytecode_cache = None
+
+        _templates = Environment(loader=FileSystemLoader(paths.TEMPLATES),
+                                 bytecode_cache=bytecode_cache)
+    return _templates
+
+
+def get_template_signature():
+    """
+    Returns a value that changes whenever any template is changed,
+    added or removed, without reading any of the templates.
+
+    """
+
+    signature = []
+
+    for template_dir in paths.TEMPLATES:
+        try:
+            entries = sorted(os.scandir(template_dir),
+                             key=lambda entry: entry.name)
+        except FileNotFoundError:
+            continue
+
+        for entry in entries:
+            stat = entry.stat()
+            signature.append((entry.path, stat.st_mtime_ns, stat.st_size))
+
+    return signature
+
 
-    with open(CONFIG_PATH) as conf:
-        CONFIG_LIST.append(json.load(conf))
+def load_config():
+    config_paths = list(paths.CONFIGS)
+    return ConfigurationDictionary(lambda: load_configs(config_paths),
+                                   ConfigSnapshot(paths.CONFIG_SNAPSHOT,
+                                                  config_paths))
 
-with open(paths.PROBLEMS) as f:
-    PROBLEM_LIST = json.load(f)
 
-config = ConfigurationDictionary(CONFIG_LIST)
-problems = ProblemList(PROBLEM_LIST)
-templates = Environment(loader=FileSystemLoader(paths.TEMPLATES))
+# Nothing is loaded from the disk until it's used.
+config = load_config()
+problems = ProblemDatabase(paths.PROBLEMS, paths.PROBLEM_INDEX)
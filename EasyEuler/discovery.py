@@ -0,0 +1,251 @@
+import os
+import re
+import string
+
+
+# Directories that never contain solutions worth verifying.
+DEFAULT_EXCLUDES = ('.git', '.hg', '.svn', '__pycache__', 'node_modules',
+                    '.tox', '.venv', 'venv')
+
+IGNORE_FILE = '.gitignore'
+
+
+class IgnoreRule:
+    """
+    A pattern in the syntax of .gitignore files, which applies to the
+    paths under the directory it was defined in.
+
+    """
+
+    def __init__(self, pattern, directory):
+        self.directory = directory
+        self.negated = pattern.startswith('!')
+        if self.negated:
+            pattern = pattern[1:]
+
+        self.directory_only = pattern.endswith('/')
+        pattern = pattern.rstrip('/')
+
+        # Patterns with a slash are relative to the directory,
+        # the others match a name at any depth.
+        if '/' in pattern:
+            prefix = ''
+            pattern = pattern.lstrip('/')
+        else:
+            prefix = '(?:.*/)?'
+
+        self.regex = re.compile(prefix + translate_glob(pattern) + '$')
+
+    def match(self, path, is_directory):
+        """
+        Determines whether the rule matches a path, returning None if
+        it doesn't, otherwise whether the path is ignored.
+
+        """
+
+        if self.directory_only and not is_directory:
+            return None
+
+        relative_path = os.path.relpath(path, self.directory)
+        if relative_path == os.pardir or \
+           relative_path.startswith(os.pardir + os.sep):
+            return None
+        if os.sep != '/':
+            relative_path = relative_path.replace(os.sep, '/')
+
+        if self.regex.match(relative_path) is None:
+            return None
+        return not self.negated
+
+
+def translate_glob(pattern):
+    """ Translates a glob pattern with ** to a regular expression. """
+
+    regex = ''
+    index = 0
+
+    while index < len(pattern):
+        if pattern.startswith('**/', index):
+            regex += '(?:.*/)?'
+            index += 3
+        elif pattern.startswith('**', index):
+            regex += '.*'
+            index += 2
+        elif pattern[index] == '*':
+            regex += '[^/]*'
+            index += 1
+        elif pattern[index] == '?':
+            regex += '[^/]'
+            index += 1
+        elif pattern[index] == '[' and ']' in pattern[index + 2:]:
+            end = pattern.index(']', index + 2)
+            characters = pattern[index + 1:end]
+            if characters.startswith('!'):
+                characters = '^' + characters[1:]
+            regex += '[%s]' % characters.replace('\\', '\\\\')
+            index = end + 1
+        else:
+            if pattern[index] == '\\' and index + 1 < len(pattern):
+                index += 1
+            regex += re.escape(pattern[index])
+            index += 1
+
+    return regex
+
+
+def is_ignored(path, is_directory, rules):
+    """ Applies the rules to a path, the last matching one winning. """
+
+    ignored = False
+    for rule in rules:
+        matched = rule.match(path, is_directory)
+        if matched is not None:
+            ignored = matched
+    return ignored
+
+
+def read_ignore_rules(directory):
+    try:
+        with open(os.path.join(directory, IGNORE_FILE)) as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return []
+
+    return [IgnoreRule(line.rstrip(), directory) for line in lines
+            if line.strip() and not line.startswith('#')]
+
+
+def get_parent_ignore_rules(directory):
+    """
+    Reads the ignore files of the directories above a directory, up to
+    the root of the git repository it's in (if it's in one).
+
+    """
+
+    directory = os.path.abspath(directory)
+    parents = []
+    parent = os.path.dirname(directory)
+
+    while parent != directory:
+        parents.append(parent)
+        if os.path.exists(os.path.join(parent, '.git')):
+            break
+        directory, parent = parent, os.path.dirname(parent)
+    else:
+        # The directory isn't in a repository.
+        return []
+
+    rules = []
+    for parent in reversed(parents):
+        rules.extend(read_ignore_rules(parent))
+    return rules
+
+
+def get_filename_regex(filename_format, extensions):
+    """
+    Makes a regular expression matching the names of files created with
+    the filename format (as in the configuration file), with one of the
+    extensions. The problem ID and extension are captured as the id and
+    extension groups.
+
+    """
+
+    regex = ''
+    fields = set()
+
+    for literal, field, _, _ in string.Formatter().parse(filename_format):
+        regex += re.escape(literal)
+        if field is None:
+            continue
+
+        if field in fields:
+            regex += '(?P=%s)' % field
+        elif field == 'id':
+            regex += r'0*(?P<id>[1-9]\d*)'
+        elif field == 'extension':
+            regex += '(?P<extension>%s)' % '|'.join(
+                re.escape(extension) for extension in
+                sorted(extensions, key=len, reverse=True))
+        else:
+            regex += '(?P<%s>.+?)' % field
+        fields.add(field)
+
+    return re.compile(regex + '$')
+
+
+def find_solution_files(directory, filename_regex, excludes=(),
+                        use_ignore_files=True):
+    """
+    Walks a directory, generating the paths of files whose names match
+    the regular expression, in a deterministic order.
+
+    Directories in DEFAULT_EXCLUDES, and files and directories that match
+    the exclude patterns or the rules of .gitignore files, are skipped
+    without being walked. The exclude patterns have the syntax of
+    .gitignore files and are relative to the directory.
+
+    """
+
+    exclude_rules = [IgnoreRule(exclude, directory) for exclude in excludes]
+    parent_rules = get_parent_ignore_rules(directory) \
+        if use_ignore_files else []
+    directory_rules = {}
+
+    for root, dirnames, filenames in os.walk(directory):
+        ignore_rules = directory_rules.pop(root, parent_rules)
+        if use_ignore_files:
+            ignore_rules = ignore_rules + read_ignore_rules(root)
+        # The exclude patterns take precedence over the ignore files.
+        rules = ignore_rules + exclude_rules
+
+        # Pruning dirnames in place keeps os.walk out of the excluded
+        # directories, and sorting it makes the order deterministic.
+        dirnames[:] = sorted(
+            dirname for dirname in dirnames
+            if dirname not in DEFAULT_EXCLUDES and
+            not is_ignored(os.path.join(root, dirname), True, rules))
+        for dirname in dirnames:
+            directory_rules[os.path.join(root, dirname)] = ignore_rules
+
+        for filename in sorted(filenames):
+            if filename_regex.match(filename) is None:
+                continue
+
+            path = os.path.join(root, filename)
+            if not is_ignored(path, False, rules):
+                yield path
+
+
+def is_solution_file(path, directory, filename_regex, excludes=(),
+                     use_ignore_files=True):
+    """
+    Determines whether find_solution_files would generate a path under
+    a directory, only reading the ignore files of the directories on the
+    way to it rather than walking the whole directory.
+
+    """
+
+    if filename_regex.match(os.path.basename(path)) is None:
+        return False
+
+    relative_path = os.path.relpath(path, directory)
+    if relative_path == os.pardir or \
+       relative_path.startswith(os.pardir + os.sep):
+        return False
+
+    exclude_rules = [IgnoreRule(exclude, directory) for exclude in excludes]
+    ignore_rules = get_parent_ignore_rules(directory) \
+        if use_ignore_files else []
+    root = directory
+
+    for dirname in relative_path.split(os.sep)[:-1]:
+        if use_ignore_files:
+            ignore_rules = ignore_rules + read_ignore_rules(root)
+        root = os.path.join(root, dirname)
+        if dirname in DEFAULT_EXCLUDES or \
+           is_ignored(root, True, ignore_rules + exclude_rules):
+            return False
+
+    if use_ignore_files:
+        ignore_rules = ignore_rules + read_ignore_rules(root)
+    return not is_ignored(path, False, ignore_rules + exclude_rules)
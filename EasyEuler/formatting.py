@@ -0,0 +1,79 @@
+import math
+import sys
+
+
+def format_count(count, noun):
+    """ Formats a count of a noun, e.g. 1 file or 2 files. """
+
+    return '%d %s' % (count, noun if count == 1 else noun + 's')
+
+
+def format_long_time(timespan):
+    """
+    Formats a long timespan in a human-readable form with a
+    precision of a 100th of a second.
+
+    """
+
+    formatted_time = []
+    units = (('d', 24 * 60 * 60), ('h', 60 * 60), ('m', 60), ('s', 1))
+
+    for unit, length in units:
+        value = int(timespan / length)
+
+        if value > 0:
+            timespan %= length
+            formatted_time.append('%i%s' % (value, unit))
+
+        if timespan < 1:
+            break
+
+    return ' '.join(formatted_time)
+
+
+def format_short_time(timespan):
+    """
+    Formats a short timespan in a human-readable form with a
+    precision of a billionth of a second.
+
+    """
+
+    scaling = (1, 1e3, 1e6, 1e9)
+    units = ['s', 'ms', 'us', 'ns']
+
+    # Attempt to change 'u' to the micro symbol if it's supported.
+    if hasattr(sys.stdout, 'encoding') and sys.stdout.encoding:
+        try:
+            '\xb5'.encode(sys.stdout.encoding)
+            units[2] = '\xb5s'
+        except UnicodeEncodeError:
+            pass
+
+    if timespan > 0:
+        order = min(-int(math.floor(math.log10(timespan)) // 3), 3)
+    else:
+        order = 3
+
+    return '%.*g%s' % (3, timespan * scaling[order], units[order])
+
+
+def format_size(size):
+    for unit in ('B', 'KiB', 'MiB'):
+        if size < 1024:
+            return '%.4g%s' % (size, unit)
+        size /= 1024
+    return '%.4g%s' % (size, 'GiB')
+
+
+def format_time(timespan):
+    """
+    Formats a timespan in a human-readable form.
+    Courtesy of IPython.
+
+    """
+
+    if timespan >= 60:
+        # If the time is greater than one minute,
+        # precision is reduced to a 100th of a second.
+        return format_long_time(timespan)
+    return format_short_time(timespan)
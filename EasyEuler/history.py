@@ -0,0 +1,132 @@
+import os
+import sqlite3
+import time
+
+from EasyEuler.benchmark import get_percentile
+
+
+TIMES = ('wall', 'user', 'system', 'total', 'memory')
+
+# The number of correct runs before the last one that its wall time is
+# compared to, so a single slow or fast run doesn't flag a regression.
+REGRESSION_WINDOW = 5
+
+
+class History:
+    """
+    A database of verification runs, used to follow how the results
+    and execution times of solutions change over time.
+
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._connection = None
+
+    def record(self, path, language, problem_id, source_hash, status,
+               execution_time=None, runs=1):
+        """
+        Records a run of a solution. For benchmarks, the execution time
+        is the median of the runs.
+
+        """
+
+        execution_time = execution_time or {}
+        connection = self._get_connection()
+
+        with connection:
+            connection.execute(
+                'INSERT INTO runs (timestamp, problem, language, path, '
+                'source_hash, status, runs, wall, user, system, total, '
+                'memory) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (time.time(), problem_id, language, os.path.abspath(path),
+                 source_hash, status, runs) +
+                tuple(execution_time.get(key) for key in TIMES))
+
+    def get_solutions(self, problem_id=None, language=None):
+        """ Returns the (problem, language) pairs that have been run. """
+
+        query = 'SELECT DISTINCT problem, language FROM runs'
+        conditions, parameters = self._get_conditions(problem_id, language)
+        return self._get_connection().execute(
+            query + conditions + ' ORDER BY problem, language',
+            parameters).fetchall()
+
+    def get_solved(self):
+        """ Returns the IDs of the problems that have been solved. """
+
+        return {row[0] for row in self._get_connection().execute(
+            "SELECT DISTINCT problem FROM runs WHERE status = 'correct'")}
+
+    def get_runs(self, problem_id, language, limit=None):
+        """ Returns the runs of a solution, the most recent run first. """
+
+        conditions, parameters = self._get_conditions(problem_id, language)
+        query = 'SELECT * FROM runs%s ORDER BY timestamp DESC, id DESC' % \
+                conditions
+
+        if limit is not None:
+            query += ' LIMIT %d' % limit
+
+        cursor = self._get_connection().execute(query, parameters)
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor]
+
+    def get_regression(self, problem_id, language, threshold,
+                       window=REGRESSION_WINDOW):
+        """
+        Compares the wall time of the last correct run of a solution (the
+        median of the runs for benchmarks) to the median wall time of the
+        window correct runs before it. Returns the relative change if it
+        got more than threshold (a fraction) slower, otherwise None.
+
+        """
+
+        times = [row[0] for row in self._get_connection().execute(
+            "SELECT wall FROM runs WHERE problem = ? AND language IS ? AND "
+            "status = 'correct' AND wall IS NOT NULL "
+            "ORDER BY timestamp DESC, id DESC LIMIT ?",
+            (problem_id, language, window + 1))]
+        if len(times) < 2:
+            return None
+
+        baseline = get_percentile(sorted(times[1:]), 0.5)
+        if baseline <= 0:
+            return None
+
+        change = times[0] / baseline - 1
+        return change if change > threshold else None
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _get_conditions(self, problem_id, language):
+        conditions, parameters = [], []
+
+        if problem_id is not None:
+            conditions.append('problem = ?')
+            parameters.append(problem_id)
+        if language is not None:
+            conditions.append('language = ?')
+            parameters.append(language)
+
+        if not conditions:
+            return '', parameters
+        return ' WHERE ' + ' AND '.join(conditions), parameters
+
+    def _get_connection(self):
+        if self._connection is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._connection = sqlite3.connect(self.path)
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS runs ('
+                'id INTEGER PRIMARY KEY, timestamp REAL, problem INTEGER, '
+                'language TEXT, path TEXT, source_hash TEXT, status TEXT, '
+                'runs INTEGER, wall REAL, user REAL, system REAL, '
+                'total REAL, memory INTEGER)')
+            self._connection.execute(
+                'CREATE INDEX IF NOT EXISTS runs_solution '
+                'ON runs (problem, language, timestamp)')
+        return self._connection
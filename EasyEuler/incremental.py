@@ -0,0 +1,209 @@
+import json
+import os
+import re
+import subprocess
+import tempfile
+
+from EasyEuler.cache import hash_file, hash_values
+
+
+INCLUDE_REGEX = re.compile(r'^\s*#\s*include\s*"([^"]+)"', re.MULTILINE)
+
+
+class Manifest:
+    """
+    A record of the files that were verified, which is used to find the
+    ones that changed since. A file is identified by its modification
+    time and size, and only hashed when those changed, so files that
+    were merely touched aren't considered changed.
+
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._entries = None
+        self._changed = False
+
+    def is_changed(self, path, language):
+        """
+        Determines whether a file, its language or the files it includes
+        changed since it was last verified, or whether it didn't pass
+        then. Files that were never verified are considered changed.
+
+        """
+
+        entry = self._get_entries().get(os.path.abspath(path))
+        if entry is None or entry['status'] != 'correct' or \
+           entry['language'] != get_language_hash(language):
+            return True
+
+        return any(is_file_changed(file_path, record) for file_path, record
+                   in [(path, entry['file'])] +
+                   list(entry['dependencies'].items()))
+
+    def is_changed_since(self, path, language, changed_files):
+        """
+        Determines whether a file or the files it includes are in
+        changed_files, or whether its language changed or it didn't pass
+        since it was last verified.
+
+        """
+
+        if os.path.realpath(path) in changed_files or \
+           not changed_files.isdisjoint(get_dependencies(path)):
+            return True
+
+        entry = self._get_entries().get(os.path.abspath(path))
+        return entry is not None and \
+            (entry['status'] != 'correct' or
+             entry['language'] != get_language_hash(language))
+
+    def update(self, path, language, status):
+        try:
+            entry = {'file': get_file_record(path),
+                     'dependencies': {dependency: get_file_record(dependency)
+                                      for dependency in
+                                      get_dependencies(path)},
+                     'language': get_language_hash(language),
+                     'status': status}
+        except OSError:
+            # The file was removed after it was verified.
+            return
+
+        self._get_entries()[os.path.abspath(path)] = entry
+        self._changed = True
+
+    def save(self):
+        if not self._changed:
+            return
+
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self._entries, f)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        self._changed = False
+
+    def _get_entries(self):
+        if self._entries is None:
+            try:
+                with open(self.path) as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+
+def get_file_record(path):
+    stat = os.stat(path)
+    return {'mtime': stat.st_mtime, 'size': stat.st_size,
+            'hash': hash_file(path)}
+
+
+def is_file_changed(path, record):
+    try:
+        stat = os.stat(path)
+        if stat.st_mtime == record['mtime'] and \
+           stat.st_size == record['size']:
+            return False
+        return hash_file(path) != record['hash']
+    except OSError:
+        return True
+
+
+def get_language_hash(language):
+    return hash_values(language)
+
+
+def get_dependencies(path):
+    """
+    Finds the files a file includes with #include "...", directly or
+    through other included files, as absolute paths. Included files are
+    looked up relative to the file including them, like C does.
+
+    """
+
+    dependencies = set()
+    pending = [os.path.realpath(path)]
+
+    while pending:
+        file_path = pending.pop()
+        try:
+            with open(file_path, errors='replace') as f:
+                source = f.read()
+        except OSError:
+            continue
+
+        for include in INCLUDE_REGEX.findall(source):
+            include_path = os.path.realpath(
+                os.path.join(os.path.dirname(file_path), include))
+            if include_path not in dependencies and \
+               os.path.isfile(include_path):
+                dependencies.add(include_path)
+                pending.append(include_path)
+
+    return dependencies
+
+
+def hash_source(path):
+    """
+    Hashes the contents of a file along with those of the files it
+    includes, which are identified by their paths relative to it, so the
+    hash doesn't depend on where the file is located.
+
+    """
+
+    directory = os.path.dirname(os.path.realpath(path))
+    dependencies = sorted((os.path.relpath(dependency, directory),
+                           hash_file(dependency))
+                          for dependency in get_dependencies(path))
+    return hash_values(hash_file(path), dependencies)
+
+
+def get_git_changes(paths, revision):
+    """
+    Returns the real paths of the files that changed since a revision
+    in the git repositories containing paths, including uncommitted
+    changes and untracked files that aren't ignored.
+
+    Raises ValueError if git fails, e.g. because the revision doesn't
+    exist or a path isn't in a repository.
+
+    """
+
+    changed_files = set()
+    repositories = set()
+
+    for path in paths:
+        directory = path if os.path.isdir(path) else os.path.dirname(path)
+        repositories.add(run_git(['rev-parse', '--show-toplevel'],
+                                 directory or '.').strip())
+
+    for repository in repositories:
+        output = run_git(['diff', '--name-only', '--no-renames', '-z',
+                          revision, '--'], repository) + \
+            run_git(['ls-files', '--others', '--exclude-standard', '-z'],
+                    repository)
+        changed_files.update(os.path.realpath(os.path.join(repository, name))
+                             for name in output.split('\0') if name)
+
+    return changed_files
+
+
+def run_git(arguments, directory):
+    try:
+        process = subprocess.run(['git', '-C', directory] + arguments,
+                                 stdout=subprocess.PIPE,
+                                 stderr=subprocess.PIPE,
+                                 universal_newlines=True)
+    except OSError as exception:
+        raise ValueError('Could not run git: %s' % exception)
+
+    if process.returncode != 0:
+        raise ValueError(process.stderr.strip())
+    return process.stdout
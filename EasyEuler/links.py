@@ -0,0 +1,115 @@
+import os
+import shutil
+import threading
+
+from EasyEuler.cache import hash_file
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+LINK_METHODS = ('copy', 'hardlink', 'reflink', 'symlink')
+
+# The method tried next when one isn't supported, e.g. because the files
+# are on different file systems or the file system can't share extents.
+FALLBACKS = {'hardlink': 'reflink', 'reflink': 'copy', 'symlink': 'copy'}
+
+# The Linux ioctl making a file share the extents of another file,
+# _IOW(0x94, 9, int).
+FICLONE = 0x40049409
+
+
+def link_file(source, destination, method):
+    """
+    Creates destination from source with a link method, falling back to
+    the next method when one fails, and returns the method that was used.
+
+    The file is created under a temporary name and moved over the
+    destination, so an existing file is replaced rather than written to,
+    which would change the source too if it's a link to it.
+
+    """
+
+    temp_path = os.path.join(
+        os.path.dirname(destination) or '.', '.%s.%d.%d.tmp' % (
+            os.path.basename(destination), os.getpid(),
+            threading.get_ident()))
+
+    while True:
+        try:
+            LINKERS[method](source, temp_path)
+            break
+        except OSError:
+            remove_file(temp_path)
+            if method not in FALLBACKS:
+                raise
+            method = FALLBACKS[method]
+
+    try:
+        os.replace(temp_path, destination)
+    except OSError:
+        remove_file(temp_path)
+        raise
+    return method
+
+
+def is_same_file(source, destination):
+    """ Determines whether destination is or links to source. """
+
+    try:
+        return os.path.samefile(source, destination)
+    except OSError:
+        return False
+
+
+def is_identical(source, destination):
+    """
+    Determines whether destination already has the content of source,
+    comparing the sizes before hashing the files.
+
+    """
+
+    if is_same_file(source, destination):
+        return True
+
+    try:
+        if os.path.getsize(source) != os.path.getsize(destination):
+            return False
+        return hash_file(source) == hash_file(destination)
+    except OSError:
+        return False
+
+
+def copy_file(source, destination):
+    shutil.copy(source, destination)
+
+
+def hardlink_file(source, destination):
+    os.link(source, destination)
+
+
+def symlink_file(source, destination):
+    os.symlink(os.path.abspath(source), destination)
+
+
+def reflink_file(source, destination):
+    if fcntl is None:
+        raise OSError('Reflinks are not supported on this platform')
+
+    with open(source, 'rb') as source_file, \
+            open(destination, 'wb') as destination_file:
+        fcntl.ioctl(destination_file.fileno(), FICLONE, source_file.fileno())
+    shutil.copymode(source, destination)
+
+
+def remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+LINKERS = {'copy': copy_file, 'hardlink': hardlink_file,
+           'reflink': reflink_file, 'symlink': symlink_file}
@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 
 BASE = os.path.abspath(os.path.dirname(__file__))
@@ -24,3 +25,34 @@ if HOME is not None:
             template_path = os.path.join(config_dir, 'EasyEuler/templates')
             CONFIGS.append(config_path)
             TEMPLATES.append(template_path)
+
+XDG_DATA_HOME = os.environ.get('XDG_DATA_HOME')
+if XDG_DATA_HOME is None:
+    if HOME is not None:
+        XDG_DATA_HOME = os.path.join(HOME, '.local/share')
+    else:
+        XDG_DATA_HOME = tempfile.gettempdir()
+
+USER_DATA = os.path.join(XDG_DATA_HOME, 'EasyEuler')
+HISTORY = os.path.join(USER_DATA, 'history.sqlite')
+
+XDG_CACHE_HOME = os.environ.get('XDG_CACHE_HOME')
+if XDG_CACHE_HOME is None:
+    if HOME is not None:
+        XDG_CACHE_HOME = os.path.join(HOME, '.cache')
+    else:
+        XDG_CACHE_HOME = tempfile.gettempdir()
+
+CACHE = os.path.join(XDG_CACHE_HOME, 'EasyEuler')
+RESULT_CACHE = os.path.join(CACHE, 'results')
+BUILD_CACHE = os.path.join(CACHE, 'builds')
+PROBLEM_INDEX = os.path.join(CACHE, 'problems.sqlite')
+CONFIG_SNAPSHOT = os.path.join(CACHE, 'config.json')
+TEMPLATE_CACHE = os.path.join(CACHE, 'templates')
+DESCRIPTION_CACHE = os.path.join(CACHE, 'descriptions')
+MANIFEST = os.path.join(CACHE, 'manifest.json')
+
+XDG_RUNTIME_DIR = os.environ.get('XDG_RUNTIME_DIR')
+RUNTIME = os.path.join(XDG_RUNTIME_DIR, 'EasyEuler') \
+    if XDG_RUNTIME_DIR is not None else CACHE
+SOCKET = os.path.join(RUNTIME, 'daemon.sock')
@@ -0,0 +1,522 @@
+import os
+import re
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+
+try:
+    import resource
+except ImportError:
+    # The resource module only exists on Unix-based platforms,
+    # so memory and CPU time can't be limited on this platform.
+    resource = None
+
+
+LIMITS = ('timeout', 'memory', 'cpu')
+
+# Errors that runtimes report when they fail to allocate memory.
+MEMORY_ERROR_REGEX = re.compile(br'^MemoryError\b|std::bad_alloc|'
+                                br'OutOfMemoryError|runtime: out of memory|'
+                                br'[Cc]annot allocate memory', re.MULTILINE)
+
+# A process whose peak memory usage came this close to the memory limit
+# is considered to have exceeded it when it fails.
+MEMORY_LIMIT_MARGIN = 0.9
+
+# The options of the shell's ulimit that set the resource limits, and
+# the units they take the values in. The shell applies them to itself
+# before executing the command (see get_limit_wrapper).
+ULIMIT_OPTIONS = {'RLIMIT_AS': ('-v', 1024), 'RLIMIT_CPU': ('-t', 1)}
+
+# The number of bytes read from a pipe at a time.
+CHUNK_SIZE = 65536
+
+
+class TailBuffer:
+    """
+    Keeps the last size bytes written to it (or everything, if size is
+    None), so output of any length can be captured in bounded memory.
+
+    """
+
+    def __init__(self, size=None):
+        self.size = size
+        self.truncated = False
+        self._data = bytearray()
+
+    def write(self, chunk):
+        self._data += chunk
+        if self.size is not None and len(self._data) > self.size:
+            # Deleting from the start of a bytearray doesn't move the
+            # rest of it, so this works like a ring buffer.
+            del self._data[:len(self._data) - self.size]
+            self.truncated = True
+
+    def getvalue(self):
+        return bytes(self._data)
+
+
+class HeadTailBuffer:
+    """
+    Keeps the first and last size / 2 bytes written to it (or everything,
+    if size is None), with a marker of how much was left out in between.
+
+    """
+
+    def __init__(self, size=None):
+        self.size = size
+        self._head = bytearray()
+        self._tail = TailBuffer(None if size is None else size - size // 2)
+        self._length = 0
+
+    @property
+    def truncated(self):
+        return self._tail.truncated
+
+    def write(self, chunk):
+        self._length += len(chunk)
+        if self.size is not None and len(self._head) < self.size // 2:
+            room = self.size // 2 - len(self._head)
+            self._head += chunk[:room]
+            chunk = chunk[room:]
+
+        if chunk:
+            self._tail.write(chunk)
+
+    def getvalue(self):
+        tail = self._tail.getvalue()
+        if not self.truncated:
+            return bytes(self._head) + tail
+
+        omitted = self._length - len(self._head) - len(tail)
+        return b'%s\n[... %d bytes omitted ...]\n%s' % (self._head, omitted,
+                                                        tail)
+
+
+def run_process(command, limits=None, output_limit=None, env=None):
+    """
+    Runs a command to completion, capturing its output. The command is
+    either a string, which is run by the shell, or a list of arguments,
+    which is executed directly.
+
+    Returns the completed process, the resource usage of the process
+    (including the processes it waited for) or None if that isn't
+    available on this platform, and the limit that was exceeded, if any.
+    Since the resource usage belongs to this process alone, it's accurate
+    even when other processes are running concurrently.
+
+    With an output limit (in bytes), only the end of stdout is kept,
+    along with the start and end of stderr, and the truncated attribute
+    of the completed process tells whether anything was left out.
+
+    The limits are a dictionary of a timeout and CPU time in seconds and
+    memory in megabytes, where a value of None means no limit. When the
+    timeout is exceeded, the process and every process it started are
+    killed.
+
+    The process runs in the environment env, or in the environment of
+    this process if env is None.
+
+    """
+
+    limits = get_set_limits(limits)
+
+    try:
+        pid, process, stdout_file, stderr_file = start_process(
+            command, limits, 'timeout' in limits, env)
+    except OSError as exception:
+        return get_failed_process(command, exception), None, None
+
+    timed_out = threading.Event()
+
+    if 'timeout' in limits:
+        timer = threading.Timer(limits['timeout'], kill_process,
+                                (pid, process, timed_out))
+        timer.start()
+    else:
+        timer = None
+
+    stdout, stderr = get_output_buffers(output_limit)
+
+    try:
+        read_pipes(stdout_file, stderr_file, stdout, stderr)
+        if hasattr(os, 'wait4'):
+            _, status, rusage = os.wait4(pid, 0)
+            returncode = get_returncode(status)
+
+            if process is not None:
+                # The process has been reaped by wait4, so it must not be
+                # waited for again by the Popen object.
+                process.returncode = returncode
+        else:
+            # wait4 only exists on Unix-based platforms.
+            returncode = process.wait()
+            rusage = None
+    finally:
+        if timer is not None:
+            timer.cancel()
+
+    completed_process = get_completed_process(command, returncode, stdout,
+                                              stderr)
+
+    if timed_out.is_set():
+        limit = 'timeout'
+    else:
+        limit = get_exceeded_limit(completed_process, rusage, limits)
+
+    return completed_process, rusage, limit
+
+
+async def run_process_async(command, limits=None, output_limit=None,
+                            env=None):
+    """
+    Runs a command like run_process, but without blocking the event
+    loop, so many commands can run concurrently in a single thread.
+
+    The process always gets its own process group, which is killed
+    along with every process in it if the timeout is exceeded or the
+    coroutine is cancelled.
+
+    """
+
+    # asyncio is only imported by the coroutines, which run in an event
+    # loop that has imported it already, so run_process doesn't load it.
+    import asyncio
+
+    limits = get_set_limits(limits)
+
+    try:
+        pid, process, stdout_file, stderr_file = start_process(
+            command, limits, True, env)
+    except OSError as exception:
+        return get_failed_process(command, exception), None, None
+
+    stdout, stderr = get_output_buffers(output_limit)
+    reading = asyncio.ensure_future(asyncio.gather(
+        read_pipe(stdout_file, stdout), read_pipe(stderr_file, stderr)))
+    waiting = asyncio.ensure_future(wait_process(pid))
+    timed_out = False
+
+    try:
+        try:
+            _, status, rusage = await asyncio.wait_for(
+                asyncio.shield(waiting), limits.get('timeout'))
+        except asyncio.TimeoutError:
+            timed_out = True
+            kill_process(pid, process)
+            _, status, rusage = await waiting
+        await reading
+    except asyncio.CancelledError:
+        kill_process(pid, process)
+        # Reap the process before giving up, so it isn't left a zombie.
+        # Its pipes are closed now that every process in its group has
+        # been killed, so reading them finishes as well.
+        await asyncio.gather(waiting, reading, return_exceptions=True)
+        raise
+
+    returncode = get_returncode(status)
+    if process is not None:
+        process.returncode = returncode
+
+    completed_process = get_completed_process(command, returncode, stdout,
+                                              stderr)
+
+    if timed_out:
+        limit = 'timeout'
+    else:
+        limit = get_exceeded_limit(completed_process, rusage, limits)
+
+    return completed_process, rusage, limit
+
+
+async def read_pipe(pipe, buffer):
+    """ Reads a pipe into a buffer until it's closed, without blocking. """
+
+    import asyncio
+
+    loop = asyncio.get_event_loop()
+    reader = asyncio.StreamReader()
+    transport, _ = await loop.connect_read_pipe(
+        lambda: asyncio.StreamReaderProtocol(reader), pipe)
+
+    try:
+        while True:
+            chunk = await reader.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            buffer.write(chunk)
+    finally:
+        transport.close()
+
+
+async def wait_process(pid):
+    """
+    Waits for a process to exit and reaps it with wait4, so its resource
+    usage is available. The process is watched through a pidfd where
+    that's supported, and otherwise waited for in another thread.
+
+    """
+
+    import asyncio
+
+    loop = asyncio.get_event_loop()
+
+    try:
+        pidfd = os.pidfd_open(pid)
+    except (AttributeError, OSError):
+        return await loop.run_in_executor(None, os.wait4, pid, 0)
+
+    exited = loop.create_future()
+    loop.add_reader(pidfd, lambda: exited.done() or exited.set_result(None))
+
+    try:
+        await exited
+    finally:
+        loop.remove_reader(pidfd)
+        os.close(pidfd)
+
+    return os.wait4(pid, 0)
+
+
+def start_process(command, limits, process_group=False, env=None):
+    """
+    Starts a command with stdout and stderr connected to pipes, in a new
+    process group if process_group is True. Returns the process ID, the
+    Popen object (if one was used) and the files to read stdout and
+    stderr from.
+
+    """
+
+    if isinstance(command, str) and os.name == 'posix':
+        # Popen would run the shell like this as well, but the command
+        # has to be a list of arguments to be spawned with posix_spawn
+        # and to have the limit wrapper put in front of it.
+        command = ['/bin/sh', '-c', command]
+
+    # The limits are applied before the command is executed, so neither
+    # it nor any process it starts can run without them.
+    rlimits = get_rlimits(limits)
+    if rlimits:
+        command = get_limit_wrapper(rlimits) + command
+
+    if not isinstance(command, str) and hasattr(os, 'posix_spawnp'):
+        pid, stdout_file, stderr_file = spawn_process(command, process_group,
+                                                      env)
+        process = None
+    else:
+        process = subprocess.Popen(command, shell=isinstance(command, str),
+                                   stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE,
+                                   start_new_session=process_group, env=env)
+        pid, stdout_file, stderr_file = \
+            process.pid, process.stdout, process.stderr
+
+    return pid, process, stdout_file, stderr_file
+
+
+def get_output_buffers(output_limit=None):
+    """
+    Makes the buffers that stdout and stderr are captured in. Only the
+    end of stdout is kept, since that's where the answer is, while the
+    start of stderr usually tells what went wrong and the end where.
+
+    """
+
+    return TailBuffer(output_limit), HeadTailBuffer(output_limit)
+
+
+def get_completed_process(command, returncode, stdout, stderr):
+    completed_process = subprocess.CompletedProcess(
+        command, returncode, stdout.getvalue(), stderr.getvalue())
+    completed_process.truncated = stdout.truncated or stderr.truncated
+    return completed_process
+
+
+def get_set_limits(limits):
+    """ Removes the limits that aren't set from a dictionary. """
+
+    return {key: value for key, value in (limits or {}).items()
+            if value is not None}
+
+
+def get_failed_process(command, exception):
+    """
+    Makes a completed process for a command that failed to start,
+    mimicking the exit codes of the shell when the command can't be
+    found or executed.
+
+    """
+
+    returncode = 127 if isinstance(exception, FileNotFoundError) else 126
+    stderr = bytes(str(exception), encoding='UTF-8')
+    completed_process = subprocess.CompletedProcess(command, returncode,
+                                                    b'', stderr)
+    completed_process.truncated = False
+    return completed_process
+
+
+def spawn_process(argv, process_group=False, env=None):
+    """
+    Starts a process with posix_spawn, which avoids copying the memory
+    of this process like fork does. Returns the process ID and the files
+    to read stdout and stderr of the process from.
+
+    """
+
+    stdout_read, stdout_write = os.pipe()
+    stderr_read, stderr_write = os.pipe()
+
+    # The pipes aren't inheritable, so only the duplicates
+    # of the write ends are left open in the process.
+    file_actions = [(os.POSIX_SPAWN_DUP2, stdout_write, 1),
+                    (os.POSIX_SPAWN_DUP2, stderr_write, 2)]
+
+    # posix_spawnp looks the executable up in the PATH of this process,
+    # so it's looked up in the PATH of the environment instead.
+    if env is None:
+        env, executable = os.environ, argv[0]
+    else:
+        executable = shutil.which(argv[0], path=env.get('PATH', os.defpath))
+        executable = executable or argv[0]
+
+    try:
+        kwargs = {'setpgroup': 0} if process_group else {}
+        pid = os.posix_spawnp(executable, argv, env,
+                              file_actions=file_actions, **kwargs)
+    except BaseException:
+        os.close(stdout_read)
+        os.close(stderr_read)
+        raise
+    finally:
+        os.close(stdout_write)
+        os.close(stderr_write)
+
+    return pid, os.fdopen(stdout_read, 'rb'), os.fdopen(stderr_read, 'rb')
+
+
+def read_pipes(stdout_file, stderr_file, stdout, stderr):
+    """
+    Reads stdout and stderr of a process into buffers until they're
+    closed. stderr is read in another thread, so neither pipe can fill
+    up and block the process while the other one is being read.
+
+    """
+
+    stderr_reader = threading.Thread(target=read_file,
+                                     args=(stderr_file, stderr))
+    stderr_reader.start()
+    read_file(stdout_file, stdout)
+    stderr_reader.join()
+
+
+def read_file(f, buffer):
+    with f:
+        for chunk in iter(lambda: f.read1(CHUNK_SIZE), b''):
+            buffer.write(chunk)
+
+
+def get_rlimits(limits):
+    """
+    Returns the names of the resource limits that apply the memory and
+    CPU time limits, along with their (soft, hard) values, or an empty
+    list if there's nothing to apply.
+
+    """
+
+    if resource is None:
+        return []
+
+    rlimits = []
+    if 'memory' in limits:
+        memory = int(limits['memory'] * 1024 * 1024)
+        rlimits.append(('RLIMIT_AS', (memory, memory)))
+    if 'cpu' in limits:
+        # The soft limit sends SIGXCPU, the hard limit SIGKILL
+        # in case the process ignores the former.
+        cpu = int(limits['cpu'] + 0.5) or 1
+        rlimits.append(('RLIMIT_CPU', (cpu, cpu + 1)))
+    return rlimits
+
+
+def get_limit_wrapper(rlimits):
+    """
+    Returns the arguments that run a command in a shell that applies the
+    resource limits to itself and then executes the command, so they
+    apply from its start. The shell starts much faster than anything
+    else that could apply them, so it barely adds to the timing.
+
+    """
+
+    settings = []
+    for name, (soft, hard) in rlimits:
+        option, unit = ULIMIT_OPTIONS[name]
+        # The soft limit is lowered first, since the hard limit can't
+        # be lowered below it.
+        settings += ['ulimit -S %s %d' % (option, soft // unit),
+                     'ulimit -H %s %d' % (option, hard // unit)]
+
+    return ['/bin/sh', '-c', ' && '.join(settings + ['exec "$@"']), 'sh']
+
+
+def kill_process(pid, process, killed=None):
+    if killed is not None:
+        killed.set()
+
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except AttributeError:
+        # Process groups only exist on Unix-based platforms.
+        process.kill()
+    except ProcessLookupError:
+        pass
+
+
+def get_exceeded_limit(process, rusage, limits):
+    if process.returncode == 0:
+        return None
+
+    # A signal is either reported directly, or by the shell
+    # as an exit code of 128 + the signal number.
+    if process.returncode < 0:
+        signal_number = -process.returncode
+    elif process.returncode > 128:
+        signal_number = process.returncode - 128
+    else:
+        signal_number = None
+
+    if 'cpu' in limits:
+        cpu_time = None
+        if rusage is not None:
+            cpu_time = rusage.ru_utime + rusage.ru_stime
+        if signal_number == getattr(signal, 'SIGXCPU', None) or \
+           (cpu_time is not None and cpu_time >= limits['cpu']):
+            return 'timeout'
+
+    if 'memory' in limits:
+        # A process that fails to allocate memory can crash like it would
+        # for any other reason, so it's only considered to have exceeded
+        # the limit if it reported a failed allocation or came close to
+        # the limit.
+        memory = limits['memory'] * 1024 * 1024
+        if MEMORY_ERROR_REGEX.search(process.stderr) or \
+           (rusage is not None and
+                get_peak_memory(rusage) >= memory * MEMORY_LIMIT_MARGIN):
+            return 'memory-limit'
+
+    return None
+
+
+def get_returncode(status):
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+def get_peak_memory(rusage):
+    """ Returns the peak resident set size of a process in bytes. """
+
+    if sys.platform == 'darwin':
+        return rusage.ru_maxrss
+    return rusage.ru_maxrss * 1024
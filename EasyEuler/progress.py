@@ -0,0 +1,72 @@
+import time
+
+import click
+
+
+class Progress:
+    """
+    A status line on stderr showing how many solutions are running,
+    have passed and have failed, along with an estimate of the time
+    left. It's only shown when stderr is a terminal.
+
+    """
+
+    def __init__(self, total, enabled=None):
+        self.total = total
+        self.running = 0
+        self.passed = 0
+        self.failed = 0
+        self.enabled = click.get_text_stream('stderr').isatty() \
+            if enabled is None else enabled
+        self._start_time = time.perf_counter()
+        self._line_length = 0
+
+    @property
+    def finished(self):
+        return self.passed + self.failed
+
+    def start(self):
+        self.running += 1
+        self.draw()
+
+    def finish(self, passed):
+        self.running -= 1
+        if passed:
+            self.passed += 1
+        else:
+            self.failed += 1
+        self.draw()
+
+    def get_eta(self):
+        """
+        Estimates the seconds left from the average time it took to
+        finish a solution so far, or returns None before any finished.
+
+        """
+
+        if self.finished == 0:
+            return None
+
+        elapsed_time = time.perf_counter() - self._start_time
+        return elapsed_time / self.finished * (self.total - self.finished)
+
+    def draw(self):
+        if not self.enabled:
+            return
+
+        eta = self.get_eta()
+        line = '[%d/%d] running: %d, passed: %d, failed: %d, ETA: %s' % (
+            self.finished, self.total, self.running, self.passed, self.failed,
+            '?' if eta is None else '%ds' % round(eta))
+
+        self.clear()
+        click.secho(line, nl=False, err=True, bold=True)
+        self._line_length = len(line)
+
+    def clear(self):
+        """ Removes the status line, so something else can be printed. """
+
+        if self.enabled and self._line_length > 0:
+            click.echo('\r%s\r' % (' ' * self._line_length), nl=False,
+                       err=True)
+            self._line_length = 0
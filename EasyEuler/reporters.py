@@ -0,0 +1,141 @@
+import json
+import re
+
+import click
+
+
+# Characters that can't appear in XML 1.0 documents, not even escaped.
+INVALID_XML_REGEX = re.compile('[^\t\n\r\x20-\ud7ff\ue000-\ufffd'
+                               '\U00010000-\U0010ffff]')
+
+
+class Reporter:
+    """
+    Writes records to stdout as soon as they're reported, so a run can be
+    followed while it's going and nothing but the current record has to
+    be kept in memory.
+
+    """
+
+    def start(self):
+        pass
+
+    def report(self, record):
+        raise NotImplementedError
+
+    def finish(self):
+        pass
+
+
+class JsonLinesReporter(Reporter):
+    def report(self, record):
+        click.echo(json.dumps(record))
+
+
+class JUnitReporter(Reporter):
+    """
+    Writes a JUnit XML test suite with a test case per solution. Since
+    the counts aren't known until the end, the suite has no attributes
+    for them, which JUnit consumers compute from the test cases anyway.
+
+    """
+
+    def start(self):
+        click.echo('<?xml version="1.0" encoding="UTF-8"?>')
+        click.echo('<testsuite name="EasyEuler">')
+
+    def report(self, record):
+        # xml.sax imports urllib and more, which only JUnit reports need.
+        from xml.sax.saxutils import escape, quoteattr
+
+        attributes = 'classname=%s name=%s' % (
+            quoteattr('problem %d' % record['problem']),
+            quoteattr(clean_xml(record['path'])))
+
+        execution_time = get_execution_time(record)
+        if execution_time is not None:
+            attributes += ' time="%f"' % execution_time['wall']
+
+        click.echo('  <testcase %s>' % attributes)
+
+        if record['error_stage'] is not None:
+            stage = record['stages'][record['error_stage']]
+            click.echo('    <error type=%s message=%s>%s</error>' % (
+                quoteattr(record['status']),
+                quoteattr('%s during %s' % (record['status'],
+                                            record['error_stage'])),
+                escape(clean_xml(stage['output']))))
+        elif not record['correct']:
+            click.echo('    <failure type="incorrect" '
+                       'message="incorrect answer">%s</failure>' %
+                       escape(clean_xml(
+                           record['stages']['execute']['output'])))
+
+        click.echo('  </testcase>')
+
+    def finish(self):
+        click.echo('</testsuite>')
+
+
+class TapReporter(Reporter):
+    """
+    Writes a TAP version 13 stream with a test point per solution, each
+    followed by a YAML block of details, and the plan at the end.
+
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def start(self):
+        click.echo('TAP version 13')
+
+    def report(self, record):
+        self.count += 1
+        passed = record['status'] == 'correct'
+        line = '%s %d - %s' % ('ok' if passed else 'not ok', self.count,
+                               record['path'])
+        if not passed:
+            line += ' # %s' % record['status']
+        click.echo(line)
+
+        # JSON strings and numbers are valid YAML scalars.
+        click.echo('  ---')
+        click.echo('  problem: %d' % record['problem'])
+        click.echo('  language: %s' % json.dumps(record['language']))
+        click.echo('  status: %s' % record['status'])
+        if record['error_stage'] is not None:
+            click.echo('  stage: %s' % record['error_stage'])
+            output = record['stages'][record['error_stage']]['output']
+        else:
+            output = record['stages']['execute']['output']
+        click.echo('  output: %s' % json.dumps(output))
+        if any(stage['truncated'] for stage in record['stages'].values()):
+            click.echo('  truncated: true')
+
+        execution_time = get_execution_time(record)
+        if execution_time is not None:
+            click.echo('  execution_time:')
+            for key, value in sorted(execution_time.items()):
+                click.echo('    %s: %s' % (key, json.dumps(value)))
+        click.echo('  ...')
+
+    def finish(self):
+        click.echo('1..%d' % self.count)
+
+
+def clean_xml(text):
+    """ Replaces the characters that are invalid in XML. """
+
+    return INVALID_XML_REGEX.sub('\ufffd', text)
+
+
+def get_execution_time(record):
+    stage = record['stages'].get(record['error_stage'] or 'execute')
+    if stage is None:
+        return None
+    return stage['execution_time']
+
+
+REPORTERS = {'jsonl': JsonLinesReporter, 'junit': JUnitReporter,
+             'tap': TapReporter}
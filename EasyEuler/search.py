@@ -0,0 +1,90 @@
+import collections
+import math
+import re
+
+
+TOKEN_REGEX = re.compile(r'[a-z0-9]+')
+TAG_REGEX = re.compile(r'<[^>]*>')
+
+# Words that are in nearly every description, so they don't tell
+# the problems apart and would only make the index larger.
+STOP_WORDS = frozenset((
+    'a', 'all', 'an', 'and', 'are', 'as', 'be', 'by', 'can', 'find', 'for',
+    'from', 'how', 'if', 'in', 'is', 'it', 'of', 'on', 'or', 'that', 'the',
+    'this', 'to', 'we', 'what', 'which', 'with'
+))
+
+# How much more an occurrence of a term in each field counts than one
+# in the description.
+FIELD_WEIGHTS = (('name', 3), ('resources', 2), ('description', 1))
+
+# The parameters of the Okapi BM25 ranking function.
+K1 = 1.2
+B = 0.75
+
+
+def tokenize(text):
+    """
+    Splits text into the terms that are indexed, ignoring markup, case
+    and stop words and treating plurals like the singular.
+
+    """
+
+    terms = []
+
+    for token in TOKEN_REGEX.findall(TAG_REGEX.sub(' ', text).lower()):
+        if token in STOP_WORDS:
+            continue
+        if len(token) > 3 and token.endswith('s') and \
+           not token.endswith('ss'):
+            token = token[:-1]
+        terms.append(token)
+
+    return terms
+
+
+def get_term_weights(problem):
+    """
+    Counts the terms of a problem, weighted by the fields they're in.
+    Returns the weights and the weighted length of the problem.
+
+    """
+
+    weights = collections.Counter()
+
+    for field, weight in FIELD_WEIGHTS:
+        value = problem.get(field) or ''
+        if isinstance(value, list):
+            value = ' '.join(value)
+
+        for term in tokenize(value):
+            weights[term] += weight
+
+    return weights, sum(weights.values())
+
+
+def score(postings, lengths, document_count, average_length):
+    """
+    Ranks problems with BM25, given the postings of every term in the
+    query (a list of {problem ID: weight} dictionaries) and the lengths
+    of the problems in them. Returns (problem ID, score) tuples, the
+    best match first.
+
+    """
+
+    scores = collections.Counter()
+
+    for term_postings in postings:
+        if not term_postings:
+            continue
+
+        frequency = len(term_postings)
+        idf = math.log(1 + (document_count - frequency + 0.5) /
+                       (frequency + 0.5))
+
+        for problem_id, weight in term_postings.items():
+            normalization = 1 - B + B * lengths[problem_id] / average_length
+            scores[problem_id] += idf * weight * (K1 + 1) / \
+                (weight + K1 * normalization)
+
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
@@ -0,0 +1,221 @@
+import importlib
+import io
+import json
+import os
+import socket
+import sys
+import traceback
+
+import click
+
+from EasyEuler import data, paths
+from EasyEuler.cli import COMMANDS, DAEMON_COMMANDS
+
+
+class MessageWriter(io.TextIOBase):
+    """
+    A text stream that sends everything written to it to a client as
+    messages, so the output of a command is streamed as it's written.
+
+    """
+
+    def __init__(self, connection, stream):
+        self.connection = connection
+        self.stream = stream
+
+    def write(self, text):
+        send_message(self.connection, {self.stream: text})
+        return len(text)
+
+    def writable(self):
+        return True
+
+    def isatty(self):
+        return False
+
+
+class Server:
+    """
+    Runs commands for clients connecting to a Unix socket, one at a
+    time, in a process that keeps the problem data, the configuration,
+    the templates and a pool of workers loaded between them.
+
+    Every request and response is a JSON object on its own line.
+    A request has the command and its arguments, the working directory
+    and the environment of the client, whether to use colors and what to
+    read from stdin. Solutions run in the environment of the client.
+    The responses are the output of the command, as {"stdout": text}
+    and {"stderr": text}, followed by {"exit": exit code}. A request
+    for the command "stop" stops the server.
+
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._socket = None
+        self._config_sources = None
+        self._worker_pool = None
+
+    def start(self):
+        """
+        Starts listening on the socket, replacing a stale socket file.
+        Raises OSError if a server is already listening on it.
+
+        """
+
+        if is_listening(self.path):
+            raise OSError('A daemon is already running at %s' % self.path)
+
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.bind(self.path)
+        # Anyone who can connect can run commands as this user.
+        os.chmod(self.path, 0o600)
+        self._socket.listen()
+
+        self._load()
+
+    def serve(self):
+        """ Handles requests until a client stops the server. """
+
+        while True:
+            connection, _ = self._socket.accept()
+            with connection:
+                try:
+                    request = json.loads(
+                        connection.makefile(encoding='UTF-8').readline())
+                except ValueError:
+                    continue
+
+                if request.get('command') == 'stop':
+                    send_message(connection, {'exit': 0})
+                    return
+
+                try:
+                    exit_code = self.run(connection, request)
+                    send_message(connection, {'exit': exit_code})
+                except OSError:
+                    # The client went away.
+                    pass
+
+    def run(self, connection, request):
+        """
+        Runs the command of a request in the client's working directory,
+        sending its output to the client. Returns the exit code.
+
+        """
+
+        command = request.get('command')
+        if command not in DAEMON_COMMANDS:
+            send_message(connection, {'stderr': 'The daemon does not run '
+                                                '%s\n' % command})
+            return 2
+
+        from EasyEuler.commands import verify
+
+        self._refresh_config()
+
+        streams = sys.stdin, sys.stdout, sys.stderr
+        directory = os.getcwd()
+        sys.stdin = io.StringIO(request.get('stdin') or '')
+        sys.stdout = MessageWriter(connection, 'stdout')
+        sys.stderr = MessageWriter(connection, 'stderr')
+
+        verify.environment = request.get('environment')
+
+        try:
+            os.chdir(request.get('directory', directory))
+            return run_command(command, request.get('arguments', []),
+                               request.get('color'))
+        finally:
+            os.chdir(directory)
+            verify.environment = None
+            sys.stdin, sys.stdout, sys.stderr = streams
+
+    def close(self):
+        if self._worker_pool is not None:
+            self._worker_pool.close()
+        if self._socket is not None:
+            self._socket.close()
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+    def _load(self):
+        """ Loads everything the commands need ahead of the requests. """
+
+        from EasyEuler.commands import verify
+        from EasyEuler.workers import WorkerPool
+
+        for command in DAEMON_COMMANDS:
+            importlib.import_module(COMMANDS[command])
+
+        self._worker_pool = verify.shared_worker_pool = WorkerPool()
+        self._config_sources = get_config_sources()
+        # Merges the configuration and checks the problem index.
+        data.config.get_language('extension', None)
+        data.problems.get(1)
+        data.get_templates()
+
+    def _refresh_config(self):
+        """ Loads the configuration again if any file of it changed. """
+
+        config_sources = get_config_sources()
+        if config_sources != self._config_sources:
+            data.config = data.load_config()
+            self._config_sources = config_sources
+
+
+def run_command(command, arguments, color=None):
+    """
+    Runs a command like the CLI would, but returns the exit code instead
+    of exiting, and writes errors to stderr.
+
+    """
+
+    cli = importlib.import_module(COMMANDS[command]).cli
+
+    try:
+        cli.main(list(arguments), prog_name='easyeuler %s' % command,
+                 standalone_mode=False, color=color)
+    except click.exceptions.Exit as exception:
+        return exception.exit_code
+    except click.ClickException as exception:
+        exception.show()
+        return exception.exit_code
+    except click.Abort:
+        click.echo('Aborted!', err=True)
+        return 1
+    except SystemExit as exception:
+        if exception.code is None or isinstance(exception.code, int):
+            return exception.code or 0
+        click.echo(exception.code, err=True)
+        return 1
+    except Exception:
+        traceback.print_exc()
+        return 1
+    return 0
+
+
+def get_config_sources():
+    return data.ConfigSnapshot(paths.CONFIG_SNAPSHOT,
+                               paths.CONFIGS).get_sources()
+
+
+def is_listening(path):
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(path)
+    except OSError:
+        return False
+    return True
+
+
+def send_message(connection, message):
+    connection.sendall((json.dumps(message) + '\n').encode('UTF-8'))
+
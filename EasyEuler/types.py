@@ -21,6 +21,71 @@ class ProblemType(click.ParamType):
         return problem
 
 
+class RangeType(click.ParamType):
+    """
+    A list of (start, end) ranges of integers, specified as comma-separated
+    integers and/or ranges of integers, e.g. 1-10,15,20-25.
+
+    """
+
+    name = 'range'
+    item_name = 'integer'
+
+    def convert(self, value, param, ctx):
+        if value is None or isinstance(value, list):
+            return value
+
+        ranges = []
+
+        for part in value.split(','):
+            start, _, end = part.strip().partition('-')
+
+            try:
+                start = int(start)
+                end = int(end) if end else start
+            except ValueError:
+                self.fail('%s is not a valid %s or range of %ss' %
+                          (part, self.item_name, self.item_name), param, ctx)
+
+            if end < start:
+                self.fail('%s is not a valid range of %ss' %
+                          (part, self.item_name), param, ctx)
+
+            ranges.append((start, end))
+
+        return ranges
+
+
+class ProblemRangeType(RangeType):
+    """
+    A list of problems, specified as comma-separated problem IDs
+    and/or ranges of problem IDs, e.g. 1-10,15,20-25.
+
+    """
+
+    item_name = 'problem ID'
+
+    def convert(self, value, param, ctx):
+        if value is None or isinstance(value, list):
+            return value
+
+        problem_ids = []
+
+        for start, end in super().convert(value, param, ctx):
+            problem_ids.extend(range(start, end + 1))
+
+        problems = []
+
+        for problem_id in dict.fromkeys(problem_ids):
+            problem = data.problems.get(problem_id)
+            if problem is None:
+                self.fail('A problem with ID %s does not exist' % problem_id,
+                          param, ctx)
+            problems.append(problem)
+
+        return problems
+
+
 class LanguageType(click.ParamType):
     name = 'string'
 
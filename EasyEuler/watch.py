@@ -0,0 +1,170 @@
+import ctypes
+import os
+import select
+import struct
+import sys
+import time
+
+
+# The inotify events of a file being written and closed, or being moved
+# into a directory, which is how many editors save files.
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO
+
+# The fixed part of struct inotify_event, which is followed by the name.
+EVENT = struct.Struct('iIII')
+
+# Changes are collected until there are none for this many seconds, so
+# a burst of saves is reported at once.
+DEBOUNCE_TIME = 0.1
+
+# How often the polling watcher looks for changes, in seconds.
+POLL_INTERVAL = 0.5
+
+
+class InotifyWatcher:
+    """
+    Watches directories for files that are written or moved into them,
+    using inotify through libc. Raises OSError if inotify isn't available,
+    which it only is on Linux.
+
+    """
+
+    def __init__(self, directories):
+        if not sys.platform.startswith('linux'):
+            raise OSError('inotify is only available on Linux')
+
+        libc = ctypes.CDLL(None, use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError('inotify is not available')
+
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'Could not initialize inotify')
+
+        self._directories = {}
+        for directory in directories:
+            watch_descriptor = libc.inotify_add_watch(
+                self._fd, os.fsencode(directory), WATCH_MASK)
+            if watch_descriptor < 0:
+                error = ctypes.get_errno()
+                self.close()
+                raise OSError(error, 'Could not watch %s' % directory)
+            self._directories[watch_descriptor] = directory
+
+    def read(self, timeout=None):
+        """
+        Waits up to timeout seconds (or until there are changes, if
+        timeout is None) and returns the paths of the files that changed.
+
+        """
+
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+
+        try:
+            events = os.read(self._fd, 65536)
+        except BlockingIOError:
+            return set()
+
+        changed = set()
+        offset = 0
+        while offset < len(events):
+            watch_descriptor, _, _, length = EVENT.unpack_from(events, offset)
+            offset += EVENT.size
+            name = events[offset:offset + length].rstrip(b'\0')
+            offset += length
+
+            directory = self._directories.get(watch_descriptor)
+            if directory is not None and name:
+                changed.add(os.path.join(directory, os.fsdecode(name)))
+
+        return changed
+
+    def close(self):
+        os.close(self._fd)
+
+
+class PollingWatcher:
+    """
+    Watches directories for files that changed by comparing their
+    modification times and sizes every interval seconds, for platforms
+    without inotify.
+
+    """
+
+    def __init__(self, directories, interval=POLL_INTERVAL):
+        self.directories = directories
+        self.interval = interval
+        self._files = self._scan()
+
+    def read(self, timeout=None):
+        """ Works like InotifyWatcher.read. """
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            delay = self.interval if deadline is None else \
+                min(self.interval, max(deadline - time.monotonic(), 0))
+            time.sleep(delay)
+
+            files = self._scan()
+            changed = {path for path, record in files.items()
+                       if self._files.get(path) != record}
+            self._files = files
+
+            if changed or (deadline is not None and
+                           time.monotonic() >= deadline):
+                return changed
+
+    def close(self):
+        pass
+
+    def _scan(self):
+        files = {}
+
+        for directory in self.directories:
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+
+            for entry in entries:
+                try:
+                    if entry.is_file():
+                        stat = entry.stat()
+                        files[entry.path] = (stat.st_mtime_ns, stat.st_size)
+                except OSError:
+                    continue
+
+        return files
+
+
+def get_watcher(directories):
+    """ Watches the directories with inotify, or by polling them. """
+
+    try:
+        return InotifyWatcher(directories)
+    except OSError:
+        return PollingWatcher(directories)
+
+
+def watch_changes(watcher, debounce_time=DEBOUNCE_TIME):
+    """
+    Generates the sets of files that changed, each once there have been
+    no more changes for debounce_time seconds.
+
+    """
+
+    while True:
+        changed = watcher.read()
+        while changed:
+            more_changed = watcher.read(debounce_time)
+            if not more_changed:
+                break
+            changed |= more_changed
+
+        if changed:
+            yield changed
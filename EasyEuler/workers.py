@@ -0,0 +1,304 @@
+import json
+import os
+import shlex
+import shutil
+import subprocess
+import threading
+import time
+
+
+# The program run by a worker. It runs the solutions it receives on
+# stdin in the worker's own interpreter and responds on stdout with
+# their output and how long they took, excluding interpreter startup.
+WORKER_SOURCE = r'''
+import json
+import os
+import runpy
+import sys
+import tempfile
+import time
+import traceback
+
+requests = os.fdopen(os.dup(0), 'r')
+responses = os.fdopen(os.dup(1), 'w')
+
+# Solutions must not be able to read or write the requests and
+# responses, not even through the file descriptors directly.
+devnull = os.open(os.devnull, os.O_RDWR)
+os.dup2(devnull, 0)
+os.dup2(devnull, 1)
+sys.stdin = open(os.devnull)
+
+# The output of a solution is captured from the file descriptors, so
+# it's captured however it's written, like it is from a process.
+captures = {1: tempfile.TemporaryFile(), 2: tempfile.TemporaryFile()}
+
+
+def read_capture(capture, limit, keep_head):
+    # The output is bounded like it is for processes (see
+    # get_output_buffers in EasyEuler.process): only the end of stdout
+    # is kept, and the start and end of stderr, with a marker of what
+    # was left out in between.
+    size = capture.seek(0, os.SEEK_END)
+    capture.seek(0)
+    if limit is None or size <= limit:
+        return capture.read(), False
+
+    head = capture.read(limit // 2) if keep_head else b''
+    tail_size = limit - limit // 2 if keep_head else limit
+    capture.seek(size - tail_size)
+    tail = capture.read()
+    if not keep_head:
+        return tail, True
+
+    omitted = size - len(head) - len(tail)
+    return b'%s\n[... %d bytes omitted ...]\n%s' % (head, omitted,
+                                                    tail), True
+
+
+def restore_namespace(namespace, snapshot):
+    # The names are restored one at a time, since clearing the namespace
+    # of builtins would leave any code run in between without them.
+    for name in [name for name in namespace if name not in snapshot]:
+        del namespace[name]
+    for name, value in snapshot.items():
+        if namespace.get(name, restore_namespace) is not value:
+            namespace[name] = value
+
+
+# The namespaces of the modules that are loaded, including builtins and
+# sys with its hooks and streams, so whatever a solution assigns in them
+# can be undone. This program runs as __main__, which solutions can't
+# reach, since they're run in a module of their own.
+base_modules = dict(sys.modules)
+base_namespaces = [(vars(module), dict(vars(module)))
+                   for name, module in base_modules.items()
+                   if name != '__main__' and hasattr(module, '__dict__')]
+base_path = list(sys.path)
+base_recursion_limit = sys.getrecursionlimit()
+base_directory = os.getcwd()
+base_environment = dict(os.environ)
+
+responses.write('ready\n')
+responses.flush()
+
+for request in requests:
+    request = json.loads(request)
+    path = request['path']
+    for fd, capture in captures.items():
+        capture.seek(0)
+        capture.truncate()
+        os.dup2(capture.fileno(), fd)
+    sys.stdout = open(1, 'w', encoding='UTF-8', closefd=False)
+    sys.stderr = open(2, 'w', encoding='UTF-8', closefd=False)
+    sys.argv = [path]
+    sys.path = [os.path.dirname(os.path.abspath(path))] + base_path
+    error = False
+
+    start_times = os.times()
+    start_time = time.perf_counter()
+    try:
+        os.chdir(request.get('directory', base_directory))
+        os.environ.clear()
+        os.environ.update(request.get('environment') or base_environment)
+        runpy.run_path(path, run_name='__main__')
+    except SystemExit as exception:
+        if exception.code not in (None, 0):
+            error = True
+            if not isinstance(exception.code, int):
+                print(exception.code, file=sys.stderr)
+    except BaseException:
+        error = True
+        traceback.print_exc()
+    wall_time = time.perf_counter() - start_time
+    end_times = os.times()
+
+    # Undo what the solution may have changed, so it can't affect
+    # the solutions run after it.
+    for stream in (sys.stdout, sys.stderr):
+        try:
+            stream.flush()
+        except (OSError, ValueError):
+            pass
+    for module in set(sys.modules) - set(base_modules):
+        del sys.modules[module]
+    sys.modules.update(base_modules)
+    for namespace, snapshot in base_namespaces:
+        restore_namespace(namespace, snapshot)
+    output = {}
+    truncated = False
+    for fd, capture in captures.items():
+        os.dup2(devnull, fd)
+        captured, capture_truncated = read_capture(
+            capture, request.get('output limit'), keep_head=fd == 2)
+        output[fd] = captured.decode('UTF-8', errors='replace')
+        truncated = truncated or capture_truncated
+    sys.setrecursionlimit(base_recursion_limit)
+    os.chdir(base_directory)
+    os.environ.clear()
+    os.environ.update(base_environment)
+
+    user_time = end_times.user - start_times.user
+    system_time = end_times.system - start_times.system
+    responses.write(json.dumps({
+        'stdout': output[1], 'stderr': output[2], 'truncated': truncated,
+        'error': error, 'wall': wall_time, 'user': user_time,
+        'system': system_time
+    }) + '\n')
+    responses.flush()
+'''
+
+
+class Worker:
+    """ A long-lived interpreter process that runs solutions. """
+
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+
+        start_time = time.perf_counter()
+        self._process = subprocess.Popen(
+            [interpreter, '-c', WORKER_SOURCE], stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            universal_newlines=True)
+
+        if self._process.stdout.readline() != 'ready\n':
+            self.close()
+            raise OSError('%s could not start a worker' % interpreter)
+        self.startup_time = time.perf_counter() - start_time
+
+    def run(self, path, timeout=None, environment=None, output_limit=None):
+        """
+        Runs a solution and returns the response of the worker, or None
+        if it didn't respond within timeout seconds. The worker must not
+        be used again if it didn't respond.
+
+        The solution runs in the environment, or in the environment the
+        worker was started in if it's None. Its output is bounded by the
+        output limit like the output of run_process.
+
+        """
+
+        # Solutions run in the current directory, which may have changed
+        # since the worker was started.
+        request = {'path': os.path.abspath(path), 'directory': os.getcwd(),
+                   'environment': environment, 'output limit': output_limit}
+        self._process.stdin.write(json.dumps(request) + '\n')
+        self._process.stdin.flush()
+
+        response = []
+        reader = threading.Thread(
+            target=lambda: response.append(self._process.stdout.readline()))
+        reader.start()
+        reader.join(timeout)
+
+        if not response:
+            return None
+        if not response[0]:
+            # The solution made the worker exit.
+            return {'stdout': '', 'stderr': 'The worker exited unexpectedly',
+                    'truncated': False, 'error': True, 'wall': 0, 'user': 0,
+                    'system': 0, 'exited': True}
+        return json.loads(response[0])
+
+    def close(self):
+        self._process.kill()
+        self._process.wait()
+        self._process.stdin.close()
+        self._process.stdout.close()
+
+
+class WorkerPool:
+    """
+    A pool of workers that are started on demand and kept running, so
+    solutions don't have to wait for an interpreter to start up.
+
+    The pool is safe to use from multiple threads. It starts as many
+    workers per interpreter as there are threads using it at once.
+
+    """
+
+    def __init__(self):
+        self._idle_workers = {}
+        self._startup_times = {}
+        self._lock = threading.Lock()
+
+    def execute(self, language, path, timeout=None, environment=None,
+                output_limit=None):
+        """
+        Executes a solution in a worker for the interpreter of the
+        language, returning a result like the execute stage does.
+
+        """
+
+        interpreter = get_interpreter(language)
+        if environment is not None:
+            # A virtualenv in the environment has its own interpreter.
+            interpreter = shutil.which(
+                interpreter, path=environment.get('PATH', os.defpath)) or \
+                interpreter
+        worker = self._acquire(interpreter)
+        response = worker.run(path, timeout, environment, output_limit)
+
+        if response is None:
+            # The worker is stuck running the solution.
+            worker.close()
+            return {'output': '', 'error': True, 'limit': 'timeout',
+                    'execution_time': {'wall': timeout}}
+
+        if response.get('exited', False):
+            worker.close()
+        else:
+            self._release(worker)
+
+        if response['error']:
+            output = response['stderr']
+        else:
+            output = response['stdout'].rstrip()
+
+        execution_time = {key: response[key]
+                          for key in ('user', 'system', 'wall')}
+        execution_time['total'] = response['user'] + response['system']
+        execution_time['startup'] = self.get_startup_time(interpreter)
+        return {'output': output, 'error': response['error'],
+                'execution_time': execution_time,
+                'truncated': response['truncated']}
+
+    def get_startup_time(self, interpreter):
+        """ Returns the mean time it took the workers to start up. """
+
+        startup_times = self._startup_times.get(interpreter, [0])
+        return sum(startup_times) / len(startup_times)
+
+    def close(self):
+        with self._lock:
+            for workers in self._idle_workers.values():
+                for worker in workers:
+                    worker.close()
+            self._idle_workers.clear()
+
+    def _acquire(self, interpreter):
+        with self._lock:
+            workers = self._idle_workers.get(interpreter)
+            if workers:
+                return workers.pop()
+
+        worker = Worker(interpreter)
+        with self._lock:
+            self._startup_times.setdefault(interpreter, []).append(
+                worker.startup_time)
+        return worker
+
+    def _release(self, worker):
+        with self._lock:
+            workers = self._idle_workers.setdefault(worker.interpreter, [])
+            workers.append(worker)
+
+
+def get_interpreter(language):
+    """ Returns the interpreter in the execute command of a language. """
+
+    return shlex.split(language['execute'])[0]
+
+
+def supports_workers(language):
+    return language.get('worker') == 'python' and 'execute' in language
@@ -0,0 +1,49 @@
+import os
+import tempfile
+import unittest
+
+from EasyEuler.answers import AnswerIndex, build_answer_index, check_answer
+
+
+PROBLEMS = [{'id': 1, 'answer': '233168'}, {'id': 2},
+            {'id': 4, 'answer': '906609'}]
+
+
+class TestAnswerIndex(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'answers.idx')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_check_answers(self):
+        count = build_answer_index(PROBLEMS, self.path, iterations=10)
+        answers = AnswerIndex(self.path)
+
+        self.assertEqual(count, 2)
+        self.assertEqual(len(answers), 4)
+        self.assertTrue(check_answer('233168', answers.get(1)))
+        self.assertFalse(check_answer('233169', answers.get(1)))
+        self.assertTrue(check_answer('906609', answers.get(4)))
+        for problem_id in (0, 2, 3, 5):
+            self.assertIsNone(answers.get(problem_id))
+
+        with open(self.path, 'rb') as f:
+            self.assertNotIn(b'233168', f.read())
+
+    def test_salted_digests(self):
+        build_answer_index([{'id': 1, 'answer': '1'},
+                            {'id': 2, 'answer': '1'}],
+                           self.path, iterations=10)
+        answers = AnswerIndex(self.path)
+
+        self.assertNotEqual(answers.get(1), answers.get(2))
+
+    def test_invalid_index(self):
+        build_answer_index(PROBLEMS, self.path, iterations=10)
+        with open(self.path, 'r+b') as f:
+            f.truncate(os.path.getsize(self.path) - 1)
+
+        with self.assertRaises(ValueError):
+            AnswerIndex(self.path)
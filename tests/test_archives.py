@@ -0,0 +1,111 @@
+import io
+import os
+import re
+import tarfile
+import tempfile
+import unittest
+import zipfile
+
+from EasyEuler.archives import ArchiveExtractor, normalize_name
+
+
+FILENAME_REGEX = re.compile(r'euler_(?P<id>\d+)\.(?P<extension>c|py)$')
+
+FILES = {'solutions/euler_001.c': '#include "lib/a.h"\n',
+         'solutions/lib/a.h': '#include "b.h"\n',
+         'solutions/lib/b.h': '',
+         'solutions/lib/unused.h': '',
+         'solutions/euler_002.py': '',
+         'solutions/notes.txt': '',
+         'node_modules/euler_003.py': '',
+         'skipped/euler_004.py': '',
+         '../euler_005.py': ''}
+
+
+class TestNormalizeName(unittest.TestCase):
+    def test_names(self):
+        self.assertEqual(normalize_name('./a/b/../c.py'), 'a/c.py')
+        self.assertEqual(normalize_name('/a.py'), 'a.py')
+        self.assertIsNone(normalize_name('../a.py'))
+        self.assertIsNone(normalize_name('a/../../a.py'))
+
+
+class TestArchiveExtractor(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.extractor = ArchiveExtractor()
+
+    def tearDown(self):
+        self.extractor.close()
+        self.directory.cleanup()
+
+    def write_tar(self):
+        path = os.path.join(self.directory.name, 'solutions.tar.gz')
+        with tarfile.open(path, 'w:gz') as archive:
+            for name, content in FILES.items():
+                info = tarfile.TarInfo(name)
+                info.size = len(content)
+                archive.addfile(info, io.BytesIO(content.encode()))
+        return path
+
+    def write_zip(self):
+        path = os.path.join(self.directory.name, 'solutions.zip')
+        with zipfile.ZipFile(path, 'w') as archive:
+            for name, content in FILES.items():
+                archive.writestr(name, content)
+        return path
+
+    def assert_extracted(self, path):
+        solutions = list(self.extractor.extract_solutions(
+            path, FILENAME_REGEX, ['skipped/']))
+
+        self.assertEqual([self.extractor.names[solution_path]
+                          for solution_path, _ in solutions],
+                         ['%s:solutions/euler_001.c' % path,
+                          '%s:solutions/euler_002.py' % path])
+
+        directory = os.path.dirname(solutions[0][0])
+        extracted = {os.path.relpath(os.path.join(root, filename), directory)
+                     for root, _, filenames in os.walk(directory)
+                     for filename in filenames}
+        self.assertEqual(extracted, {'euler_001.c', 'euler_002.py',
+                                     os.path.join('lib', 'a.h'),
+                                     os.path.join('lib', 'b.h')})
+
+    def test_tar(self):
+        self.assert_extracted(self.write_tar())
+
+    def test_zip(self):
+        self.assert_extracted(self.write_zip())
+
+    def test_file_size_limit(self):
+        path = self.write_zip()
+        self.extractor.max_file_size = 8
+
+        # solutions/lib/a.h is the largest file, with 15 bytes.
+        with self.assertRaises(ValueError):
+            list(self.extractor.extract_solutions(path, FILENAME_REGEX))
+
+    def test_total_size_limit(self):
+        path = self.write_zip()
+        self.extractor.max_total_size = 20
+
+        with self.assertRaises(ValueError):
+            for _ in range(2):
+                list(self.extractor.extract_solutions(path, FILENAME_REGEX))
+
+    def test_close(self):
+        solutions = list(self.extractor.extract_solutions(
+            self.write_zip(), FILENAME_REGEX))
+        self.extractor.close()
+
+        self.assertFalse(os.path.exists(solutions[0][0]))
+
+    def test_invalid_archive(self):
+        path = os.path.join(self.directory.name, 'invalid.zip')
+        with open(path, 'w') as f:
+            f.write('not an archive')
+
+        with self.assertRaises(ValueError):
+            list(self.extractor.extract_solutions(path, FILENAME_REGEX))
+
@@ -0,0 +1,40 @@
+import io
+import unittest
+
+from EasyEuler.benchmark import export_csv, get_percentile, summarize
+
+
+class TestSummarize(unittest.TestCase):
+    def test_summarize(self):
+        statistics = summarize([4, 1, 3, 2])
+
+        self.assertEqual(statistics['min'], 1)
+        self.assertEqual(statistics['max'], 4)
+        self.assertEqual(statistics['median'], 2.5)
+        self.assertEqual(statistics['mean'], 2.5)
+        self.assertAlmostEqual(statistics['stddev'], 1.2909944)
+
+    def test_single_sample(self):
+        statistics = summarize([5])
+
+        self.assertEqual(statistics['p99'], 5)
+        self.assertEqual(statistics['stddev'], 0)
+
+    def test_percentile(self):
+        self.assertEqual(get_percentile([0, 10], 0.9), 9)
+        self.assertEqual(get_percentile(list(range(101)), 0.95), 95)
+
+
+class TestExport(unittest.TestCase):
+    def test_export_csv(self):
+        benchmarks = [{'path': 'euler_001.py', 'problem': 1,
+                       'language': 'python', 'correct': True,
+                       'error': 'none', 'runs': [{'wall': 1}, {'wall': 2}],
+                       'statistics': {'wall': summarize([1, 2])}}]
+        f = io.StringIO()
+        export_csv(benchmarks, f)
+        lines = f.getvalue().splitlines()
+
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[1].startswith('euler_001.py,1,python,True,'
+                                            'none,2,wall,1,1.5'))
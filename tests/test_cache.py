@@ -0,0 +1,49 @@
+import os
+import tempfile
+import unittest
+
+from EasyEuler.cache import FileCache, hash_values
+
+
+class TestFileCache(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache = FileCache(directory.name, max_entries=2)
+
+    def test_get_and_set(self):
+        self.cache.set('foo', {'bar': 1})
+
+        self.assertEqual(self.cache.get('foo'), {'bar': 1})
+        self.assertIsNone(self.cache.get('baz'))
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_evict_least_recently_used(self):
+        for timestamp, key in enumerate(('a', 'b', 'c'), 1000):
+            self.cache.set(key, key)
+            path = os.path.join(self.cache.directory, '%s.json' % key)
+            os.utime(path, (timestamp, timestamp))
+
+        self.cache.get('a')
+        self.cache.evict()
+
+        self.assertEqual(self.cache.get('a'), 'a')
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual(self.cache.get('c'), 'c')
+
+    def test_stats(self):
+        self.cache.set('foo', 'bar')
+        self.cache.get('foo')
+        self.cache.save_stats()
+        self.cache.get('baz')
+
+        stats = self.cache.get_stats()
+        self.assertEqual(stats['entries'], 1)
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+
+class TestHashValues(unittest.TestCase):
+    def test_hash_values(self):
+        self.assertEqual(hash_values('a', {'b': 1}),
+                         hash_values('a', {'b': 1}))
+        self.assertNotEqual(hash_values('a', 'b'), hash_values('ab'))
@@ -1,16 +1,96 @@
+import asyncio
+import glob
+import importlib
+import json
 import os
+import subprocess
+import sys
+import tempfile
+import time
 import unittest
+import xml.etree.ElementTree
+import zipfile
+from unittest import mock
 
 from click.testing import CliRunner
 
 from EasyEuler import data, paths
-from EasyEuler.cli import cli
+from EasyEuler.cli import COMMANDS, SHORT_HELP, cli
+from EasyEuler.commands import verify
+from EasyEuler.history import History
 
 
 class CommandTestCase(unittest.TestCase):
     def setUp(self):
         self.runner = CliRunner()
 
+        # Keep the caches of the tests away from the user's caches.
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        patcher = mock.patch.multiple(
+            paths, RESULT_CACHE=os.path.join(cache_dir.name, 'results'),
+            BUILD_CACHE=os.path.join(cache_dir.name, 'builds'),
+            TEMPLATE_CACHE=os.path.join(cache_dir.name, 'templates'),
+            DESCRIPTION_CACHE=os.path.join(cache_dir.name, 'descriptions'),
+            HISTORY=os.path.join(cache_dir.name, 'history.sqlite'),
+            MANIFEST=os.path.join(cache_dir.name, 'manifest.json'),
+            SOCKET=os.path.join(cache_dir.name, 'daemon.sock'))
+        # The template environment holds on to the template cache, the
+        # problem database to the problem index and the configuration to
+        # the configuration snapshot.
+        templates_patcher = mock.patch.object(data, '_templates', None)
+        templates_patcher.start()
+        self.addCleanup(templates_patcher.stop)
+        problems_patcher = mock.patch.object(
+            data, 'problems', data.ProblemDatabase(
+                paths.PROBLEMS, os.path.join(cache_dir.name, 'problems')))
+        problems_patcher.start()
+        self.addCleanup(problems_patcher.stop)
+        config_patcher = mock.patch.multiple(
+            data.config, _merged_config=None, _snapshot=data.ConfigSnapshot(
+                os.path.join(cache_dir.name, 'config.json'), paths.CONFIGS))
+        config_patcher.start()
+        self.addCleanup(config_patcher.stop)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class TestCommandLineInterface(CommandTestCase):
+    # The total time in seconds that imports may take when showing the
+    # help message. Most of it is spent importing click.
+    IMPORT_TIME_BUDGET = 0.5
+
+    def test_help_import_time(self):
+        process = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c',
+             'from EasyEuler.cli import cli; cli(["--help"])'],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            cwd=os.path.dirname(paths.BASE))
+        import_times = {}
+
+        for line in str(process.stderr, encoding='UTF-8').splitlines():
+            if not line.startswith('import time:') or 'self [us]' in line:
+                continue
+            self_time, _, module = line[len('import time:'):].split('|')
+            import_times[module.strip()] = int(self_time) / 1e6
+
+        self.assertEqual(process.returncode, 0)
+        self.assertIn('verify', str(process.stdout, encoding='UTF-8'))
+        self.assertNotIn('jinja2', import_times)
+        self.assertNotIn('tabulate', import_times)
+        self.assertFalse([module for module in import_times
+                          if module.startswith('EasyEuler.commands.')])
+        self.assertLess(sum(import_times.values()), self.IMPORT_TIME_BUDGET)
+
+    def test_short_help(self):
+        for name in COMMANDS:
+            command = importlib.import_module(COMMANDS[name]).cli
+            self.assertEqual(SHORT_HELP[name], command.get_short_help_str())
+
+    def test_unknown_command(self):
+        result = self.runner.invoke(cli, ['generate_resources'])
+        self.assertEqual(result.exit_code, 2)
+
 
 class TestCreateCommand(CommandTestCase):
     def test_file_creation(self):
@@ -37,6 +117,11 @@ class TestCreateCommand(CommandTestCase):
 
             self.assertTrue(os.path.getsize('euler_001.py') > 0)
 
+    def test_compiled_templates_cached(self):
+        with self.runner.isolated_filesystem():
+            self.runner.invoke(cli, ['create', '1', 'c'])
+            self.assertTrue(os.listdir(paths.TEMPLATE_CACHE))
+
     def test_path(self):
         with self.runner.isolated_filesystem():
             self.runner.invoke(cli, ['create', '--path', 'test.py',
@@ -48,6 +133,214 @@ class TestCreateCommand(CommandTestCase):
         result = self.runner.invoke(cli, ['create', '0'])
         self.assertEqual(result.exit_code, 2)
 
+    def test_batch_creation(self):
+        with self.runner.isolated_filesystem():
+            result = self.runner.invoke(cli, ['create', '1-3,5',
+                                              'python', 'c'])
+
+            for problem_id in (1, 2, 3, 5):
+                self.assertTrue(os.path.exists('euler_%03d.py' % problem_id))
+                self.assertTrue(os.path.exists('euler_%03d.c' % problem_id))
+            self.assertFalse(os.path.exists('euler_004.py'))
+            self.assertIn('Created 8 files, skipped 0 existing files',
+                          result.output)
+
+    def test_batch_creation_in_directory(self):
+        with self.runner.isolated_filesystem():
+            self.runner.invoke(cli, ['create', '--path', 'problems', '1,2'])
+
+            self.assertTrue(os.path.exists('problems/euler_001.py'))
+            self.assertTrue(os.path.exists('problems/euler_002.py'))
+
+    def test_batch_conflicts(self):
+        with self.runner.isolated_filesystem():
+            open('euler_001.py', 'a').close()
+            skipped = self.runner.invoke(cli, ['create', '--skip-existing',
+                                               '1-2'])
+            self.assertEqual(os.path.getsize('euler_001.py'), 0)
+            self.assertIn('Created 1 file, skipped 1 existing file\n',
+                          skipped.output)
+
+            self.runner.invoke(cli, ['create', '--overwrite', '1-2'])
+            self.assertTrue(os.path.getsize('euler_001.py') > 0)
+
+    def test_batch_resources(self):
+        with self.runner.isolated_filesystem():
+            declined = self.runner.invoke(cli, ['create', '--path', 'first',
+                                                '20-22'], input='n\n')
+            self.assertFalse(os.path.exists('first/names.txt'))
+
+            result = self.runner.invoke(cli, ['create', '--path', 'second',
+                                              '20-22'], input='y\n')
+
+            self.assertEqual(declined.exit_code, 0)
+            self.assertIn('for the 1 problem that references them',
+                          declined.output)
+            self.assertEqual(result.exit_code, 0)
+            self.assertTrue(os.path.exists('second/euler_022.py'))
+            for resource in data.problems[22]['resources']:
+                self.assertTrue(os.path.exists(
+                    os.path.join('second', resource)))
+
+    def test_batch_resources_without_prompts(self):
+        with self.runner.isolated_filesystem():
+            skipped = self.runner.invoke(cli, ['create', '--skip-existing',
+                                               '--path', 'first', '20-22'])
+            self.assertFalse(os.path.exists('first/names.txt'))
+
+            result = self.runner.invoke(cli, ['create', '--skip-existing',
+                                              '--resources', '--path',
+                                              'second', '20-22'])
+
+            self.assertEqual(skipped.exit_code, 0)
+            self.assertNotIn('Generate resources', skipped.output)
+            self.assertEqual(result.exit_code, 0)
+            self.assertTrue(os.path.exists('second/names.txt'))
+
+    def test_invalid_range(self):
+        result = self.runner.invoke(cli, ['create', '5-3'])
+        self.assertEqual(result.exit_code, 2)
+
+
+class TestListCommand(CommandTestCase):
+    def test_plain_format(self):
+        result = self.runner.invoke(cli, ['list', '--format', 'plain',
+                                          '--range', '1-5', '--limit', '2',
+                                          '--offset', '1'])
+        rows = [row.split('\t') for row in result.output.splitlines()]
+
+        self.assertEqual([int(row[0]) for row in rows], [2, 3])
+        self.assertEqual(rows[0][1], data.problems[2]['name'])
+
+    def test_solved(self):
+        history = History(paths.HISTORY)
+        history.record('euler_002.py', 'python', 2, None, 'correct')
+        history.record('euler_003.py', 'python', 3, None, 'incorrect')
+        history.close()
+
+        solved = self.runner.invoke(cli, ['list', '-f', 'plain', '--solved'])
+        unsolved = self.runner.invoke(cli, ['list', '-f', 'plain',
+                                            '--unsolved', '-r', '1-3'])
+
+        self.assertEqual(solved.output.split('\t')[0], '2')
+        self.assertEqual([row.split('\t')[0] for row
+                          in unsolved.output.splitlines()], ['1', '3'])
+
+    def test_invalid_difficulty(self):
+        result = self.runner.invoke(cli, ['list', '--difficulty', '50-5'])
+        self.assertEqual(result.exit_code, 2)
+
+
+class TestSearchCommand(CommandTestCase):
+    def test_search(self):
+        problem = data.problems[22]
+        result = self.runner.invoke(cli, ['search', problem['resources'][0]])
+
+        self.assertIn(problem['name'], result.output.splitlines()[0])
+
+    def test_no_results(self):
+        result = self.runner.invoke(cli, ['search', 'xyzzy'])
+        self.assertIn('No problems match xyzzy', result.output)
+
+
+class TestShowCommand(CommandTestCase):
+    def test_show(self):
+        result = self.runner.invoke(cli, ['show', '1'])
+
+        self.assertIn('Problem 1: %s' % data.problems[1]['name'],
+                      result.output)
+        self.assertIn(data.problems[1]['description'], result.output)
+
+    def test_cached_description(self):
+        first = self.runner.invoke(cli, ['show', '1'])
+
+        with mock.patch.object(data, 'get_templates') as get_templates:
+            second = self.runner.invoke(cli, ['show', '1'])
+
+        self.assertEqual(first.output, second.output)
+        self.assertFalse(get_templates.called)
+
+    def test_cache_invalidated_by_templates(self):
+        self.runner.invoke(cli, ['show', '1'])
+
+        with mock.patch.object(data, 'get_template_signature',
+                               return_value=['changed']), \
+             mock.patch.object(data, 'get_templates',
+                               wraps=data.get_templates) as get_templates:
+            self.runner.invoke(cli, ['show', '1'])
+
+        self.assertTrue(get_templates.called)
+
+
+class TestServeCommand(CommandTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        environment = dict(os.environ, XDG_CACHE_HOME=self.directory.name,
+                           XDG_DATA_HOME=self.directory.name)
+        environment.pop('EASYEULER_NO_DAEMON', None)
+
+        self.server = subprocess.Popen(
+            [sys.executable, '-c', 'from EasyEuler.cli import cli; cli()',
+             'serve', '--socket', paths.SOCKET],
+            stdout=subprocess.PIPE, cwd=os.path.dirname(paths.BASE),
+            env=environment)
+        self.addCleanup(self.stop_server)
+        # The daemon prints a line once it's listening.
+        self.server.stdout.readline()
+
+    def stop_server(self):
+        if self.server.poll() is None:
+            self.server.kill()
+        self.server.wait()
+        self.server.stdout.close()
+
+    def test_forward_to_daemon(self):
+        with self.runner.isolated_filesystem():
+            with open('euler_001.py', 'w') as f:
+                f.write('import os\nprint(os.environ["ANSWER"])')
+
+            with mock.patch.dict(os.environ, ANSWER='client'):
+                os.environ.pop('EASYEULER_NO_DAEMON', None)
+                result = self.runner.invoke(cli, ['verify', 'euler_001.py'])
+                warm_result = self.runner.invoke(cli, ['verify', '--warm',
+                                                       'euler_001.py'])
+                missing_result = self.runner.invoke(cli, ['verify',
+                                                          'euler_002.py'])
+
+            # The solution ran in the daemon, which keeps its results in
+            # its own cache, but in the environment of the client.
+            self.assertTrue(os.path.isdir(os.path.join(
+                self.directory.name, 'EasyEuler', 'results')))
+            self.assertEqual(result.exit_code, 0)
+            self.assertIn('Checking output of euler_001.py: client',
+                          result.output)
+            self.assertIn('Checking output of euler_001.py: client',
+                          warm_result.output)
+            self.assertEqual(missing_result.exit_code, 2)
+            self.assertIn('does not exist', missing_result.output)
+
+    def test_forward_create_with_answers(self):
+        with self.runner.isolated_filesystem():
+            with mock.patch.dict(os.environ):
+                os.environ.pop('EASYEULER_NO_DAEMON', None)
+                result = self.runner.invoke(cli, ['create', '22'],
+                                            input='y\n.\n')
+
+            self.assertEqual(result.exit_code, 0)
+            self.assertTrue(os.path.exists('euler_022.py'))
+            self.assertTrue(os.path.exists('names.txt'))
+
+    def test_stop(self):
+        result = self.runner.invoke(cli, ['serve', '--stop',
+                                          '--socket', paths.SOCKET])
+
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(self.server.wait(5), 0)
+        self.assertFalse(os.path.exists(paths.SOCKET))
+
 
 class TestGenerateResourcesCommand(CommandTestCase):
     def test_generate_problem_resources(self):
@@ -66,6 +359,144 @@ class TestGenerateResourcesCommand(CommandTestCase):
         result = self.runner.invoke(cli, ['generate-resources', '1'])
         self.assertEqual(result.exit_code, 1)
 
+    def test_link_resources(self):
+        for method in ('hardlink', 'symlink', 'reflink'):
+            with self.runner.isolated_filesystem():
+                result = self.runner.invoke(
+                    cli, ['generate-resources', '--link', method, '22'])
+
+                self.assertEqual(result.exit_code, 0)
+                with open('names.txt') as f, \
+                        open(os.path.join(paths.RESOURCES, 'names.txt')) as r:
+                    self.assertEqual(f.read(), r.read())
+
+    def test_hardlink_resources(self):
+        with self.runner.isolated_filesystem():
+            self.runner.invoke(cli, ['generate-resources', '--link',
+                                     'hardlink', '22'])
+
+            self.assertTrue(os.path.samefile(
+                'names.txt', os.path.join(paths.RESOURCES, 'names.txt')))
+
+    def test_skip_identical_resources(self):
+        with self.runner.isolated_filesystem():
+            self.runner.invoke(cli, ['generate-resources', '--path', 'res'])
+            result = self.runner.invoke(cli, ['generate-resources',
+                                              '--path', 'res'])
+
+            self.assertEqual(result.exit_code, 0)
+            self.assertNotIn('overwrite', result.output)
+            self.assertIn('Created 0 files, skipped 0 existing files and '
+                          '%d identical files' %
+                          len(os.listdir(paths.RESOURCES)), result.output)
+
+    def test_resource_conflicts(self):
+        with self.runner.isolated_filesystem():
+            with open('names.txt', 'w') as f:
+                f.write('changed')
+
+            self.runner.invoke(cli, ['generate-resources', '--skip-existing',
+                                     '22'])
+            with open('names.txt') as f:
+                self.assertEqual(f.read(), 'changed')
+
+            self.runner.invoke(cli, ['generate-resources', '--overwrite',
+                                     '22'])
+            with open('names.txt') as f:
+                self.assertNotEqual(f.read(), 'changed')
+
+    def test_linked_resource_is_up_to_date(self):
+        with self.runner.isolated_filesystem():
+            self.runner.invoke(cli, ['generate-resources', '--link',
+                                     'symlink', '22'])
+            result = self.runner.invoke(cli, ['generate-resources', '22'])
+
+            self.assertIn('names.txt is up to date', result.output)
+            self.assertTrue(os.path.islink('names.txt'))
+
+    def test_copied_resource_is_linked(self):
+        with self.runner.isolated_filesystem():
+            self.runner.invoke(cli, ['generate-resources', '22'])
+            result = self.runner.invoke(cli, ['generate-resources', '--link',
+                                              'symlink', '22'])
+
+            self.assertEqual(result.exit_code, 0)
+            self.assertNotIn('overwrite', result.output)
+            self.assertTrue(os.path.islink('names.txt'))
+
+
+class TestGenerateIndexCommand(CommandTestCase):
+    def test_generate_index(self):
+        result = self.runner.invoke(cli, ['generate-index'])
+
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn('Indexed %d problems' % len(data.problems),
+                      result.output)
+
+    def test_verify_with_answer_index(self):
+        with self.runner.isolated_filesystem():
+            self.runner.invoke(cli, ['generate-index', '--answers',
+                                     'answers.idx'])
+            with open('euler_001.py', 'w') as f:
+                f.write('print(%s)' % data.problems[1]['answer'])
+            with open('euler_002.py', 'w') as f:
+                f.write('print(0)')
+
+            with mock.patch.object(data, 'problems', None):
+                result = self.runner.invoke(cli, [
+                    'verify', '--no-cache', '--no-history', '--answers',
+                    'answers.idx', 'euler_001.py', 'euler_002.py'])
+
+            self.assertEqual(result.exit_code, 0)
+            self.assertIn('1 correct, 1 incorrect', result.output)
+
+
+class TestHistoryCommand(CommandTestCase):
+    def record_runs(self, *wall_times):
+        history = History(paths.HISTORY)
+        for wall_time in wall_times:
+            history.record('euler_001.py', 'python', 1, None, 'correct',
+                           {'wall': wall_time})
+        history.close()
+
+    def test_verify_records_history(self):
+        with self.runner.isolated_filesystem():
+            with open('euler_001.py', 'w') as f:
+                f.write('print(%s)' % data.problems[1]['answer'])
+
+            self.runner.invoke(cli, ['verify', 'euler_001.py'])
+            self.runner.invoke(cli, ['verify', '--no-history', '--no-cache',
+                                     'euler_001.py'])
+            result = self.runner.invoke(cli, ['history'])
+
+            self.assertIn('Problem 1 (python)', result.output)
+            self.assertEqual(result.output.count('correct'), 1)
+
+    def test_regression(self):
+        self.record_runs(1.0, 1.5)
+        result = self.runner.invoke(cli, ['history', '--fail-on-regression'])
+
+        self.assertIn('[50.0% slower]', result.output)
+        self.assertEqual(result.exit_code, 1)
+
+    def test_no_regression(self):
+        self.record_runs(1.0, 1.05)
+        result = self.runner.invoke(cli, ['history', '--fail-on-regression'])
+
+        self.assertNotIn('slower', result.output)
+        self.assertEqual(result.exit_code, 0)
+
+    def test_regression_compared_to_median(self):
+        # The run before the last one was unusually fast, but compared to
+        # the median of the runs before it, the last one isn't slower.
+        self.record_runs(1.0, 1.1, 1.0, 1.05, 0.8, 1.05)
+        result = self.runner.invoke(cli, ['history', '--fail-on-regression'])
+        narrow = self.runner.invoke(cli, ['history', '--window', '1'])
+
+        self.assertEqual(result.exit_code, 0)
+        self.assertNotIn('slower', result.output)
+        self.assertIn('[31.2% slower]', narrow.output)
+
 
 class TestVerifyCommand(CommandTestCase):
     def test_problem_verification_with_execution_only(self):
@@ -102,6 +533,29 @@ class TestVerifyCommand(CommandTestCase):
             self.assertIn(problem['answer'], output)
             self.assertFalse(os.path.exists('euler_001.c.out'))
 
+    def test_cached_build(self):
+        problem = data.problems[1]
+        with self.runner.isolated_filesystem():
+            with open('euler_001.c', 'w') as f:
+                f.write('#include <stdio.h>\n'
+                        'int main(void) { printf("%s"); return 0; }\n' %
+                        problem['answer'])
+
+            self.runner.invoke(cli, ['verify', 'euler_001.c'])
+            os.rename('euler_001.c', 'euler_001_copy.c')
+
+            with mock.patch('EasyEuler.commands.verify.execute_process',
+                            wraps=verify.execute_process) as execute_process:
+                result = self.runner.invoke(cli, ['verify',
+                                                  'euler_001_copy.c'])
+                build_calls = [call for call in execute_process.call_args_list
+                               if call[0][0].startswith('gcc')]
+
+            self.assertIn(problem['answer'], result.output)
+            self.assertEqual(build_calls, [])
+            self.assertFalse(os.path.exists('euler_001_copy.c.out'))
+            self.assertEqual(len(os.listdir(paths.BUILD_CACHE)), 1)
+
     def test_recursive_verification(self):
         with self.runner.isolated_filesystem():
             os.mkdir('test')
@@ -116,6 +570,438 @@ class TestVerifyCommand(CommandTestCase):
 
             self.assertIn(problem['answer'], output)
 
+    def test_parallel_verification_order(self):
+        with self.runner.isolated_filesystem():
+            os.mkdir('test')
+
+            for problem_id in range(1, 6):
+                with open('test/euler_%03d.py' % problem_id, 'w') as f:
+                    f.write('print(%s)' % data.problems[problem_id]['answer'])
+
+            result = self.runner.invoke(cli, ['verify', '--recursive',
+                                              '--jobs', '4', 'test'])
+            output = str(result.output_bytes, encoding='UTF-8')
+            positions = [output.index('euler_%03d.py' % problem_id)
+                         for problem_id in range(1, 6)]
+
+            self.assertEqual(positions, sorted(positions))
+            self.assertIn('5 correct, 0 incorrect, 0 errors', output)
+
+    def test_summary_of_one_error(self):
+        with self.runner.isolated_filesystem():
+            with open('euler_001.py', 'w') as f:
+                f.write('print(%s)' % data.problems[1]['answer'])
+            with open('euler_002.py', 'w') as f:
+                f.write('raise SystemExit(1)')
+
+            result = self.runner.invoke(cli, ['verify', 'euler_001.py',
+                                              'euler_002.py'])
+
+            self.assertIn('1 correct, 0 incorrect, 1 error\n', result.output)
+
+    def test_cached_verification(self):
+        with self.runner.isolated_filesystem():
+            with open('euler_001.py', 'w') as f:
+                f.write('print(%s)' % data.problems[1]['answer'])
+
+            first = self.runner.invoke(cli, ['verify', '--time',
+                                             'euler_001.py'])
+            second = self.runner.invoke(cli, ['verify', '--time',
+                                              '--cache-stats', 'euler_001.py'])
+            uncached = self.runner.invoke(cli, ['verify', '--time',
+                                                '--no-cache', 'euler_001.py'])
+
+            self.assertNotIn('(cached)', first.output)
+            self.assertIn('(cached)', second.output)
+            self.assertIn('Cached results: 1', second.output)
+            self.assertIn('Hits: 1, misses: 1', second.output)
+            self.assertNotIn('(cached)', uncached.output)
+
+    def test_cache_invalidated_by_changes(self):
+        with self.runner.isolated_filesystem():
+            with open('euler_001.py', 'w') as f:
+                f.write('print(12345)')
+            self.runner.invoke(cli, ['verify', 'euler_001.py'])
+
+            with open('euler_001.py', 'w') as f:
+                f.write('print(%s)' % data.problems[1]['answer'])
+            result = self.runner.invoke(cli, ['verify', 'euler_001.py'])
+
+            self.assertIn(data.problems[1]['answer'], result.output)
+
+    def test_cache_invalidated_by_included_files(self):
+        with self.runner.isolated_filesystem():
+            with open('euler_001.c', 'w') as f:
+                f.write('#include <stdio.h>\n#include "answer.h"\n'
+                        'int main(void) { printf("%d", ANSWER); '
+                        'return 0; }\n')
+            with open('answer.h', 'w') as f:
+                f.write('#define ANSWER 12345\n')
+            self.runner.invoke(cli, ['verify', 'euler_001.c'])
+
+            with open('answer.h', 'w') as f:
+                f.write('#define ANSWER %s\n' % data.problems[1]['answer'])
+            result = self.runner.invoke(cli, ['verify', 'euler_001.c'])
+
+            self.assertIn('Checking output of euler_001.c: %s' %
+                          data.problems[1]['answer'], result.output)
+
+    def test_cache_invalidated_by_limits(self):
+        with self.runner.isolated_filesystem():
+            with open('euler_001.py', 'w') as f:
+                f.write('import time\ntime.sleep(1)\nprint(%s)' %
+                        data.problems[1]['answer'])
+            self.runner.invoke(cli, ['verify', 'euler_001.py'])
+            result = self.runner.invoke(cli, ['verify', '--timeout', '0.2',
+                                              'euler_001.py'])
+
+            self.assertIn('[timeout during execute]', result.output)
+
+    def test_errors_not_cached(self):
+        with self.runner.isolated_filesystem():
+            with open('euler_001.py', 'w') as f:
+                f.write('raise SystemExit(1)')
+            self.runner.invoke(cli, ['verify', 'euler_001.py'])
+            result = self.runner.invoke(cli, ['verify', '--cache-stats',
+                                              'euler_001.py'])
+
+            self.assertIn('Cached results: 0', result.output)
+
+    def test_benchmark(self):
+        problem = data.problems[1]
+        with self.runner.isolated_filesystem():
+            with open('euler_001.py', 'w') as f:
+                f.write('print(%s)' % problem['answer'])
+
+            result = self.runner.invoke(cli, ['verify', '--bench',
+                                              '--repeat', '3', '--export',
+                                              'bench.json', 'euler_001.py'])
+
+            with open('bench.json') as f:
+                benchmarks = json.load(f)
+
+            self.assertIn(problem['answer'], result.output)
+            self.assertIn('median', result.output)
+            self.assertEqual(len(benchmarks), 1)
+            self.assertEqual(len(benchmarks[0]['runs']), 3)
+            self.assertTrue(benchmarks[0]['correct'])
+            self.assertIn('wall', benchmarks[0]['statistics'])
+
+    def test_timeout(self):
+        with self.runner.isolated_filesystem():
+            with open('euler_001.py', 'w') as f:
+                f.write('import time\ntime.sleep(10)')
+
+            result = self.runner.invoke(cli, ['verify', '--timeout', '0.5',
+                                              '--time', 'euler_001.py'])
+
+            self.assertIn('[timeout during execute]', result.output)
+            self.assertIn('Wall time', result.output)
+
+    def test_cpu_limit(self):
+        with self.runner.isolated_filesystem():
+            with open('euler_001.py', 'w') as f:
+                f.write('while True: pass')
+
+            result = self.runner.invoke(cli, ['verify', '--cpu-limit', '1',
+                                              'euler_001.py'])
+
+            self.assertIn('[timeout during execute]', result.output)
+
+    def test_memory_limit(self):
+        with self.runner.isolated_filesystem():
+            with open('euler_001.py', 'w') as f:
+                f.write('print(len(bytearray(2 ** 32)))')
+
+            result = self.runner.invoke(cli, ['verify', '--memory-limit',
+                                              '256', 'euler_001.py'])
+
+            self.assertIn('[memory-limit during execute]', result.output)
+
+    def test_direct_exec_mode(self):
+        problem = data.problems[1]
+        with self.runner.isolated_filesystem():
+            os.mkdir('with space')
+            with open('with space/euler_001.c', 'w') as f:
+                f.write('#include <stdio.h>\n'
+                        'int main(void) { printf("%s"); return 0; }\n' %
+                        problem['answer'])
+
+            result = self.runner.invoke(cli, ['verify', '--exec-mode',
+                                              'direct', '--time', '--timeout',
+                                              '10', 'with space/euler_001.c'])
+
+            self.assertIn(problem['answer'], result.output)
+            self.assertIn('Wall time', result.output)
+            self.assertFalse(os.path.exists('with space/euler_001.c.out'))
+
+    def test_direct_exec_mode_missing_command(self):
+        with self.runner.isolated_filesystem():
+            open('euler_001.foo', 'w').close()
+            result = self.runner.invoke(cli, ['verify', '--exec-mode',
+                                              'direct', 'euler_001.foo'])
+
+            self.assertIn('[error during execute]', result.output)
+
+    def test_warm_workers(self):
+        problems = [data.problems[1], data.problems[2]]
+        with self.runner.isolated_filesystem():
+            for problem in problems:
+                with open('euler_%03d.py' % problem['id'], 'w') as f:
+                    f.write('import sys\n'
+                            'print(%s)\n' % problem['answer'])
+
+            result = self.runner.invoke(cli, ['verify', '--warm', '--time',
+                                              'euler_001.py', 'euler_002.py'])
+
+            for problem in problems:
+                self.assertIn(problem['answer'], result.output)
+            self.assertIn('(solution only)', result.output)
+            self.assertIn('Wall time with startup', result.output)
+            self.assertIn('2 correct', result.output)
+
+    def test_warm_worker_errors(self):
+        with self.runner.isolated_filesystem():
+            with open('euler_001.py', 'w') as f:
+                f.write('raise ValueError("bad")\n')
+            with open('euler_002.py', 'w') as f:
+                f.write('import os\nos._exit(0)\n')
+
+            result = self.runner.invoke(cli, ['verify', '--warm', '--errors',
+                                              'euler_001.py', 'euler_002.py'])
+
+            self.assertIn('ValueError: bad', result.output)
+            self.assertIn('The worker exited unexpectedly', result.output)
+
+    def test_warm_worker_output_from_file_descriptors(self):
+        problems = [data.problems[1], data.problems[2]]
+        with self.runner.isolated_filesystem():
+            with open('euler_001.py', 'w') as f:
+                f.write('import sys\nsys.stdout.buffer.write(b"%s\\n")\n' %
+                        problems[0]['answer'])
+            with open('euler_002.py', 'w') as f:
+                f.write('import os\nos.write(1, b"%s\\n")\n' %
+                        problems[1]['answer'])
+
+            result = self.runner.invoke(cli, ['verify', '--warm', '--jobs',
+                                              '1', 'euler_001.py',
+                                              'euler_002.py'])
+
+            self.assertIn('2 correct', result.output)
+
+    def test_warm_worker_restores_state(self):
+        problems = [data.problems[1], data.problems[2]]
+        with self.runner.isolated_filesystem():
+            with open('euler_001.py', 'w') as f:
+                f.write('import builtins, json, sys\n'
+                        'print(%s)\n'
+                        'builtins.print = lambda *args, **kwargs: None\n'
+                        'json.dumps = None\n'
+                        'sys.displayhook = None\n' % problems[0]['answer'])
+            with open('euler_002.py', 'w') as f:
+                f.write('print(%s)\n' % problems[1]['answer'])
+
+            result = self.runner.invoke(cli, ['verify', '--warm', '--jobs',
+                                              '1', 'euler_001.py',
+                                              'euler_002.py'])
+
+            self.assertIn('2 correct', result.output)
+
+    def test_warm_worker_fallback(self):
+        with self.runner.isolated_filesystem():
+            with open('euler_001.py', 'w') as f:
+                f.write('print(%s)' % data.problems[1]['answer'])
+
+            with mock.patch('EasyEuler.workers.Worker',
+                            side_effect=FileNotFoundError):
+                result = self.runner.invoke(cli, ['verify', '--warm',
+                                                  'euler_001.py'])
+
+            self.assertEqual(result.exit_code, 0)
+            self.assertIn('Checking output of euler_001.py: %s' %
+                          data.problems[1]['answer'], result.output)
+
+    def test_jsonl_format(self):
+        problem = data.problems[1]
+        with self.runner.isolated_filesystem():
+            with open('euler_001.py', 'w') as f:
+                f.write('print(%s)\n' % problem['answer'])
+            with open('euler_002.py', 'w') as f:
+                f.write('print(')
+            open('solution.py', 'w').close()
+
+            result = self.runner.invoke(cli, ['verify', '--format', 'jsonl',
+                                              'euler_001.py', 'euler_002.py',
+                                              'solution.py'])
+            records = {record['path']: record for record in
+                       map(json.loads, result.stdout.splitlines())}
+
+            self.assertEqual(set(records), {'euler_001.py', 'euler_002.py'})
+            self.assertIn('Skipping solution.py', result.stderr)
+            self.assertEqual(records['euler_001.py']['status'], 'correct')
+            self.assertIsInstance(records['euler_001.py']['stages']['execute']
+                                  ['execution_time']['wall'], float)
+            self.assertEqual(records['euler_002.py']['error_stage'],
+                             'execute')
+            self.assertIn('SyntaxError', records['euler_002.py']['stages']
+                          ['execute']['output'])
+
+    def test_tap_format(self):
+        problem = data.problems[1]
+        with self.runner.isolated_filesystem():
+            with open('euler_001.py', 'w') as f:
+                f.write('print(%s)\n' % problem['answer'])
+            with open('euler_002.py', 'w') as f:
+                f.write('print(0)\n')
+
+            result = self.runner.invoke(cli, ['verify', '--format', 'tap',
+                                              'euler_001.py', 'euler_002.py'])
+            lines = result.output.splitlines()
+
+            self.assertEqual(lines[0], 'TAP version 13')
+            self.assertEqual(lines[-1], '1..2')
+            self.assertIn('ok', [line.split(' ')[0] for line in lines])
+            self.assertTrue(any(line.startswith('not ok') and
+                                line.endswith('euler_002.py # incorrect')
+                                for line in lines))
+
+    def test_junit_format(self):
+        with self.runner.isolated_filesystem():
+            with open('euler_001.py', 'w') as f:
+                f.write('print("<&>\\x1b[0m\\x00")\n')
+
+            result = self.runner.invoke(cli, ['verify', '--format', 'junit',
+                                              'euler_001.py'])
+            suite = xml.etree.ElementTree.fromstring(result.output)
+
+            self.assertEqual(suite.tag, 'testsuite')
+            testcase = suite.find('testcase')
+            self.assertEqual(testcase.get('name'), 'euler_001.py')
+            # Control characters are invalid in XML, even when escaped.
+            self.assertEqual(testcase.find('failure').text,
+                             '<&>\ufffd[0m\ufffd')
+
+    def test_changed_files(self):
+        problems = [data.problems[1], data.problems[2]]
+        with self.runner.isolated_filesystem():
+            for problem in problems:
+                with open('euler_%03d.c' % problem['id'], 'w') as f:
+                    f.write('#include <stdio.h>\n#include "answer.h"\n'
+                            'int main(void) { printf("%s"); return 0; }\n' %
+                            problem['answer'])
+            with open('answer.h', 'w') as f:
+                f.write('/* shared */\n')
+
+            first = self.runner.invoke(cli, ['verify', '--changed',
+                                             'euler_001.c', 'euler_002.c'])
+            unchanged = self.runner.invoke(cli, ['verify', '--changed',
+                                                 'euler_001.c', 'euler_002.c'])
+            with open('euler_001.c', 'a') as f:
+                f.write('\n')
+            one_changed = self.runner.invoke(cli, ['verify', '--changed',
+                                                   'euler_001.c',
+                                                   'euler_002.c'])
+            with open('answer.h', 'a') as f:
+                f.write('\n')
+            include_changed = self.runner.invoke(cli, ['verify', '--changed',
+                                                       'euler_001.c',
+                                                       'euler_002.c'])
+
+            self.assertEqual(first.output.count('Checking output'), 2)
+            self.assertNotIn('Checking output', unchanged.output)
+            self.assertIn('Skipped 2 unchanged files', unchanged.output)
+            self.assertIn('euler_001.c', one_changed.output)
+            self.assertNotIn('euler_002.c', one_changed.output)
+            self.assertEqual(include_changed.output.count('Checking output'),
+                             2)
+
+    def test_changed_since_revision(self):
+        problem = data.problems[1]
+        with self.runner.isolated_filesystem():
+            git = ['git', '-c', 'user.name=test', '-c', 'user.email=test']
+            subprocess.run(git + ['init', '-q'], check=True)
+            for problem_id in (1, 2):
+                with open('euler_%03d.py' % problem_id, 'w') as f:
+                    f.write('print(%s)\n' % problem['answer'])
+            subprocess.run(git + ['add', '.'], check=True)
+            subprocess.run(git + ['commit', '-q', '-m', 'Add'], check=True)
+            with open('euler_002.py', 'a') as f:
+                f.write('\n')
+            open('euler_003.py', 'w').close()
+
+            solutions = ['euler_001.py', 'euler_002.py', 'euler_003.py']
+            result = self.runner.invoke(cli, ['verify', '--since', 'HEAD'] +
+                                        solutions)
+            invalid = self.runner.invoke(cli, ['verify', '--since',
+                                               'nothing'] + solutions)
+
+            self.assertNotIn('euler_001.py', result.output)
+            self.assertIn('euler_002.py', result.output)
+            self.assertIn('euler_003.py', result.output)
+            self.assertIn('Skipped 1 unchanged files', result.output)
+            self.assertNotEqual(invalid.exit_code, 0)
+
+    def test_cleanup_after_execute_error(self):
+        with self.runner.isolated_filesystem():
+            with open('euler_001.c', 'w') as f:
+                f.write('int main(void) { return 1; }\n')
+
+            result = self.runner.invoke(cli, ['verify', 'euler_001.c'])
+
+            self.assertIn('[error during execute]', result.output)
+            self.assertFalse(os.path.exists('euler_001.c.out'))
+
+    def test_asyncio_backend(self):
+        with self.runner.isolated_filesystem():
+            for problem_id in range(1, 5):
+                with open('euler_%03d.c' % problem_id, 'w') as f:
+                    f.write('#include <stdio.h>\n'
+                            'int main(void) { printf("%s"); return 0; }\n' %
+                            data.problems[problem_id]['answer'])
+            with open('euler_005.py', 'w') as f:
+                f.write('import time\ntime.sleep(10)')
+
+            result = self.runner.invoke(cli, ['verify', '--backend',
+                                              'asyncio', '--jobs', '3',
+                                              '--timeout', '0.5', '--time',
+                                              '--recursive', '.'])
+            positions = [result.output.index('euler_%03d' % problem_id)
+                         for problem_id in range(1, 6)]
+
+            self.assertEqual(positions, sorted(positions))
+            self.assertIn('Wall time', result.output)
+            self.assertIn('4 correct, 0 incorrect, 0 errors, 1 timeout',
+                          result.output)
+            self.assertEqual(glob.glob('*.out'), [])
+
+    def test_asyncio_cancellation_cleans_up(self):
+        language = data.config.get_language('extension', 'c')
+        with self.runner.isolated_filesystem():
+            with open('euler_001.c', 'w') as f:
+                f.write('#include <unistd.h>\n'
+                        'int main(void) { sleep(10); return 0; }\n')
+
+            async def cancel_verification():
+                verification = asyncio.ensure_future(
+                    verify.verify_solution_async('euler_001.c', language,
+                                                 False, data.problems[1]))
+                while not os.path.exists('euler_001.c.out'):
+                    await asyncio.sleep(0.05)
+                await asyncio.sleep(0.2)
+                verification.cancel()
+                with self.assertRaises(asyncio.CancelledError):
+                    await verification
+
+            start_time = time.perf_counter()
+            loop = asyncio.new_event_loop()
+            try:
+                loop.run_until_complete(cancel_verification())
+            finally:
+                loop.close()
+
+            self.assertLess(time.perf_counter() - start_time, 5)
+            self.assertFalse(os.path.exists('euler_001.c.out'))
+
     def test_show_execute_errors(self):
         with self.runner.isolated_filesystem():
             with open('euler_001.py', 'w') as f:
@@ -145,3 +1031,116 @@ class TestVerifyCommand(CommandTestCase):
 
             self.assertIn('[error during build]', output)
             self.assertIn('fatal error: invalid_header.h', output_with_errors)
+
+    def test_truncated_output(self):
+        with self.runner.isolated_filesystem():
+            with open('euler_001.py', 'w') as f:
+                f.write('print("x" * 1000)\nprint(%s)' %
+                        data.problems[1]['answer'])
+
+            for options in ([], ['--warm']):
+                with mock.patch.dict(data.config._config,
+                                     {'output limit': 100}):
+                    result = self.runner.invoke(
+                        cli, ['verify', '-f', 'jsonl', '--no-cache',
+                              'euler_001.py'] + options)
+                record = json.loads(result.output)
+                output = record['stages']['execute']['output']
+
+                self.assertEqual(record['status'], 'incorrect')
+                self.assertTrue(record['stages']['execute']['truncated'])
+                self.assertTrue(output.endswith(
+                    'x\n%s' % data.problems[1]['answer']))
+                self.assertLessEqual(len(output), 100)
+
+    def test_truncated_errors_in_warm_worker(self):
+        with self.runner.isolated_filesystem():
+            with open('euler_001.py', 'w') as f:
+                f.write('import sys\n'
+                        'sys.stderr.write("start" + "." * 1000 + "end")\n'
+                        'sys.exit(1)')
+
+            with mock.patch.dict(data.config._config, {'output limit': 100}):
+                result = self.runner.invoke(cli, ['verify', '-f', 'jsonl',
+                                                  '--warm', 'euler_001.py'])
+            output = json.loads(result.output)['stages']['execute']['output']
+
+            self.assertTrue(output.startswith('start'))
+            self.assertIn('bytes omitted', output)
+            self.assertTrue(output.endswith('end'))
+
+    def test_verify_archive(self):
+        with self.runner.isolated_filesystem():
+            with zipfile.ZipFile('solutions.zip', 'w') as archive:
+                archive.writestr('a/euler_001.py', 'print(%s)' %
+                                 data.problems[1]['answer'])
+                archive.writestr('a/euler_002.py', 'print(0)')
+                archive.writestr('a/README', '')
+
+            result = self.runner.invoke(cli, ['verify', '-f', 'jsonl',
+                                              'solutions.zip'])
+            records = [json.loads(line)
+                       for line in result.output.splitlines()]
+
+            self.assertEqual(result.exit_code, 0)
+            self.assertEqual([(record['path'], record['status'])
+                              for record in records],
+                             [('solutions.zip:a/euler_001.py', 'correct'),
+                              ('solutions.zip:a/euler_002.py', 'incorrect')])
+            self.assertFalse(os.path.exists(paths.MANIFEST))
+
+            # The results are cached by the names in the archive, not the
+            # random paths they were extracted to.
+            result = self.runner.invoke(cli, ['verify', '--cache-stats',
+                                              'solutions.zip'])
+            self.assertIn('Cached results: 2', result.output)
+            self.assertIn('Hits: 2', result.output)
+
+    def test_verify_paths_from_stdin(self):
+        with self.runner.isolated_filesystem():
+            with open('euler_001.py', 'w') as f:
+                f.write('print(%s)' % data.problems[1]['answer'])
+
+            result = self.runner.invoke(
+                cli, ['verify', '-'], input='euler_001.py\n\nmissing.py\n')
+
+            self.assertIn('Skipping missing.py because it does not exist',
+                          result.output)
+            self.assertIn('Checking output of euler_001.py: %s' %
+                          data.problems[1]['answer'], result.output)
+
+    def test_watch(self):
+        problems = [data.problems[1], data.problems[2]]
+
+        def watch_changes(watcher):
+            with open('answer.h', 'a') as f:
+                f.write('\n')
+            yield {'answer.h', 'notes.txt'}
+            with open('euler_002.c', 'a') as f:
+                f.write('\n')
+            yield {'euler_002.c'}
+
+        with self.runner.isolated_filesystem():
+            for problem in problems:
+                with open('euler_%03d.c' % problem['id'], 'w') as f:
+                    f.write('#include <stdio.h>\n#include "answer.h"\n'
+                            'int main(void) { printf("%s"); return 0; }\n' %
+                            problem['answer'])
+            with open('answer.h', 'w') as f:
+                f.write('/* shared */\n')
+
+            with mock.patch('EasyEuler.watch.watch_changes', watch_changes):
+                result = self.runner.invoke(cli, ['verify', '--watch',
+                                                  'euler_001.c',
+                                                  'euler_002.c'])
+
+            runs = result.output.split('Watching for changes...\n')
+            self.assertEqual(len(runs), 4)
+            self.assertEqual(runs[1].count('Checking output'), 2)
+            self.assertNotIn('euler_001.c', runs[2])
+            self.assertIn('Checking output of euler_002.c: %s' %
+                          problems[1]['answer'], runs[2])
+
+    def test_watch_with_bench(self):
+        result = self.runner.invoke(cli, ['verify', '--watch', '--bench'])
+        self.assertEqual(result.exit_code, 2)
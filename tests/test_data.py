@@ -1,27 +1,92 @@
+import json
+import os
+import tempfile
 import unittest
 
-from EasyEuler.data import ProblemList, ConfigurationDictionary
+from EasyEuler.data import (ConfigSnapshot, ConfigurationDictionary,
+                            ProblemDatabase, load_configs)
 
 
-class TestProblemList(unittest.TestCase):
+class TestProblemDatabase(unittest.TestCase):
     def setUp(self):
-        problem_list = [1, 2, 3]
-        self.problems = ProblemList(problem_list)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
 
-    def test_get_item(self):
-        problem = self.problems[1]
-        self.assertEqual(problem, 1)
+        self.source = os.path.join(directory.name, 'problems.json')
+        self.write_problems([
+            {'id': 1, 'name': 'foo', 'difficulty': 10, 'answer': '1'},
+            {'id': 2, 'name': 'bar', 'difficulty': 5, 'answer': '2'},
+            {'id': 3, 'name': 'baz', 'difficulty': 5, 'answer': '3'}
+        ])
+        self.problems = ProblemDatabase(
+            self.source, os.path.join(directory.name, 'index/problems.sqlite'))
+
+    def write_problems(self, problems):
+        with open(self.source, 'w') as f:
+            json.dump(problems, f)
 
-    def test_get_valid_id(self):
-        problem = self.problems.get(3)
-        self.assertIsNotNone(problem)
+    def test_get_item(self):
+        self.assertEqual(self.problems[2]['name'], 'bar')
+        self.assertTrue(os.path.exists(self.problems.index))
 
     def test_get_invalid_id(self):
-        problem1 = self.problems.get(0)
-        problem2 = self.problems.get(99999)
+        self.assertIsNone(self.problems.get(0))
+        self.assertIsNone(self.problems.get(99999))
+        self.assertRaises(IndexError, lambda: self.problems[0])
+
+    def test_iteration(self):
+        self.assertEqual([problem['id'] for problem in self.problems],
+                         [1, 2, 3])
+        self.assertEqual(len(self.problems), 3)
+
+    def test_summaries(self):
+        summaries = list(self.problems.get_summaries('difficulty'))
+        self.assertEqual(summaries, [(2, 'bar', 5), (3, 'baz', 5),
+                                     (1, 'foo', 10)])
+        self.assertRaises(ValueError, self.problems.get_summaries, 'name')
+
+    def test_search(self):
+        self.write_problems([
+            {'id': 1, 'name': 'Pentagonal numbers', 'difficulty': 5,
+             'description': 'Pentagonal numbers are generated by a formula.'},
+            {'id': 2, 'name': 'Names scores', 'difficulty': 5,
+             'description': 'Using names.txt, a file of first names.',
+             'resources': ['names.txt']},
+            {'id': 3, 'name': 'Hexagonal numbers', 'difficulty': 5,
+             'description': 'Triangle, <b>pentagonal</b> and hexagonal '
+                            'numbers.'}
+        ])
+        self.problems.build_index()
+
+        results = self.problems.search('pentagonal number')
+        self.assertEqual([result[0] for result in results], [1, 3])
+        self.assertEqual(results[0][1], 'Pentagonal numbers')
+        self.assertGreater(results[0][2], results[1][2])
+        self.assertEqual(self.problems.search('names.txt')[0][0], 2)
+        self.assertEqual(len(self.problems.search('numbers', limit=1)), 1)
+        self.assertEqual(self.problems.search('the'), [])
 
-        self.assertIsNone(problem1)
-        self.assertIsNone(problem2)
+    def test_filtered_summaries(self):
+        def get_ids(**filters):
+            return [summary[0] for summary in
+                    self.problems.get_summaries('difficulty', **filters)]
+
+        self.assertEqual(get_ids(ids=[(1, 1), (3, 5)]), [3, 1])
+        self.assertEqual(get_ids(difficulties=[(0, 5)]), [2, 3])
+        self.assertEqual(get_ids(search='BA'), [2, 3])
+        self.assertEqual(get_ids(search='%'), [])
+        self.assertEqual(get_ids(include={1, 2}), [2, 1])
+        self.assertEqual(get_ids(exclude={1, 2}), [3])
+        self.assertEqual(get_ids(limit=1, offset=1), [3])
+
+    def test_rebuild_outdated_index(self):
+        self.problems.build_index()
+        self.write_problems([{'id': 1, 'name': 'qux', 'difficulty': 15}])
+        os.utime(self.source, (os.path.getmtime(self.problems.index) + 1,) * 2)
+
+        problems = ProblemDatabase(self.source, self.problems.index)
+        self.assertEqual(problems[1]['name'], 'qux')
+        self.assertEqual(len(problems), 1)
 
 
 class TestConfigurationDictionary(unittest.TestCase):
@@ -52,6 +117,7 @@ class TestConfigurationDictionary(unittest.TestCase):
                 },
                 'c++': {
                     'extension': 'cpp',
+                    'extensions': ['cc', 'cxx'],
                     'template': 'cpp'
                 }
             }
@@ -76,3 +142,62 @@ class TestConfigurationDictionary(unittest.TestCase):
         self.assertEqual(python['name'], 'python')
         self.assertEqual(ruby['extension'], 'rb')
         self.assertIsNone(invalid_language)
+
+    def test_get_language_by_other_extension(self):
+        cpp = self.config.get_language('extension', 'cxx')
+
+        self.assertEqual(cpp['name'], 'c++')
+        self.assertEqual(cpp['extension'], 'cpp')
+
+
+class TestConfigSnapshot(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.config_path = os.path.join(directory.name, 'config.json')
+        self.snapshot_path = os.path.join(directory.name, 'snapshot.json')
+
+        with open(self.config_path, 'w') as f:
+            json.dump({'foo': 'bar'}, f)
+
+    def load_config(self):
+        configs = []
+
+        def load_configs():
+            with open(self.config_path) as f:
+                configs.append(json.load(f))
+                yield configs[-1]
+
+        snapshot = ConfigSnapshot(self.snapshot_path, [self.config_path])
+        return ConfigurationDictionary(load_configs, snapshot), configs
+
+    def test_snapshot_used(self):
+        config, loaded = self.load_config()
+        self.assertEqual(config['foo'], 'bar')
+        self.assertEqual(len(loaded), 1)
+
+        config, loaded = self.load_config()
+        self.assertEqual(config['foo'], 'bar')
+        self.assertEqual(loaded, [])
+
+    def test_snapshot_invalidated(self):
+        self.load_config()[0]['foo']
+        with open(self.config_path, 'w') as f:
+            json.dump({'foo': 'baz!'}, f)
+
+        config, loaded = self.load_config()
+        self.assertEqual(config['foo'], 'baz!')
+        self.assertEqual(len(loaded), 1)
+
+    def test_merge_retried_after_error(self):
+        with open(self.config_path, 'w') as f:
+            f.write('{"foo": ')
+        config = ConfigurationDictionary(
+            lambda: load_configs([self.config_path]))
+
+        with self.assertRaises(ValueError):
+            config['foo']
+        with open(self.config_path, 'w') as f:
+            json.dump({'foo': 'fixed'}, f)
+
+        self.assertEqual(config['foo'], 'fixed')
@@ -0,0 +1,105 @@
+import os
+import tempfile
+import unittest
+
+from EasyEuler.discovery import (IgnoreRule, find_solution_files,
+                                 get_filename_regex, is_ignored,
+                                 is_solution_file)
+
+
+class TestFilenameRegex(unittest.TestCase):
+    def test_filename_format(self):
+        regex = get_filename_regex('euler_{id:0>3}.{extension}',
+                                   ['py', 'c', 'cpp'])
+
+        match = regex.match('euler_042.cpp')
+        self.assertEqual(match.group('id'), '42')
+        self.assertEqual(match.group('extension'), 'cpp')
+        self.assertEqual(regex.match('euler_1234.c').group('id'), '1234')
+        self.assertIsNone(regex.match('euler_042.o'))
+        self.assertIsNone(regex.match('euler_000.py'))
+        self.assertIsNone(regex.match('euler_042.py.out'))
+
+
+class TestIgnoreRules(unittest.TestCase):
+    def test_patterns(self):
+        rules = [IgnoreRule('*.out', 'root'), IgnoreRule('/build', 'root'),
+                 IgnoreRule('cache/', 'root'), IgnoreRule('a/**/z', 'root')]
+
+        self.assertTrue(is_ignored('root/x/euler_001.out', False, rules))
+        self.assertTrue(is_ignored('root/build', True, rules))
+        self.assertFalse(is_ignored('root/x/build', True, rules))
+        self.assertTrue(is_ignored('root/x/cache', True, rules))
+        self.assertFalse(is_ignored('root/x/cache', False, rules))
+        self.assertTrue(is_ignored('root/a/b/c/z', False, rules))
+        self.assertFalse(is_ignored('other/euler_001.out', False, rules))
+
+    def test_negation(self):
+        rules = [IgnoreRule('euler_*', 'root'),
+                 IgnoreRule('!euler_001.py', 'root')]
+
+        self.assertTrue(is_ignored('root/euler_002.py', False, rules))
+        self.assertFalse(is_ignored('root/euler_001.py', False, rules))
+
+
+class TestFindSolutionFiles(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.regex = get_filename_regex('euler_{id:0>3}.{extension}',
+                                        ['py', 'c'])
+
+    def create_files(self, *paths):
+        for path in paths:
+            path = os.path.join(self.directory, path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            open(path, 'w').close()
+
+    def find(self, *args, **kwargs):
+        return [os.path.relpath(path, self.directory) for path in
+                find_solution_files(self.directory, self.regex,
+                                    *args, **kwargs)]
+
+    def test_find(self):
+        self.create_files('b/euler_002.py', 'a/euler_001.c', 'euler_003.py',
+                          'notes_004.py', 'build/123/foo.o',
+                          'node_modules/x/euler_005.py',
+                          '.git/objects/euler_006.py')
+
+        self.assertEqual(self.find(), ['euler_003.py', 'a/euler_001.c',
+                                       'b/euler_002.py'])
+
+    def test_ignore_files_and_excludes(self):
+        self.create_files('euler_001.py', 'old/euler_002.py',
+                          'new/euler_003.py', 'new/euler_004.py')
+        with open(os.path.join(self.directory, '.gitignore'), 'w') as f:
+            f.write('# Old solutions\nold/\n')
+        with open(os.path.join(self.directory, 'new/.gitignore'), 'w') as f:
+            f.write('euler_004.py\n')
+
+        self.assertEqual(self.find(), ['euler_001.py', 'new/euler_003.py'])
+        self.assertEqual(self.find(['new']), ['euler_001.py'])
+        self.assertEqual(self.find(use_ignore_files=False),
+                         ['euler_001.py', 'new/euler_003.py',
+                          'new/euler_004.py', 'old/euler_002.py'])
+
+    def test_is_solution_file(self):
+        self.create_files('euler_001.py', 'old/euler_002.py',
+                          'new/euler_003.py', 'new/euler_004.py',
+                          'new/notes_005.py', 'node_modules/euler_006.py')
+        with open(os.path.join(self.directory, '.gitignore'), 'w') as f:
+            f.write('old/\n')
+        with open(os.path.join(self.directory, 'new/.gitignore'), 'w') as f:
+            f.write('euler_004.py\n')
+
+        found = self.find()
+        for path in ('euler_001.py', 'old/euler_002.py', 'new/euler_003.py',
+                     'new/euler_004.py', 'new/notes_005.py',
+                     'node_modules/euler_006.py'):
+            self.assertEqual(is_solution_file(
+                os.path.join(self.directory, path), self.directory,
+                self.regex), path in found, path)
+        self.assertFalse(is_solution_file(
+            os.path.join(self.directory, 'new/euler_003.py'),
+            self.directory, self.regex, ['new']))
@@ -0,0 +1,108 @@
+import asyncio
+import shlex
+import sys
+import unittest
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from EasyEuler.process import (HeadTailBuffer, TailBuffer, get_limit_wrapper,
+                               run_process, run_process_async)
+
+
+# Prints the CPU time limit of the process.
+CPU_LIMIT_COMMAND = [sys.executable, '-c',
+                     'import resource\n'
+                     'print(resource.getrlimit(resource.RLIMIT_CPU))']
+
+# Floods stdout and stderr before printing the answer.
+FLOODING_COMMAND = [sys.executable, '-c',
+                    'import sys\n'
+                    'for i in range(10 ** 5): print(i)\n'
+                    'sys.stderr.write("start" + "." * 10 ** 5 + "end")\n'
+                    'print(42)']
+
+
+class TestOutputBuffers(unittest.TestCase):
+    def test_tail_buffer(self):
+        buffer = TailBuffer(4)
+        buffer.write(b'ab')
+        self.assertFalse(buffer.truncated)
+        buffer.write(b'cdef')
+
+        self.assertTrue(buffer.truncated)
+        self.assertEqual(buffer.getvalue(), b'cdef')
+
+    def test_head_tail_buffer(self):
+        buffer = HeadTailBuffer(4)
+        buffer.write(b'abc')
+        self.assertEqual(buffer.getvalue(), b'abc')
+        buffer.write(b'defgh')
+
+        self.assertTrue(buffer.truncated)
+        self.assertEqual(buffer.getvalue(),
+                         b'ab\n[... 4 bytes omitted ...]\ngh')
+
+    def test_unlimited_buffers(self):
+        for buffer in (TailBuffer(), HeadTailBuffer()):
+            buffer.write(b'abc')
+            buffer.write(b'def')
+
+            self.assertFalse(buffer.truncated)
+            self.assertEqual(buffer.getvalue(), b'abcdef')
+
+
+class TestRunProcess(unittest.TestCase):
+    def assert_truncated(self, process):
+        self.assertTrue(process.truncated)
+        self.assertEqual(len(process.stdout), 1000)
+        self.assertTrue(process.stdout.endswith(b'99999\n42\n'))
+        self.assertTrue(process.stderr.startswith(b'start'))
+        self.assertTrue(process.stderr.endswith(b'end'))
+
+    def test_output_limit(self):
+        process, _, _ = run_process(FLOODING_COMMAND, output_limit=1000)
+        self.assert_truncated(process)
+
+    def test_output_limit_async(self):
+        process, _, _ = asyncio.run(run_process_async(FLOODING_COMMAND,
+                                                      output_limit=1000))
+        self.assert_truncated(process)
+
+    def test_no_output_limit(self):
+        process, _, _ = run_process([sys.executable, '-c', 'print(42)'])
+
+        self.assertFalse(process.truncated)
+        self.assertEqual(process.stdout.strip(), b'42')
+
+
+@unittest.skipIf(resource is None, 'requires the resource module')
+class TestLimits(unittest.TestCase):
+    def test_limits_in_shell(self):
+        command = ' '.join(shlex.quote(argument)
+                           for argument in CPU_LIMIT_COMMAND)
+        process, _, limit = run_process(command, {'cpu': 5})
+
+        self.assertEqual(process.stdout.strip(), b'(5, 6)')
+        self.assertIsNone(limit)
+
+    def test_limit_wrapper(self):
+        wrapper = get_limit_wrapper([('RLIMIT_CPU', (5, 6))])
+        process, _, _ = run_process(wrapper + CPU_LIMIT_COMMAND)
+
+        self.assertEqual(process.stdout.strip(), b'(5, 6)')
+
+    def test_crash_is_not_memory_limit(self):
+        process, _, limit = run_process(
+            [sys.executable, '-c', 'import os; os.abort()'], {'memory': 512})
+
+        self.assertNotEqual(process.returncode, 0)
+        self.assertIsNone(limit)
+
+    def test_memory_error_is_memory_limit(self):
+        _, _, limit = run_process(
+            [sys.executable, '-c', 'bytearray(2 ** 32)'], {'memory': 512})
+
+        self.assertEqual(limit, 'memory-limit')
@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+
+from EasyEuler.watch import (InotifyWatcher, PollingWatcher, get_watcher,
+                             watch_changes)
+
+
+class FakeWatcher:
+    def __init__(self, reads):
+        self.reads = list(reads)
+
+    def read(self, timeout=None):
+        return self.reads.pop(0) if self.reads else set()
+
+
+class TestWatchers(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write(self, name, text):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def test_polling_watcher(self):
+        path = self.write('euler_001.py', 'print(1)\n')
+        watcher = PollingWatcher([self.directory], interval=0.01)
+        self.assertEqual(watcher.read(0.05), set())
+
+        # The size changes, even if the modification time doesn't.
+        self.write('euler_001.py', 'print(10)\n')
+        new_path = self.write('euler_002.py', '')
+
+        self.assertEqual(watcher.read(1), {path, new_path})
+
+    @unittest.skipUnless(hasattr(os, 'O_CLOEXEC'), 'requires Linux')
+    def test_inotify_watcher(self):
+        try:
+            watcher = InotifyWatcher([self.directory])
+        except OSError:
+            self.skipTest('inotify is not available')
+        self.addCleanup(watcher.close)
+
+        path = self.write('euler_001.py', 'print(1)\n')
+        # Saved like editors do, by moving a new file over the old one.
+        temp_path = self.write('.euler_002.py.swp', 'print(2)\n')
+        os.replace(temp_path, os.path.join(self.directory, 'euler_002.py'))
+
+        changed = set()
+        while True:
+            more_changed = watcher.read(1)
+            if not more_changed:
+                break
+            changed |= more_changed
+
+        self.assertIn(path, changed)
+        self.assertIn(os.path.join(self.directory, 'euler_002.py'), changed)
+
+    def test_get_watcher(self):
+        watcher = get_watcher([self.directory])
+        watcher.close()
+
+    def test_changes_are_debounced(self):
+        watcher = FakeWatcher([{'a'}, {'b'}, {'a', 'c'}, set(), {'d'}])
+        changes = watch_changes(watcher, debounce_time=0)
+
+        self.assertEqual(next(changes), {'a', 'b', 'c'})
+        self.assertEqual(next(changes), {'d'})
+
+
+if __name__ == '__main__':
+    unittest.main()